@@ -1,14 +1,32 @@
 # address_service.py
-from openai import OpenAI
-import streamlit as st
+import re
+from clients import create_chat_completion, get_openai_client
+from config import load_config
+from reporting import default_reporter
+from resilience import ServiceUnavailable
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+ADDRESS_PATTERN = re.compile(
+    r'(\d+[A-Za-z]?\s+(?:[A-Za-z0-9.\']+\s+){0,4}?'
+    r'(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Court|Ct|Boulevard|Blvd|Way|Place|Pl|Circle|Cir|'
+    r'Terrace|Ter|Pike|Parkway|Pkwy|Highway|Hwy)\.?)'
+    r'(?:\s+(?:Apt|Unit|#)\s*[\w-]+)?,?\s+([A-Za-z .]+?),\s*([A-Z]{2})\.?\s+(\d{5})'
+)
 
-def extract_address(text):
+def address_from_text(text):
+    """Offline fallback: the first full street address written out in the text"""
+    match = ADDRESS_PATTERN.search(text or "")
+    if not match:
+        return {key: "NOT_FOUND" for key in ("street_address", "city", "state", "zip_code")}
+    street, city, state, zip_code = (part.strip() for part in match.groups())
+    return {"street_address": street, "city": city, "state": state, "zip_code": zip_code}
+
+def extract_address(text, config=None, reporter=None, client=None):
     """Extract address from OpenAI analysis"""
+    reporter = default_reporter(reporter)
     try:
-        response = client.chat.completions.create(
+        client = client or get_openai_client(config if config is not None else load_config())
+        response = create_chat_completion(
+            client, "address",
             model="gpt-4",
             messages=[
                 {
@@ -37,11 +55,16 @@ def extract_address(text):
         address_lines = response.choices[0].message.content.strip().split('\n')
         address_dict = {}
         for line in address_lines:
+            if ': ' not in line:
+                continue
             key, value = line.split(': ', 1)
             address_dict[key.strip()] = value.strip()
         
         return address_dict
         
+    except ServiceUnavailable as e:
+        reporter.warning(f"OpenAI unavailable ({str(e)}); reading the address from the text instead")
+        return address_from_text(text)
     except Exception as e:
-        st.error(f"Error extracting address: {str(e)}")
+        reporter.error(f"Error extracting address: {str(e)}")
         return None
@@ -1,22 +1,26 @@
 # analysis_service.py
-from openai import OpenAI
-import streamlit as st
+import re
+from datetime import datetime
+from checkpoint import default_checkpoint
+from clients import create_chat_completion, get_openai_client
+from config import load_config
+from reporting import default_reporter
 
-def analyze_text_with_openai(text):
-    """Process text with OpenAI API focusing on foreclosure details"""
+def analyze_text_with_openai(text, config=None, reporter=None, client=None, checkpoint=None):
+    """Process text with OpenAI API focusing on foreclosure details
+
+    Each chunk analysis and the final summary are checkpoint units.
+    """
+    reporter = default_reporter(reporter)
+    checkpoint = default_checkpoint(checkpoint)
     try:
         # Initialize OpenAI client
-        client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+        client = client or get_openai_client(config if config is not None else load_config())
         
         # Split text into chunks
         chunks, total_chunks = chunk_text(text)
         all_analyses = []
         
-        # Create a progress bar for chunk processing
-        if total_chunks > 1:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-        
         # Define the system prompt as a raw string
         system_prompt = r"""You are a real estate and legal document analysis expert.
 Analyze this section of a foreclosure document and extract key information.
@@ -37,29 +41,16 @@ Format the response with clear headings and bullet points."""
         
         for i, chunk in enumerate(chunks, 1):
             if total_chunks > 1:
-                status_text.text(f'Analyzing section {i} of {total_chunks}')
-                progress_bar.progress(i/total_chunks)
+                reporter.progress("analysis", i/total_chunks, f'Analyzing section {i} of {total_chunks}')
             
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": "Analyze this section of the document:\n\n" + chunk
-                    }
-                ],
-                temperature=0.3
-            )
-            all_analyses.append(response.choices[0].message.content)
+            all_analyses.append(checkpoint.run(
+                f"chunk:{i}",
+                lambda: analyze_chunk(client, system_prompt, chunk, i)
+            ))
         
         # Clear progress indicators if they were created
         if total_chunks > 1:
-            progress_bar.empty()
-            status_text.empty()
+            reporter.clear_progress("analysis")
         
         # Define the summary system prompt as a raw string
         summary_system_prompt = r"""You are a real estate and legal document analysis expert.
@@ -78,27 +69,53 @@ Organize the information under these headings:
 Use bullet points for clarity and highlight any particularly important information."""
         
         # Combine and summarize all analyses
-        final_summary = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": summary_system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": "Combine and summarize these analyses:\n\n" + "\n---\n".join(all_analyses)
-                }
-            ],
-            temperature=0.3
+        return checkpoint.run(
+            "summary",
+            lambda: summarize_analyses(client, summary_system_prompt, all_analyses)
         )
         
-        return final_summary.choices[0].message.content
-        
     except Exception as e:
-        st.error(f"OpenAI Error: {str(e)}")
+        reporter.error(f"OpenAI Error: {str(e)}")
         return None
 
+def analyze_chunk(client, system_prompt, chunk, chunk_number=None):
+    """Analyze one chunk of document text"""
+    response = create_chat_completion(
+        client, "chunk", {"chunk": chunk_number, "chunk_chars": len(chunk)},
+        model="gpt-4",
+        messages=[
+            {
+                "role": "system", 
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": "Analyze this section of the document:\n\n" + chunk
+            }
+        ],
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+def summarize_analyses(client, summary_system_prompt, all_analyses):
+    """Combine the per-chunk analyses into one summary"""
+    final_summary = create_chat_completion(
+        client, "summary",
+        model="gpt-4",
+        messages=[
+            {
+                "role": "system",
+                "content": summary_system_prompt
+            },
+            {
+                "role": "user",
+                "content": "Combine and summarize these analyses:\n\n" + "\n---\n".join(all_analyses)
+            }
+        ],
+        temperature=0.3
+    )
+    return final_summary.choices[0].message.content
+
 def chunk_text(text, max_tokens=6000):
     """Split text into chunks of approximately max_tokens"""
     # Rough approximation: 1 token ~= 4 characters
@@ -132,3 +149,77 @@ def chunk_text(text, max_tokens=6000):
         chunks.append("\n".join(current_chunk))
     
     return chunks, len(chunks)  # Return both chunks and chunk count
+
+MONEY_PATTERN = re.compile(r'\$\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d{2})?')
+DATE_PATTERNS = (
+    (re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b'), "%m/%d/%Y"),
+    (re.compile(r'\b([A-Z][a-z]+ \d{1,2}, \d{4})\b'), "%B %d, %Y"),
+)
+
+def split_sections(analysis):
+    """Map each '# Heading' of the summary to the text beneath it"""
+    sections = {}
+    current = ""
+    for line in analysis.splitlines():
+        heading = re.match(r'^#+\s*(.+?)\s*$', line)
+        if heading:
+            current = heading.group(1).lower()
+            sections.setdefault(current, "")
+        else:
+            sections[current] = sections.get(current, "") + line + "\n"
+    return sections
+
+def find_section(sections, *keywords):
+    """Text of the first section whose heading contains one of the keywords"""
+    for heading, text in sections.items():
+        if any(keyword in heading for keyword in keywords):
+            return text
+    return ""
+
+def parse_amounts(text):
+    """All dollar amounts mentioned in a block of text"""
+    return [
+        float(whole.replace(',', '') + (cents or ''))
+        for whole, cents in MONEY_PATTERN.findall(text)
+    ]
+
+def parse_date(text):
+    """First recognizable date in text, as YYYY-MM-DD"""
+    for pattern, date_format in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            value = match.group(0) if date_format == "%m/%d/%Y" else match.group(1)
+            try:
+                return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+    return None
+
+def find_labeled_value(text, label):
+    """Value after 'Label:' on a bullet line, with markdown emphasis removed"""
+    match = re.search(rf'{label}[^:\n]*:\s*(.+)', text, re.IGNORECASE)
+    if not match:
+        return None
+    value = match.group(1).replace('*', '').strip()
+    return value or None
+
+def extract_case_fields(analysis):
+    """Pull structured fields for indexing out of the summary analysis"""
+    sections = split_sections(analysis or "")
+    parties = find_section(sections, "part") or analysis or ""
+    claims = find_section(sections, "claim", "judg")
+    liens = find_section(sections, "lien", "encumbr")
+    dates = find_section(sections, "date")
+
+    claim_amounts = parse_amounts(claims)
+    lien_amounts = parse_amounts(liens)
+
+    filing_line = next((line for line in dates.splitlines() if 'fil' in line.lower()), dates)
+    return {
+        "plaintiff": find_labeled_value(parties, "plaintiff") or find_labeled_value(parties, "lender"),
+        "defendant": find_labeled_value(parties, "defendant") or find_labeled_value(parties, "owner"),
+        "judgment_amount": max(claim_amounts) if claim_amounts else None,
+        "claims_total": sum(claim_amounts) if claim_amounts else None,
+        "liens_total": sum(lien_amounts) if lien_amounts else None,
+        "lien_count": len(lien_amounts),
+        "filing_date": parse_date(filing_line)
+    }
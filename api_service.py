@@ -0,0 +1,415 @@
+# api_service.py
+"""HTTP API for the analysis pipeline: submit PDFs or case numbers, get job IDs back.
+
+Jobs run on a pool of worker threads, each through process_pdf_document,
+while the async server keeps accepting submissions and streaming progress.
+Submitting a document that is already queued, running or done (same PDF
+bytes, or same case number) returns the existing job instead of starting
+another; a case-number job whose PDF turns out to match a running upload
+waits for that upload's pipeline run rather than repeating it.
+
+    python api_service.py --port 8000 --workers 8
+
+    POST /jobs                  PDF body (Content-Type: application/pdf), multipart
+                                form with a `file` field, or JSON {"case_number": "A 2601234"};
+                                add ?enrich=0 to skip Bridge/Zestimate lookups
+    GET  /jobs/{id}             status, current stage and, when done, the result
+    GET  /jobs/{id}/events      server-sent events: stage starts/finishes, progress, result
+    GET  /jobs/{id}/result      the result record (?include_text=1 for the OCR text)
+    GET  /health                job counts and circuit breaker states
+    GET  /metrics               Prometheus metrics (see tracing.py)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from blob_store import BlobStore, file_digest
+from config import get_endpoint, load_config
+from job_queue import NON_RETRYABLE_STAGES
+from pipeline import PipelineContext, process_pdf_document
+from reporting import LoggingReporter
+from resilience import breaker_states
+from result_cache import ResultCache
+from results_store import ResultsStore
+from tracing import process_tracer, render_prometheus
+
+DEFAULT_WORKERS = 8
+TERMINAL_STATUSES = ("done", "failed")
+KEEPALIVE_SECONDS = 15
+
+class ApiJob:
+    """One submission and everything that has happened to it
+
+    Status, stage and events are only changed on the event loop thread
+    (see JobManager.publish), so handlers can read them without locks.
+    """
+    def __init__(self, key, kind, source, case_number=None, enrich=True):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.source = source
+        self.case_number = case_number
+        self.enrich = enrich
+        self.status = "queued"
+        self.stage = None
+        self.submissions = 1
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.subscribers = set()
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self, include_result=False, include_text=False):
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "source": self.source,
+            "case_number": self.case_number,
+            "status": self.status,
+            "stage": self.stage,
+            "submissions": self.submissions,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+        if include_result and self.result is not None:
+            data["result"] = public_result(self.result, include_text)
+        return data
+
+def pipeline_succeeded(result):
+    """Whether a result counts as done; like the job queue, a failed geocode still does"""
+    return not result.get("failed_stage") or result["failed_stage"] in NON_RETRYABLE_STAGES
+
+def public_result(result, include_text=False):
+    """Result record as returned by the API; the OCR text only on request"""
+    if include_text:
+        return result
+    return {key: value for key, value in result.items() if key != "text"}
+
+class EventReporter(LoggingReporter):
+    """Logs like LoggingReporter and publishes progress and problems as job events"""
+    def __init__(self, manager, job):
+        super().__init__("api", prefix=f"[{job.id[:8]}] ")
+        self.manager = manager
+        self.job = job
+
+    def warning(self, message):
+        super().warning(message)
+        self.manager.publish(self.job, {"type": "warning", "message": str(message)})
+
+    def error(self, message):
+        super().error(message)
+        self.manager.publish(self.job, {"type": "error", "message": str(message)})
+
+    def progress(self, stage, fraction, message=None):
+        super().progress(stage, fraction, message)
+        self.manager.publish(self.job, {"type": "progress", "stage": stage, "fraction": round(fraction, 3),
+                                        "message": message})
+
+class JobContext(PipelineContext):
+    """Pipeline context that announces each stage as a job event"""
+    def __init__(self, manager, job, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manager = manager
+        self.job = job
+
+    @contextmanager
+    def stage(self, name):
+        self.manager.publish(self.job, {"type": "stage", "stage": name, "status": "started"})
+        start = time.perf_counter()
+        with super().stage(name) as span:
+            yield span
+        self.manager.publish(self.job, {"type": "stage", "stage": name, "status": "finished",
+                                        "seconds": round(time.perf_counter() - start, 3)})
+
+class JobManager:
+    """Accepts submissions, coalesces duplicates and runs jobs on worker threads"""
+    def __init__(self, config=None, workers=DEFAULT_WORKERS, store=None, blob_store=None, max_jobs=1000,
+                 request_delay=1):
+        self.config = config if config is not None else load_config()
+        self.request_delay = request_delay  # Politeness delay between court website requests
+        self.store = store
+        self.blob_store = blob_store or BlobStore()
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.active_keys = {}
+        self.pipeline_runs = ResultCache()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-job")
+        self.loop = None
+
+    def bind(self, loop):
+        self.loop = loop
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def counts(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _submit(self, key, kind, source, run, case_number=None, enrich=True):
+        """(job, coalesced) for a submission; a failed job with the same key is retried"""
+        existing = self.jobs.get(self.active_keys.get(key))
+        if existing is not None and existing.status != "failed":
+            existing.submissions += 1
+            process_tracer().count("api_coalesced_submissions", kind=kind)
+            return existing, True
+
+        job = ApiJob(key, kind, source, case_number, enrich)
+        self.jobs[job.id] = job
+        self.active_keys[key] = job.id
+        self._evict()
+        process_tracer().count("api_jobs", kind=kind)
+        self.pool.submit(self._run, job, run)
+        return job, False
+
+    def _evict(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished]:
+            if len(self.jobs) <= self.max_jobs:
+                break
+            job = self.jobs.pop(job_id)
+            if self.active_keys.get(job.key) == job_id:
+                del self.active_keys[job.key]
+
+    def store_upload(self, data):
+        """(digest, path) of an uploaded PDF saved to the blob store; blocking, run it off the loop"""
+        return hashlib.sha256(data).hexdigest(), self.blob_store.put_bytes(data)
+
+    def submit_document(self, digest, path, filename=None, enrich=True):
+        return self._submit(("document", digest, enrich), "document", filename or digest[:12],
+                            lambda job: self._process(job, path, digest), enrich=enrich)
+
+    def submit_case(self, case_number, enrich=True):
+        case_number = " ".join(case_number.upper().split())
+        return self._submit(("case", case_number, enrich), "case", case_number,
+                            lambda job: self._process_case(job), case_number, enrich)
+
+    def _process_case(self, job):
+        from court_scraper import CourtScraper
+        self.publish(job, {"type": "stage", "stage": "fetch", "status": "started"})
+        scraper = CourtScraper(EventReporter(self, job), request_delay=self.request_delay, store=self.blob_store,
+                               base_url=get_endpoint(self.config, "COURT_BASE_URL"))
+        if not scraper.initialize_session():
+            raise RuntimeError("Could not start a court website session")
+        path = scraper.fetch_case_pdf(job.case_number)
+        if not path:
+            raise RuntimeError(f"Could not download the initial filing for {job.case_number}")
+        self.publish(job, {"type": "stage", "stage": "fetch", "status": "finished"})
+        return self._process(job, path, file_digest(path).hexdigest())
+
+    def _process(self, job, path, digest):
+        """Run the pipeline for a stored PDF, sharing the run with any job on the same bytes"""
+        def run():
+            context = JobContext(self, job, self.config, EventReporter(self, job),
+                                 trace_attributes={"job": job.id[:8], "source": job.source,
+                                                   **({"case_number": job.case_number} if job.case_number else {})})
+            return process_pdf_document(path, context, job.case_number, job.enrich)
+
+        result = self.pipeline_runs.get_or_compute(("pipeline", digest, job.enrich), run)
+        if not pipeline_succeeded(result):
+            self.pipeline_runs.invalidate(digest)  # Let a resubmission try again
+        result = {**result, "source": job.source, "case_number": job.case_number or result.get("case_number")}
+        if self.store is not None:
+            self.store.save_result(result)
+        return result
+
+    def _run(self, job, run):
+        self.publish(job, {"type": "status", "status": "running"})
+        try:
+            result = run(job)
+        except Exception as e:
+            logging.getLogger("api").exception(f"[{job.id[:8]}] job failed")
+            self.publish(job, {"type": "failed", "error": str(e)})
+            return
+        if not pipeline_succeeded(result):
+            self.publish(job, {"type": "failed", "error": result.get("error") or f"{result['failed_stage']} failed",
+                               "failed_stage": result["failed_stage"], "result": result})
+        else:
+            self.publish(job, {"type": "result", "result": result})
+
+    def publish(self, job, event):
+        """Record an event for a job and send it to its subscribers; safe from any thread"""
+        event = {**event, "job_id": job.id, "time": time.time()}
+        if self.loop is None:
+            self._deliver(job, event)
+        else:
+            self.loop.call_soon_threadsafe(self._deliver, job, event)
+
+    def _deliver(self, job, event):
+        kind = event["type"]
+        if kind == "status":
+            job.status = event["status"]
+        elif kind == "stage":
+            job.stage = event["stage"]
+        elif kind in ("result", "failed"):
+            job.status = "done" if kind == "result" else "failed"
+            job.result = event.get("result")
+            job.error = event.get("error")
+            job.finished_at = event["time"]
+            event = {**event, "result": public_result(job.result) if job.result else None}
+        job.events.append(event)
+        for subscriber in list(job.subscribers):
+            subscriber.put_nowait(event)
+
+    def subscribe(self, job):
+        """Queue receiving the job's past events, then new ones as they happen"""
+        subscriber = asyncio.Queue()
+        for event in job.events:
+            subscriber.put_nowait(event)
+        job.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, job, subscriber):
+        job.subscribers.discard(subscriber)
+
+def create_app(manager):
+    """Starlette application serving the job API"""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+    from starlette.routing import Route
+
+    def dumps(data):
+        return json.dumps(data, default=str)
+
+    def json_response(data, status_code=200):
+        return JSONResponse(json.loads(dumps(data)), status_code=status_code)
+
+    def flag(request, name, default):
+        value = request.query_params.get(name)
+        return default if value is None else value.lower() not in ("0", "false", "no", "off")
+
+    def job_or_404(request):
+        return manager.get(request.path_params["job_id"])
+
+    async def submit(request):
+        enrich = flag(request, "enrich", True)
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        if content_type == "application/pdf":
+            data = await request.body()
+            filename = request.query_params.get("filename")
+        elif content_type == "multipart/form-data":
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                return json_response({"error": "multipart submissions need a 'file' field"}, 400)
+            data = await upload.read()
+            filename = upload.filename
+        elif content_type == "application/json":
+            try:
+                body = await request.json()
+            except ValueError:
+                return json_response({"error": "invalid JSON body"}, 400)
+            if not isinstance(body, dict) or not body.get("case_number"):
+                return json_response({"error": "JSON submissions need a 'case_number'"}, 400)
+            job, coalesced = manager.submit_case(str(body["case_number"]), flag(request, "enrich", body.get("enrich", True)))
+            return json_response({**job.to_dict(), "coalesced": coalesced}, 200 if coalesced else 202)
+        else:
+            return json_response({"error": "send a PDF (application/pdf or multipart/form-data) "
+                                           "or JSON with a case_number"}, 415)
+
+        if not data.startswith(b"%PDF"):
+            return json_response({"error": "the upload is not a PDF"}, 400)
+        digest, path = await asyncio.get_running_loop().run_in_executor(None, manager.store_upload, data)
+        job, coalesced = manager.submit_document(digest, path, filename, enrich)
+        return json_response({**job.to_dict(), "coalesced": coalesced}, 200 if coalesced else 202)
+
+    async def status(request):
+        job = job_or_404(request)
+        if job is None:
+            return json_response({"error": "no such job"}, 404)
+        return json_response(job.to_dict(include_result=True))
+
+    async def result(request):
+        job = job_or_404(request)
+        if job is None:
+            return json_response({"error": "no such job"}, 404)
+        if not job.finished:
+            return json_response({**job.to_dict(), "error": "job has not finished"}, 409)
+        return json_response(public_result(job.result, flag(request, "include_text", False))
+                             if job.result else job.to_dict())
+
+    async def events(request):
+        job = job_or_404(request)
+        if job is None:
+            return json_response({"error": "no such job"}, 404)
+
+        async def stream():
+            subscriber = manager.subscribe(job)
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscriber.get(), KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event['type']}\ndata: {dumps(event)}\n\n"
+                    if event["type"] in ("result", "failed"):
+                        break
+            finally:
+                manager.unsubscribe(job, subscriber)
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def health(request):
+        return json_response({"status": "ok", "jobs": manager.counts(), "breakers": breaker_states()})
+
+    async def metrics(request):
+        return PlainTextResponse(render_prometheus(process_tracer()), media_type="text/plain; version=0.0.4")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        manager.bind(asyncio.get_running_loop())
+        try:
+            yield
+        finally:
+            manager.shutdown()
+
+    return Starlette(
+        routes=[
+            Route("/jobs", submit, methods=["POST"]),
+            Route("/jobs/{job_id}", status),
+            Route("/jobs/{job_id}/result", result),
+            Route("/jobs/{job_id}/events", events),
+            Route("/health", health),
+            Route("/metrics", metrics),
+        ],
+        lifespan=lifespan
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the analysis pipeline over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Documents processed at once")
+    parser.add_argument("--secrets", help="Path to a secrets.toml file")
+    parser.add_argument("--store", help="Also save results to this results database")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    import uvicorn
+    manager = JobManager(load_config(secrets_file=args.secrets), args.workers,
+                         ResultsStore(args.store) if args.store else None)
+    uvicorn.run(create_app(manager), host=args.host, port=args.port, log_level="info" if args.verbose else "warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# batch_runner.py
+"""Run the foreclosure pipeline outside Streamlit.
+
+Examples:
+
+    python batch_runner.py --pdf-dir ./filings --output results.jsonl
+    python batch_runner.py --begin-date 10/01/2026 --end-date 10/05/2026 --scraper hybrid
+    python batch_runner.py --pdf-dir ./filings --export exports/daily --export-format parquet --append
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+from config import get_endpoint, load_config
+from export_service import EXPORTERS, open_exporter
+from pipeline import process_many, process_pipelined
+from reporting import LoggingReporter
+from resilience import breaker_states
+from results_store import ResultsStore
+from tracing import JsonlSpanExporter, Tracer, process_tracer, serve_metrics
+
+def pdfs_in_directory(pdf_dir):
+    """(path, case_number) pairs for every PDF in a directory"""
+    paths = sorted(glob.glob(os.path.join(pdf_dir, "**", "*.pdf"), recursive=True))
+    return [(path, None) for path in paths]
+
+def pdfs_from_court(begin_date, end_date, scraper_name, limit=None, base_url=None):
+    """Download every foreclosure filing in a date range, returning (path, case_number) pairs"""
+    reporter = LoggingReporter(name="scraper")
+    if scraper_name == "hybrid":
+        from court_scraper_hybrid import CourtScraperHybrid
+        scraper = CourtScraperHybrid(reporter, base_url=base_url)
+    else:
+        from court_scraper import CourtScraper
+        scraper = CourtScraper(reporter, base_url=base_url)
+
+    documents = []
+    for case_number, pdf_path in scraper.iter_foreclosure_pdfs(begin_date, end_date, limit):
+        if pdf_path:
+            documents.append((pdf_path, case_number))
+        else:
+            reporter.error(f"No PDF downloaded for case {case_number}")
+    return documents
+
+def log_stage_stats(snapshot, level):
+    """Log queue depth and utilization for each pipelined stage"""
+    for stats in snapshot:
+        logging.log(
+            level,
+            f"{stats['stage']:<11} workers={stats['workers']} queue={stats['queue_depth']}/{stats['queue_capacity']} "
+            f"processed={stats['processed']} failed={stats['failed']} utilization={stats['utilization']:.0%}"
+        )
+
+def log_trace_summary(tracer):
+    """Log where the run's time went and what it used"""
+    for row in tracer.summary():
+        logging.info(
+            f"{row['span']:<32} calls={row['calls']} errors={row['errors']} total={row['total_s']:.1f}s "
+            f"p50={row['p50_ms']:.0f}ms p95={row['p95_ms']:.0f}ms"
+        )
+    for name, total in sorted(tracer.counter_totals().items()):
+        logging.info(f"{name:<32} {total:,}")
+    for breaker in breaker_states():
+        if breaker["state"] != "closed":
+            logging.warning(f"Circuit breaker for {breaker['service']} is {breaker['state']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch foreclosure document pipeline")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pdf-dir", help="Directory of PDFs to process")
+    source.add_argument("--begin-date", help="Court search begin date (MM/DD/YYYY)")
+    parser.add_argument("--end-date", help="Court search end date (MM/DD/YYYY), defaults to today")
+    parser.add_argument("--scraper", choices=["http", "hybrid"], default="hybrid")
+    parser.add_argument("--limit", type=int, help="Maximum number of court cases to fetch")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap stages across documents instead of one process per document")
+    parser.add_argument("--no-enrich", action="store_true", help="Skip Bridge parcel and Zestimate lookups")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml" if os.path.exists(".streamlit/secrets.toml") else None,
+                        help="secrets.toml to read settings from (environment variables also work)")
+    parser.add_argument("--output", default="-", help="JSON lines output file (default: stdout)")
+    parser.add_argument("--store", help="Also save results to this SQLite results database")
+    parser.add_argument("--export", help="Also write fixed-schema case records to this file or Parquet directory")
+    parser.add_argument("--export-format", choices=sorted(EXPORTERS), help="Defaults to the --export extension")
+    parser.add_argument("--append", action="store_true",
+                        help="Add to an existing export (JSON lines file or Parquet directory) instead of replacing it")
+    parser.add_argument("--trace", help="Append a JSON line per span (stage or service call) to this file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    config = load_config(secrets_file=args.secrets)
+    tracer = Tracer(exporters=[JsonlSpanExporter(args.trace)] if args.trace else None, parent=process_tracer())
+    if args.metrics_port:
+        serve_metrics(process_tracer(), args.metrics_port)
+
+    if args.pdf_dir:
+        documents = pdfs_in_directory(args.pdf_dir)
+    else:
+        with tracer.activate():
+            documents = pdfs_from_court(args.begin_date, args.end_date, args.scraper, args.limit,
+                                        get_endpoint(config, "COURT_BASE_URL"))
+
+    logging.info(f"Processing {len(documents)} documents")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    executors = []
+    if args.pipelined:
+        results = process_pipelined(documents, config, enrich=not args.no_enrich,
+                                    on_executor=executors.append, tracer=tracer)
+    else:
+        results = process_many(documents, config, args.workers, enrich=not args.no_enrich, tracer=tracer)
+
+    store = ResultsStore(args.store) if args.store else None
+    exporter = open_exporter(args.export, args.export_format, args.append) if args.export else None
+    failures = 0
+    try:
+        for result in results:
+            failures += result["failed_stage"] is not None
+            if store and result["analysis"]:
+                store.save_result(result)
+            if exporter:
+                exporter.write_result(result)
+            output.write(json.dumps(result, default=str) + "\n")
+            output.flush()
+            if executors:
+                log_stage_stats(executors[0].snapshot(), logging.DEBUG)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if exporter:
+            exporter.close()
+
+    if executors:
+        log_stage_stats(executors[0].snapshot(), logging.INFO)
+        logging.info(f"Bottleneck stage: {executors[0].bottleneck()}")
+
+    log_trace_summary(tracer)
+    logging.info(f"Finished {len(documents)} documents, {failures} with failures")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
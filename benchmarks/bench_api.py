@@ -0,0 +1,191 @@
+# benchmarks/bench_api.py
+"""Load test the HTTP API offline against local service stand-ins.
+
+Starts api_service in-process on a free port with every service pointed at
+the stand-ins, then for each level of concurrent clients has every client
+submit its own synthetic filings one after another and follow each job's
+event stream to the result. Reports documents per second and p50/p95
+submit-to-result latency per level, then checks coalescing: many clients
+submitting the same PDF at once should cost one pipeline run (one set of
+Textract calls). Results are appended to benchmarks/results/api.jsonl.
+
+    python benchmarks/bench_api.py --clients 1 2 4 8 16 --documents 2
+    python benchmarks/bench_api.py --workers 4 --latency openai=1500
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import DEFAULT_LATENCY_MS, git_commit, parse_service_values, percentile
+from standins import SERVICES, ServiceProfile, StandinServer, synthetic_pdf
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "api.jsonl")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class ApiServer:
+    """api_service running on a background thread"""
+    def __init__(self, config, workers, store_root):
+        import uvicorn
+        from api_service import JobManager, create_app
+        from blob_store import BlobStore
+        self.manager = JobManager(config, workers, blob_store=BlobStore(store_root), request_delay=0)
+        self.port = free_port()
+        self.server = uvicorn.Server(uvicorn.Config(create_app(self.manager), host="127.0.0.1", port=self.port,
+                                                    log_level="warning", lifespan="on"))
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self._thread.join()
+
+def submit(base_url, pdf_bytes, enrich=True):
+    request = urllib.request.Request(f"{base_url}/jobs?enrich={int(enrich)}", data=pdf_bytes,
+                                     headers={"Content-Type": "application/pdf"}, method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def follow(base_url, job_id):
+    """Read a job's event stream until its result; returns the final event"""
+    with urllib.request.urlopen(f"{base_url}/jobs/{job_id}/events") as response:
+        kind = None
+        for line in response:
+            line = line.decode().rstrip("\n")
+            if line.startswith("event: "):
+                kind = line[len("event: "):]
+            elif line.startswith("data: ") and kind in ("result", "failed"):
+                return json.loads(line[len("data: "):])
+    return None
+
+def run_document(base_url, pdf_bytes, enrich):
+    start = time.perf_counter()
+    job = submit(base_url, pdf_bytes, enrich)
+    event = follow(base_url, job["job_id"])
+    return event is not None and event["type"] == "result", (time.perf_counter() - start) * 1000
+
+def run_level(base_url, clients, documents, pages, enrich):
+    """Each client submits `documents` distinct filings in turn; returns stats for the level"""
+    pdfs = [[synthetic_pdf(pages, title=f"COMPLAINT IN FORECLOSURE {clients}-{client}-{n}")
+             for n in range(documents)] for client in range(clients)]
+
+    def client(own_pdfs):
+        return [run_document(base_url, pdf_bytes, enrich) for pdf_bytes in own_pdfs]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        calls = [call for calls in pool.map(client, pdfs) for call in calls]
+    wall = time.perf_counter() - start
+    latencies = [elapsed for _, elapsed in calls]
+    return {
+        "clients": clients,
+        "documents": len(calls),
+        "errors": sum(not ok for ok, _ in calls),
+        "throughput_per_s": len(calls) / wall,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": max(latencies)
+    }
+
+def coalescing_check(base_url, server, clients, pages, enrich):
+    """Submit one PDF from many clients at once; count jobs and Textract calls"""
+    pdf_bytes = synthetic_pdf(pages, title="COMPLAINT IN FORECLOSURE coalesced")
+    textract_before = server.requests.get("textract", 0)
+    with ThreadPoolExecutor(clients) as pool:
+        jobs = list(pool.map(lambda _: submit(base_url, pdf_bytes, enrich), range(clients)))
+        events = list(pool.map(lambda job: follow(base_url, job["job_id"]), jobs))
+    return {
+        "clients": clients,
+        "jobs": len({job["job_id"] for job in jobs}),
+        "coalesced_submissions": sum(job["coalesced"] for job in jobs),
+        "results": sum(event is not None and event["type"] == "result" for event in events),
+        "textract_requests": server.requests.get("textract", 0) - textract_before
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 2, 4, 8, 16], help="Concurrency levels")
+    parser.add_argument("--documents", type=int, default=2, help="Documents per client at each level")
+    parser.add_argument("--workers", type=int, default=16, help="API worker threads")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per synthetic PDF")
+    parser.add_argument("--no-enrich", action="store_true", help="Skip Bridge/Zestimate lookups")
+    parser.add_argument("--latency", nargs="*", metavar="SERVICE=MS",
+                        help=f"Per-service latency; defaults {DEFAULT_LATENCY_MS}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    latency = parse_service_values(args.latency, DEFAULT_LATENCY_MS)
+    profiles = {service: ServiceProfile(latency_ms=latency.get(service, 0)) for service in SERVICES}
+    enrich = not args.no_enrich
+    settings = {
+        "documents": args.documents,
+        "workers": args.workers,
+        "pages": args.pages,
+        "enrich": enrich,
+        "latency_ms": latency,
+        "seed": args.seed
+    }
+
+    levels = []
+    with tempfile.TemporaryDirectory(prefix="bench_api_") as store_root, \
+            StandinServer(profiles, pdf_pages=args.pages, seed=args.seed) as standins, \
+            ApiServer(standins.config(), args.workers, store_root) as api:
+        run_document(api.base_url, synthetic_pdf(args.pages, title="warmup"), enrich)
+        print(f"{'clients':>7} {'docs':>5} {'errors':>6} {'per s':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for clients in args.clients:
+            stats = run_level(api.base_url, clients, args.documents, args.pages, enrich)
+            levels.append(stats)
+            print(f"{clients:>7} {stats['documents']:>5} {stats['errors']:>6} {stats['throughput_per_s']:>7.2f} "
+                  f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+        coalescing = coalescing_check(api.base_url, standins, max(args.clients), args.pages, enrich)
+        print(f"\n{coalescing['clients']} clients sending the same PDF: {coalescing['jobs']} job(s), "
+              f"{coalescing['results']} results, {coalescing['textract_requests']} Textract requests "
+              f"for {args.pages} pages")
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": settings,
+        "levels": levels,
+        "coalescing": coalescing
+    }
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Appended to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
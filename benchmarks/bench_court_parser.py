@@ -0,0 +1,88 @@
+# benchmarks/bench_court_parser.py
+"""Benchmark court page parsing over the saved fixture pages.
+
+Large date-range result pages are built by repeating the rows of the saved
+results fixture. Usage:
+
+    python benchmarks/bench_court_parser.py --rows 50 500 5000 --repeat 20
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from court_parser import parse_search_results, parse_case_documents
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "court")
+
+def load_fixture(name):
+    """Read a saved fixture page"""
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def scale_results_page(page_html, rows):
+    """Repeat the result rows of a saved page until it holds the given row count"""
+    body = re.search(r'<tbody>(.*)</tbody>', page_html, re.DOTALL)
+    saved_rows = re.findall(r'<tr>.*?</tr>', body.group(1), re.DOTALL)
+    scaled = "\n".join(saved_rows[i % len(saved_rows)] for i in range(rows))
+    return page_html[:body.start(1)] + scaled + page_html[body.end(1):]
+
+def bs4_parse_search_results(page_html):
+    """Reference implementation using the previous BeautifulSoup html.parser approach"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_html, 'html.parser')
+    table = soup.find('table', id='cpciv_classification_results')
+    results = []
+    for row in table.find('tbody').find_all('tr'):
+        case_input = row.find_all('td')[-1].find('input', {'name': 'casenumber'})
+        results.append(case_input['value'] if case_input else None)
+    return results
+
+def time_parser(parser, page_html, repeat):
+    """Return per-call timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(page_html)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    print(f"{label:<40} median {statistics.median(timings):8.2f} ms   "
+          f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--compare-bs4", action="store_true",
+                        help="Also time the old BeautifulSoup html.parser approach")
+    args = parser.parse_args()
+    if args.compare_bs4:
+        try:
+            import bs4  # noqa: F401
+        except ImportError:
+            parser.error("--compare-bs4 needs BeautifulSoup, which the app no longer depends on; "
+                         "pip install beautifulsoup4")
+
+    results_page = load_fixture("results_page.html")
+    docs_page = load_fixture("case_docs_page.html")
+
+    report("case documents page", time_parser(parse_case_documents, docs_page, args.repeat))
+
+    for rows in args.rows:
+        page_html = scale_results_page(results_page, rows)
+        assert len(parse_search_results(page_html)) == rows
+        size_kb = len(page_html) / 1024
+        report(f"results {rows} rows ({size_kb:.0f} KB) lxml",
+               time_parser(parse_search_results, page_html, args.repeat))
+        if args.compare_bs4:
+            report(f"results {rows} rows ({size_kb:.0f} KB) bs4",
+                   time_parser(bs4_parse_search_results, page_html, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# benchmarks/bench_pipeline.py
+"""Benchmark every pipeline stage offline against local service stand-ins.
+
+Each stage runs over the same inputs at a fixed concurrency and reports
+throughput, p50/p95/p99 latency, error count and peak traced memory.
+Results are appended to benchmarks/results/pipeline.jsonl; --compare
+checks them against the last run with the same settings.
+
+    python benchmarks/bench_pipeline.py --documents 20 --concurrency 4
+    python benchmarks/bench_pipeline.py --latency openai=1500 --errors openai=0.05 --compare
+    python benchmarks/bench_pipeline.py --stages map_service enrichment --slow google=0.05 --slow-ms google=3000
+    python benchmarks/bench_pipeline.py --pdf-dir ./redacted_filings --stages pdf_service
+
+PDFs are synthetic unless --pdf-dir points at (redacted) filings. The
+hybrid and headless scrapers need Chrome or Chromium and are skipped
+without one; the headless scraper is timed on its whole flow (search
+form, results, case documents, PDF) since it has no fetch-by-case call.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standins import SERVICES, ServiceProfile, StandinServer, load_responses, synthetic_pdf
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "pipeline.jsonl")
+
+# Rough production latencies, scaled down so a run takes seconds
+DEFAULT_LATENCY_MS = {"textract": 150, "openai": 600, "bridge": 80, "google": 50, "court": 100}
+
+STAGES = ("pdf_service", "analysis_service", "address_service", "map_service", "enrichment",
+          "court_scraper", "court_scraper_hybrid", "court_scraper_headless")
+BROWSER_STAGES = ("court_scraper_hybrid", "court_scraper_headless")
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+def measure(fn, inputs, concurrency, warmup=1):
+    """Run fn over inputs; fn returns a truthy value on success
+
+    The first `warmup` inputs are run beforehand and not counted, so client
+    construction and first-use imports don't land in the percentiles.
+    """
+    def call(item):
+        start = time.perf_counter()
+        try:
+            ok = bool(fn(item))
+        except Exception:
+            logging.exception("stage call raised")
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000
+
+    for item in inputs[:warmup]:
+        call(item)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        calls = list(pool.map(call, inputs))
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = [elapsed for _, elapsed in calls]
+    return {
+        "calls": len(calls),
+        "errors": sum(not ok for ok, _ in calls),
+        "throughput_per_s": len(calls) / wall if wall else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+        "peak_traced_mb": peak / 1e6
+    }
+
+def find_chrome():
+    return next((path for name in ("google-chrome", "chromium", "chromium-browser", "chrome")
+                 if (path := shutil.which(name))), None)
+
+def stage_runners(config, pdf_paths, documents, work_dir):
+    """Map of stage name to (fn, inputs) with inputs fixed by the fixtures"""
+    from address_service import extract_address
+    from analysis_service import analyze_text_with_openai
+    from blob_store import BlobStore
+    from map_service import get_coordinates
+    from pdf_service import extract_text_with_textract
+    from property_service import get_property_data
+    from reporting import LoggingReporter
+    from zestimate_service import get_zestimate_data
+
+    reporter = LoggingReporter(name="bench")
+    responses = load_responses()
+    text = "\n".join(responses["textract_lines"])
+    analysis = responses["openai"]["summary"]
+    address = dict(line.split(": ", 1) for line in responses["openai"]["address"].splitlines())
+    address_args = (address["street_address"], address["city"], address["state"], address["zip_code"])
+    inputs = [pdf_paths[n % len(pdf_paths)] for n in range(documents)]
+    case_numbers = [f"A {2700000 + n}" for n in range(documents)]
+
+    def enrich(_):
+        parcel = get_property_data(*address_args, config=config)
+        zestimate = get_zestimate_data(*address_args, config=config, reporter=reporter)
+        return isinstance(parcel, dict) and zestimate
+
+    def court_fetcher(scraper_class, **kwargs):
+        scraper = scraper_class(reporter, request_delay=0, base_url=config["COURT_BASE_URL"],
+                                store=BlobStore(tempfile.mkdtemp(dir=work_dir)), **kwargs)
+        scraper.initialize_session()
+        return scraper.fetch_case_pdf
+
+    runners = {
+        "pdf_service": (lambda path: extract_text_with_textract(path, config, reporter), inputs),
+        "analysis_service": (lambda _: analyze_text_with_openai(text, config, reporter), range(documents)),
+        "address_service": (lambda _: extract_address(analysis, config, reporter), range(documents)),
+        "map_service": (lambda _: get_coordinates(*address_args, config=config, reporter=reporter), range(documents)),
+        "enrichment": (enrich, range(documents)),
+        "court_scraper": (None, case_numbers),
+        "court_scraper_hybrid": (None, case_numbers),
+        "court_scraper_headless": (None, case_numbers),
+    }
+
+    # Scrapers are built lazily so a skipped stage never launches anything
+    def build_court():
+        from court_scraper import CourtScraper
+        return court_fetcher(CourtScraper)
+
+    def build_hybrid():
+        from court_scraper_hybrid import CourtScraperHybrid
+        return court_fetcher(CourtScraperHybrid)
+
+    def build_headless():
+        from court_scraper_headless import CourtScraperHeadless
+        scraper = CourtScraperHeadless(reporter, base_url=config["COURT_BASE_URL"],
+                                       store=BlobStore(tempfile.mkdtemp(dir=work_dir)))
+        scraper.initialize_browser()
+        return lambda _: scraper.search_foreclosures("10/01/2026", "10/05/2026")
+
+    return runners, {"court_scraper": build_court, "court_scraper_hybrid": build_hybrid,
+                     "court_scraper_headless": build_headless}
+
+def parse_service_values(pairs, defaults=None):
+    """{'openai': 400.0, ...} from ['openai=400', 'all=0']"""
+    values = dict(defaults or {})
+    for pair in pairs or []:
+        service, _, value = pair.partition("=")
+        targets = SERVICES if service == "all" else [service]
+        for target in targets:
+            if target not in SERVICES:
+                raise SystemExit(f"Unknown service {target!r}; choose from {', '.join(SERVICES)} or all")
+            values[target] = float(value)
+    return values
+
+def git_commit():
+    try:
+        import subprocess
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def previous_record(path, settings):
+    """Most recent saved run with the same settings, or None"""
+    if not os.path.exists(path):
+        return None
+    match = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("settings") == settings:
+                match = record
+    return match
+
+def compare(record, baseline, threshold):
+    """Print changes against a baseline run; return the stages that regressed"""
+    regressions = []
+    print(f"\nCompared with {baseline['timestamp']} ({baseline.get('commit')}):")
+    for stage, stats in record["stages"].items():
+        before = baseline["stages"].get(stage)
+        if not before or "skipped" in stats or "skipped" in before:
+            continue
+        changes = []
+        for key, higher_is_worse in (("p50_ms", True), ("p95_ms", True), ("throughput_per_s", False),
+                                     ("peak_traced_mb", True)):
+            if not before.get(key) or stats.get(key) is None:
+                continue
+            change = stats[key] / before[key] - 1
+            worse = change > threshold if higher_is_worse else change < -threshold
+            changes.append(f"{key} {change:+.0%}{' !' if worse else ''}")
+            if worse:
+                regressions.append(f"{stage} {key}")
+        print(f"  {stage:<22} " + "  ".join(changes))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--documents", type=int, default=20, help="Calls per stage")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="Uncounted calls before each stage")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per synthetic PDF")
+    parser.add_argument("--pdf-dir", help="Use these (redacted) PDFs instead of synthetic ones")
+    parser.add_argument("--latency", nargs="*", metavar="SERVICE=MS",
+                        help=f"Per-service latency; defaults {DEFAULT_LATENCY_MS}")
+    parser.add_argument("--jitter", nargs="*", metavar="SERVICE=MS")
+    parser.add_argument("--errors", nargs="*", metavar="SERVICE=RATE", help="Injected error rate, e.g. openai=0.05")
+    parser.add_argument("--slow", nargs="*", metavar="SERVICE=RATE", help="Share of very slow responses")
+    parser.add_argument("--slow-ms", nargs="*", metavar="SERVICE=MS", help="Latency of the slow responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="Compare with the last run with the same settings")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    latency = parse_service_values(args.latency, DEFAULT_LATENCY_MS)
+    jitter = parse_service_values(args.jitter)
+    errors = parse_service_values(args.errors)
+    slow = parse_service_values(args.slow)
+    slow_ms = parse_service_values(args.slow_ms)
+    profiles = {
+        service: ServiceProfile(latency_ms=latency.get(service, 0), jitter_ms=jitter.get(service, 0),
+                                error_rate=errors.get(service, 0), slow_rate=slow.get(service, 0),
+                                slow_ms=slow_ms.get(service, 0))
+        for service in SERVICES
+    }
+    settings = {
+        "documents": args.documents,
+        "concurrency": args.concurrency,
+        "pages": args.pages,
+        "pdf_dir": args.pdf_dir,
+        "latency_ms": latency,
+        "jitter_ms": jitter,
+        "error_rate": errors,
+        "slow_rate": slow,
+        "slow_ms": slow_ms,
+        "seed": args.seed,
+        "warmup": args.warmup
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    if args.pdf_dir:
+        pdf_paths = sorted(glob.glob(os.path.join(args.pdf_dir, "**", "*.pdf"), recursive=True))
+        if not pdf_paths:
+            raise SystemExit(f"No PDFs found in {args.pdf_dir}")
+    else:
+        pdf_paths = [os.path.join(work_dir, "synthetic.pdf")]
+        with open(pdf_paths[0], "wb") as f:
+            f.write(synthetic_pdf(args.pages))
+
+    stages = {}
+    with StandinServer(profiles, court_cases=args.documents, pdf_pages=args.pages, seed=args.seed) as server:
+        config = server.config()
+        runners, builders = stage_runners(config, pdf_paths, args.documents, work_dir)
+        print(f"{'stage':<22} {'calls':>5} {'errors':>6} {'per s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'peak MB':>8}")
+        for stage in args.stages:
+            if stage in BROWSER_STAGES and not find_chrome():
+                stages[stage] = {"skipped": "no Chrome/Chromium found"}
+                print(f"{stage:<22} skipped: no Chrome/Chromium found")
+                continue
+            fn, inputs = runners[stage]
+            if fn is None:
+                fn = builders[stage]()
+            stats = measure(fn, list(inputs), args.concurrency, args.warmup)
+            stages[stage] = stats
+            print(f"{stage:<22} {stats['calls']:>5} {stats['errors']:>6} {stats['throughput_per_s']:>7.2f} "
+                  f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+                  f"{stats['peak_traced_mb']:>8.2f}")
+        service_requests, service_errors = dict(server.requests), dict(server.errors)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": settings,
+        "stages": stages,
+        "service_requests": service_requests,
+        "injected_errors": service_errors,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+    regressions = []
+    if args.compare:
+        baseline = previous_record(args.output, settings)
+        if baseline:
+            regressions = compare(record, baseline, args.threshold)
+        else:
+            print("\nNo earlier run with the same settings to compare with")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Appended to {args.output}")
+
+    if regressions:
+        print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
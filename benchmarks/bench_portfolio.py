@@ -0,0 +1,87 @@
+# benchmarks/bench_portfolio.py
+"""Benchmark portfolio metrics against a row-at-a-time baseline.
+
+    python benchmarks/bench_portfolio.py --cases 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import compute_metrics, filter_cases, sort_cases, page_of, format_page
+from utils import format_currency
+
+def synthetic_cases(count, seed=42):
+    rng = np.random.default_rng(seed)
+    assessed = rng.integers(40, 500, count) * 1000.0
+    return pd.DataFrame({
+        "id": np.arange(count),
+        "case_number": [f"A {2600000 + n}" for n in range(count)],
+        "plaintiff": rng.choice(["First National Bank", "Midwest Mortgage LLC", "County Treasurer"], count),
+        "defendant": None,
+        "judgment_amount": np.where(rng.random(count) < 0.95, assessed * rng.uniform(0.3, 1.3, count), np.nan),
+        "claims_total": np.nan,
+        "liens_total": np.where(rng.random(count) < 0.4, rng.integers(1, 60, count) * 1000.0, np.nan),
+        "lien_count": rng.integers(0, 4, count),
+        "filing_date": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 290, count), unit="D"),
+        "street_address": "123 Main St",
+        "city": "Cincinnati",
+        "state": "OH",
+        "zip_code": rng.choice(["45202", "45205", "45211", "45220"], count),
+        "latitude": np.nan,
+        "longitude": np.nan,
+        "formatted_address": None,
+        "assessed_value": assessed,
+        "zestimate": np.where(rng.random(count) < 0.7, assessed * rng.uniform(0.9, 1.6, count), np.nan)
+    })
+
+def row_at_a_time(frame):
+    """The per-property approach: compute and format every row in Python"""
+    rows = []
+    for _, case in frame.iterrows():
+        market_value = case["zestimate"] if case["zestimate"] > 0 else case["assessed_value"]
+        debt = (case["judgment_amount"] if case["judgment_amount"] == case["judgment_amount"] else 0) + \
+            (case["liens_total"] if case["liens_total"] == case["liens_total"] else 0)
+        rows.append({
+            "case_number": case["case_number"],
+            "market_value": format_currency(market_value),
+            "equity_spread": format_currency(market_value - debt),
+            "ltv": debt / market_value if market_value else None
+        })
+    return sorted(rows, key=lambda row: row["equity_spread"], reverse=True)[:50]
+
+def vectorized(frame):
+    metrics = compute_metrics(frame)
+    matches = filter_cases(metrics, min_equity=0, max_ltv=0.9, valued_only=True)
+    page, _ = page_of(sort_cases(matches, "equity_spread"), 1, 50)
+    return format_page(page)
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--skip-baseline-over", type=int, default=20000,
+                        help="Don't run the row-at-a-time baseline above this many cases")
+    args = parser.parse_args()
+
+    print(f"{'cases':>8} {'row-at-a-time':>15} {'vectorized':>12}")
+    for count in args.cases:
+        frame = synthetic_cases(count)
+        fast = timed(vectorized, frame)
+        slow = f"{timed(row_at_a_time, frame, repeat=1):12.1f} ms" if count <= args.skip_baseline_over else f"{'-':>15}"
+        print(f"{count:>8} {slow:>15} {fast:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
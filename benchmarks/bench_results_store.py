@@ -0,0 +1,90 @@
+# benchmarks/bench_results_store.py
+"""Benchmark results store queries over a large synthetic case database.
+
+    python benchmarks/bench_results_store.py --cases 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import ResultsStore
+
+PLAINTIFFS = ["First National Bank", "Midwest Mortgage LLC", "County Treasurer", "Fifth Third Bank",
+              "U.S. Bank National Association", "Wells Fargo Bank", "Union Savings Bank"]
+ZIP_CODES = ["45202", "45203", "45204", "45205", "45206", "45208", "45211", "45212", "45220", "45227"]
+STREETS = ["Main St", "Vine St", "Elm St", "Race St", "Madison Rd", "Montgomery Rd", "Reading Rd"]
+CLAUSES = ["adjustable rate rider", "balloon payment", "condominium rider", "tax lien certificate",
+           "homeowners association", "reverse mortgage", "mechanics lien", "lis pendens"]
+
+def synthetic_result(rng, n):
+    plaintiff = rng.choice(PLAINTIFFS)
+    amount = rng.randint(20, 600) * 1000 + rng.randint(0, 99)
+    zip_code = rng.choice(ZIP_CODES)
+    filed = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2018, 2026)}"
+    clause = rng.choice(CLAUSES)
+    street = f"{rng.randint(100, 9999)} {rng.choice(STREETS)}"
+    analysis = (
+        f"# Property Information\n- {street}, Cincinnati, OH {zip_code}\n"
+        f"# Claims and Judgements\n- Principal balance: ${amount:,}.00\n"
+        f"# Parties Involved\n- Plaintiff: {plaintiff}\n- Defendant: Owner {n}\n"
+        f"# Important Dates\n- Complaint filed: {filed}\n"
+        f"# Liens and Encumbrances\n- Mortgage includes a {clause}\n"
+    )
+    return {
+        "source": f"synthetic-{n}.pdf",
+        "case_number": f"A {2600000 + n}",
+        "document_hash": f"{n:064x}",
+        "text": f"COMPLAINT IN FORECLOSURE {plaintiff} v. Owner {n}. {street}. The note contains a {clause}. " * 20,
+        "analysis": analysis,
+        "address": {"street_address": street, "city": "Cincinnati", "state": "OH", "zip_code": zip_code},
+        "coordinates": {"lat": 39.1 + rng.random() / 10, "lng": -84.5 + rng.random() / 10,
+                        "formatted_address": f"{street}, Cincinnati, OH {zip_code}, USA"}
+    }
+
+def timed(store, repeat, **query):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = store.search(**query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="Reuse/keep a database at this path instead of a temp file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_results.db")
+    store = ResultsStore(db_path)
+    existing = store.count()
+    if existing < args.cases:
+        rng = random.Random(42)
+        start = time.perf_counter()
+        for batch_start in range(existing, args.cases, 1000):
+            batch_end = min(batch_start + 1000, args.cases)
+            store.save_results(synthetic_result(rng, n) for n in range(batch_start, batch_end))
+        print(f"Loaded {args.cases - existing:,} cases in {time.perf_counter() - start:.1f} s")
+
+    queries = {
+        "plaintiff prefix": {"plaintiff": "Midwest"},
+        "judgments over $200k in 45202": {"zip_code": "45202", "min_amount": 200000, "order_by": "judgment_amount"},
+        "filed in 2025": {"filed_after": "2025-01-01", "filed_before": "2025-12-31"},
+        "full text phrase": {"text": '"balloon payment"'},
+        "full text + zip": {"text": "mechanics", "zip_code": "45220"},
+        "full text ranked": {"text": "reverse OR condominium", "order_by": "rank"},
+    }
+    print(f"{store.count():,} cases in {db_path}")
+    for label, query in queries.items():
+        median_ms, rows = timed(store, args.repeat, limit=50, **query)
+        print(f"{label:<34} median {median_ms:7.2f} ms  ({rows} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/bench_startup.py
+"""Measure streamlit_app cold-start cost and record it for tracking over time.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+- import profile: `python -X importtime` of streamlit_app, reporting the
+  slowest modules it pulls in beyond Streamlit itself
+- time to first render: a cold AppTest run of the script, then a warm rerun
+
+Results are appended as one JSON line to benchmarks/results/startup.jsonl.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "startup.jsonl")
+
+RENDER_SCRIPT = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("streamlit_app.py", default_timeout=60)
+start = time.perf_counter()
+app.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+warm = time.perf_counter() - start
+print(json.dumps({"cold_ms": cold * 1000, "warm_ms": warm * 1000, "exception": bool(app.exception)}))
+"""
+
+def parse_importtime(stderr):
+    """Return [(cumulative_us, self_us, module, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return rows
+
+def profile_imports(top):
+    """Import Streamlit first, then time what importing the app adds on top"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import streamlit; import streamlit_app"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    rows = parse_importtime(completed.stderr)
+    app_index = next(i for i, row in enumerate(rows) if row[2] == "streamlit_app" and row[3] == 0)
+    streamlit_index = next(i for i, row in enumerate(rows) if row[2] == "streamlit" and row[3] == 0)
+
+    # Modules imported on behalf of the app are listed just before it
+    app_modules = rows[streamlit_index + 1:app_index + 1]
+    slowest = sorted(app_modules, reverse=True)[:top]
+    return {
+        "app_import_ms": rows[app_index][0] / 1000,
+        "streamlit_import_ms": rows[streamlit_index][0] / 1000,
+        "slowest_modules": [
+            {"module": name, "cumulative_ms": cumulative / 1000, "self_ms": self_us / 1000}
+            for cumulative, self_us, name, _ in slowest
+        ]
+    }
+
+def time_first_render():
+    completed = subprocess.run(
+        [sys.executable, "-c", RENDER_SCRIPT],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter runs to take the median of")
+    parser.add_argument("--top", type=int, default=10, help="Slowest app imports to report")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    profiles = [profile_imports(args.top) for _ in range(args.runs)]
+    renders = [time_first_render() for _ in range(args.runs)]
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "app_import_ms": statistics.median(p["app_import_ms"] for p in profiles),
+        "streamlit_import_ms": statistics.median(p["streamlit_import_ms"] for p in profiles),
+        "first_render_cold_ms": statistics.median(r["cold_ms"] for r in renders),
+        "rerun_warm_ms": statistics.median(r["warm_ms"] for r in renders),
+        "render_exception": any(r["exception"] for r in renders),
+        "slowest_modules": profiles[-1]["slowest_modules"]
+    }
+
+    print(f"streamlit import      {record['streamlit_import_ms']:8.1f} ms")
+    print(f"app import (extra)    {record['app_import_ms']:8.1f} ms")
+    print(f"first render (cold)   {record['first_render_cold_ms']:8.1f} ms")
+    print(f"rerun (warm)          {record['rerun_warm_ms']:8.1f} ms")
+    print("slowest app imports:")
+    for module in record["slowest_modules"]:
+        print(f"  {module['cumulative_ms']:8.1f} ms  {module['module']}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
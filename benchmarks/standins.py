@@ -0,0 +1,272 @@
+# benchmarks/standins.py
+"""Local stand-ins for every external service the pipeline calls.
+
+One threaded HTTP server answers for Textract, the OpenAI chat API, the
+Bridge parcel and Zestimate endpoints, the Google geocoder and the
+courtclerk.org pages, each under its own path prefix. Responses come from
+fixtures/services/responses.json and fixtures/court/. Each service can be
+given a latency, jitter, error rate and a share of very slow responses:
+
+    with StandinServer({"openai": ServiceProfile(latency_ms=800, error_rate=0.05)}) as server:
+        config = server.config()
+
+config() returns settings (endpoint overrides plus dummy keys) that point
+the services and scrapers at the server.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SERVICES = ("textract", "openai", "bridge", "google", "court")
+
+COOKIE_ERROR_PAGE = "<html><body><p>Error 0626: Please make sure cookies are enabled.</p></body></html>"
+
+# The foreclosure search form the headless scraper fills in; actions are relative to /court/
+SEARCH_FORM_PAGE = """<html><body><h1>Foreclosure Search</h1>
+<form action="../../data/cpciv_classification_results.php" method="post">
+<select name="ccode"><option value="A">All of the above</option></select>
+<input type="text" name="begdate"><input type="text" name="enddate">
+<input type="hidden" name="classification" value="FORECLOSURE">
+<input type="submit" value="Search">
+</form></body></html>"""
+
+@dataclass
+class ServiceProfile:
+    """Injected behaviour for one stand-in service"""
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0.0
+    error_status: int = 503
+    slow_rate: float = 0.0         # Share of requests that take slow_ms instead (tail latency)
+    slow_ms: float = 0
+
+def load_responses():
+    with open(os.path.join(FIXTURE_DIR, "services", "responses.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def load_court_page(name):
+    with open(os.path.join(FIXTURE_DIR, "court", name), encoding="utf-8") as f:
+        return f.read()
+
+def synthetic_pdf(pages=3, title="COMPLAINT IN FORECLOSURE", lines=None):
+    """Bytes of a text PDF shaped like a foreclosure filing"""
+    import fitz
+    lines = lines or load_responses()["textract_lines"]
+    document = fitz.open()
+    for page_number in range(1, pages + 1):
+        page = document.new_page()
+        text = "\n".join([f"{title} - page {page_number} of {pages}", ""] + lines)
+        page.insert_textbox(fitz.Rect(54, 54, page.rect.width - 54, page.rect.height - 54), text, fontsize=10)
+    data = document.tobytes()
+    document.close()
+    return data
+
+def results_page(case_count):
+    """Search results page with case_count distinct case numbers"""
+    page_html = load_court_page("results_page.html")
+    body = re.search(r'<tbody>(.*)</tbody>', page_html, re.DOTALL)
+    template = re.findall(r'<tr>.*?</tr>', body.group(1), re.DOTALL)[0]
+    saved_case = re.search(r'A \d{7}', template).group(0)
+    rows = "\n".join(template.replace(saved_case, f"A {2700000 + n}") for n in range(case_count))
+    return page_html[:body.start(1)] + rows + page_html[body.end(1):]
+
+def case_docs_page(case_number):
+    """Case documents page for any case number"""
+    page_html = load_court_page("case_docs_page.html")
+    saved_case = re.search(r'A \d{7}', page_html).group(0)
+    page_html = page_html.replace(saved_case, case_number)
+    return page_html.replace(saved_case.replace(" ", ""), case_number.replace(" ", ""))
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def route(self, method):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if self.headers.get("X-Amz-Target", "").startswith("Textract."):
+            service = "textract"
+        else:
+            service = url.path.strip("/").split("/")[0]
+        if service not in SERVICES:
+            return self.send(404, b"not found", "text/plain")
+
+        server = self.server
+        server.record_request(service)
+        profile = server.profiles.get(service, ServiceProfile())
+        delay = profile.latency_ms + server.random_uniform(-profile.jitter_ms, profile.jitter_ms)
+        if profile.slow_rate and server.random_uniform(0, 1) < profile.slow_rate:
+            delay = profile.slow_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if profile.error_rate and server.random_uniform(0, 1) < profile.error_rate:
+            server.record_error(service)
+            if service == "court":
+                # The court site fails by dropping the session, not with an HTTP error
+                return self.send(200, COOKIE_ERROR_PAGE.encode(), "text/html")
+            return self.send(profile.error_status, b'{"message": "injected error"}', "application/json")
+
+        handler = getattr(self, f"handle_{service}")
+        handler(method, url, body)
+
+    def send(self, status, payload, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, data, content_type="application/json"):
+        self.send(200, json.dumps(data).encode(), content_type)
+
+    def handle_textract(self, method, url, body):
+        lines = self.server.responses["textract_lines"]
+        self.send_json({
+            "DocumentMetadata": {"Pages": 1},
+            "Blocks": [{"BlockType": "PAGE"}] + [
+                {"BlockType": "LINE", "Text": line, "Confidence": 99.1} for line in lines
+            ]
+        }, "application/x-amz-json-1.1")
+
+    def handle_openai(self, method, url, body):
+        request = json.loads(body or b"{}")
+        system_prompt = request.get("messages", [{}])[0].get("content", "")
+        if "property address" in system_prompt:
+            kind = "address"
+        elif "Combine and summarize" in system_prompt:
+            kind = "summary"
+        else:
+            kind = "chunk"
+        content = self.server.responses["openai"][kind]
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        self.send_json({
+            "id": f"chatcmpl-standin-{self.server.record_request('openai-completion')}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def handle_bridge(self, method, url, body):
+        bridge = self.server.responses["bridge"]
+        path = url.path
+        if path.endswith("/zestimates"):
+            bundle = [bridge["zestimate"]]
+        elif path.endswith("/assessments"):
+            bundle = bridge["assessments"]
+        elif path.endswith("/transactions"):
+            bundle = bridge["transactions"]
+        elif path.endswith("/parcels"):
+            bundle = [bridge["parcel"]]
+        else:
+            return self.send(404, b'{"message": "unknown bridge endpoint"}', "application/json")
+        self.send_json({"success": True, "status": 200, "bundle": bundle, "total": len(bundle)})
+
+    def handle_google(self, method, url, body):
+        self.send_json(self.server.responses["geocode"])
+
+    def handle_court(self, method, url, body):
+        path = url.path[len("/court"):] or "/"
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        if path.endswith("cpciv_classification_results.php"):
+            page = results_page(self.server.court_cases)
+        elif path.endswith("case_summary.php"):
+            page = case_docs_page(form.get("casenumber", "A 2700000"))
+        elif path.endswith("image_view_stream.php"):
+            return self.send(200, self.server.pdf_bytes, "application/pdf")
+        elif path.rstrip("/").endswith("records-search/foreclosure"):
+            page = SEARCH_FORM_PAGE
+        else:
+            page = "<html><body><h1>Clerk of Courts</h1></body></html>"
+        # Saved pages post to the site root; a browser must stay under this server's /court prefix
+        page = page.replace('action="/data/', 'action="/court/data/')
+        self.send(200, page.encode(), "text/html; charset=utf-8",
+                  {"Set-Cookie": "PHPSESSID=standin; Path=/"})
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server for all stand-ins, with request and error counts"""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, profiles=None, court_cases=25, pdf_pages=3, seed=0, port=0):
+        super().__init__(("127.0.0.1", port), StandinHandler)
+        self.profiles = profiles or {}
+        self.court_cases = court_cases
+        self.responses = load_responses()
+        self.pdf_bytes = synthetic_pdf(pdf_pages)
+        self.requests = {}
+        self.errors = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def config(self):
+        """Pipeline settings pointing every service at this server"""
+        return {
+            "AWS_ACCESS_KEY_ID": "standin",
+            "AWS_SECRET_ACCESS_KEY": "standin",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            "OPENAI_API_KEY": "standin",
+            "BRIDGE_API_KEY": "standin",
+            "GOOGLE_MAPS_API_KEY": "standin",
+            "TEXTRACT_ENDPOINT_URL": f"{self.base_url}/textract",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "BRIDGE_API_URL": f"{self.base_url}/bridge/api/v2",
+            "GOOGLE_GEOCODE_URL": f"{self.base_url}/google/maps/api/geocode/json",
+            "COURT_BASE_URL": f"{self.base_url}/court",
+        }
+
+    def random_uniform(self, low, high):
+        with self._lock:
+            return self._random.uniform(low, high)
+
+    def record_request(self, service):
+        with self._lock:
+            self.requests[service] = self.requests.get(service, 0) + 1
+            return self.requests[service]
+
+    def record_error(self, service):
+        with self._lock:
+            self.errors[service] = self.errors.get(service, 0) + 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,160 @@
+# blob_store.py
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+
+DEFAULT_ROOT = os.environ.get(
+    "PDF_BLOB_STORE",
+    os.path.join(os.path.expanduser("~"), ".cache", "foreclosure_pdfs")
+)
+CHUNK_SIZE = 64 * 1024
+
+_download_locks = {}
+_download_locks_guard = threading.Lock()
+
+class UnexpectedResponseError(Exception):
+    """Raised when a download response is rejected before anything is stored"""
+    def __init__(self, response, message):
+        super().__init__(message)
+        self.response = response
+
+def key_hash(key):
+    """Stable file name for an arbitrary reference key"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def download_lock(partial_path):
+    """Lock held while a partial file is written, so two downloads of one key do not interleave"""
+    with _download_locks_guard:
+        return _download_locks.setdefault(partial_path, threading.Lock())
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+class BlobStore:
+    """Local content-addressed store for downloaded documents, keyed by SHA-256
+
+    Blobs live under objects/<first two hex chars>/<rest>. Reference keys
+    (e.g. a court case and document number) map to a digest under refs/ so
+    a document is only ever downloaded once. In-flight downloads are kept
+    under partial/ so an interrupted transfer can resume where it stopped.
+    """
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.partial_dir = os.path.join(root, "partial")
+        self.refs_dir = os.path.join(root, "refs")
+        for directory in (self.objects_dir, self.partial_dir, self.refs_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, digest):
+        """Path of the blob with the given digest"""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def lookup(self, key):
+        """Return the stored path for a reference key, or None"""
+        ref_path = os.path.join(self.refs_dir, key_hash(key))
+        try:
+            with open(ref_path) as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return self.path_for(digest) if self.has(digest) else None
+
+    def _add_ref(self, key, digest):
+        ref_path = os.path.join(self.refs_dir, key_hash(key))
+        with tempfile.NamedTemporaryFile("w", dir=self.refs_dir, delete=False) as f:
+            f.write(digest)
+        os.replace(f.name, ref_path)
+
+    def _commit(self, temp_path, digest, key=None):
+        """Move a finished file into place, dropping it if the content is already stored"""
+        final_path = self.path_for(digest)
+        if os.path.exists(final_path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+        if key:
+            self._add_ref(key, digest)
+        return final_path
+
+    def put_bytes(self, data, key=None):
+        """Store an in-memory blob and return its path"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.has(digest):
+            if key:
+                self._add_ref(key, digest)
+            return self.path_for(digest)
+        with tempfile.NamedTemporaryFile(dir=self.partial_dir, delete=False) as f:
+            f.write(data)
+        return self._commit(f.name, digest, key)
+
+    def download(self, request, method, url, key, accept=None, chunk_size=CHUNK_SIZE, **kwargs):
+        """Stream a response body into the store and return the blob path
+
+        request is called as request(method, url, stream=True, headers=..., **kwargs),
+        e.g. a scraper's make_request. accept(response) may return an error
+        message to reject the response before anything is written. If a
+        partial file exists for the key, the transfer resumes with a Range
+        request when the server supports it; otherwise the partial file is
+        dropped and the download starts over. Concurrent downloads of one
+        key wait for each other, and the later ones reuse the stored blob.
+        """
+        partial_path = os.path.join(self.partial_dir, key_hash(key) + ".part")
+        with download_lock(partial_path):
+            # Another thread may have finished this key while we waited
+            existing = self.lookup(key)
+            if existing:
+                return existing
+            return self._download(request, method, url, key, partial_path, accept, chunk_size, **kwargs)
+
+    def _download(self, request, method, url, key, partial_path, accept, chunk_size, **kwargs):
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = dict(kwargs.pop("headers", {}) or {})
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        response = request(method, url, stream=True, headers=headers, **kwargs)
+        resumed = offset and response.status_code == 206 and \
+            response.headers.get("content-range", "").startswith(f"bytes {offset}-")
+        if offset and not resumed:
+            # The partial file is stale (e.g. 416 once it already holds the whole body); start over
+            os.remove(partial_path)
+            offset = 0
+            if response.status_code != 200:
+                response.close()
+                del headers["Range"]
+                response = request(method, url, stream=True, headers=headers, **kwargs)
+        try:
+            if not offset:
+                error = accept(response) if accept else None
+                if error:
+                    response.content  # Read the (small) rejected body so response.text survives close()
+                    raise UnexpectedResponseError(response, error)
+
+            # Re-hash what is already on disk before appending the rest
+            hasher = file_digest(partial_path) if offset else hashlib.sha256()
+            with open(partial_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        hasher.update(chunk)
+        finally:
+            response.close()
+
+        return self._commit(partial_path, hasher.hexdigest(), key)
+
+    def open_mapped(self, path):
+        """Memory-map a stored blob read-only"""
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,248 @@
+# browser_pool.py
+import base64
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import undetected_chromedriver as uc
+
+CHROMEDRIVER_PATH = '/usr/bin/chromedriver'
+CHROME_PATH = '/usr/bin/google-chrome'
+
+# Submits a form from inside the page and hands back the raw response body
+FETCH_FORM_SCRIPT = r"""
+const form = arguments[0];
+const done = arguments[arguments.length - 1];
+fetch(form.action, {method: 'POST', body: new FormData(form), credentials: 'include'})
+    .then(response => {
+        if (!response.ok) {
+            done({ok: false, status: response.status});
+            return;
+        }
+        const contentType = response.headers.get('content-type');
+        return response.arrayBuffer().then(buffer => {
+            const bytes = new Uint8Array(buffer);
+            let binary = '';
+            for (let i = 0; i < bytes.length; i += 0x8000) {
+                binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+            }
+            done({ok: true, content_type: contentType, data: btoa(binary)});
+        });
+    })
+    .catch(error => done({ok: false, error: String(error)}));
+"""
+
+class PooledBrowser:
+    """A warm Chrome instance with its own download directory"""
+    def __init__(self, driver, download_dir):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.uses = 0
+        self.created_at = time.time()
+
+    def fetch_form(self, form_element, timeout=60):
+        """Submit a form via fetch() in the page and return (content_type, raw bytes)"""
+        self.driver.set_script_timeout(timeout)
+        result = self.driver.execute_async_script(FETCH_FORM_SCRIPT, form_element)
+        if not result or not result.get('ok'):
+            raise RuntimeError(f"Form fetch failed: {result}")
+        return result.get('content_type') or '', base64.b64decode(result['data'])
+
+    def wait_for_download(self, timeout=60):
+        """Wait for a finished file in the download directory and return its raw bytes"""
+        deadline = time.time() + timeout
+        last_size = None
+        while time.time() < deadline:
+            finished = [
+                name for name in os.listdir(self.download_dir)
+                if not name.endswith('.crdownload') and not name.startswith('.')
+            ]
+            if finished:
+                path = os.path.join(self.download_dir, finished[0])
+                size = os.path.getsize(path)
+                # Only accept the file once its size has stopped changing
+                if size and size == last_size:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.remove(path)
+                    return data
+                last_size = size
+            time.sleep(0.25)
+        raise TimeoutError("Timed out waiting for PDF download")
+
+    def reset(self):
+        """Close extra windows and clear downloads so the next user starts clean"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        for name in os.listdir(self.download_dir):
+            os.remove(os.path.join(self.download_dir, name))
+
+class BrowserPool:
+    """Pool of warm headless Chrome instances shared across searches"""
+    def __init__(self, size=2, max_uses=25, checkout_timeout=120,
+                 driver_path=CHROMEDRIVER_PATH, browser_path=CHROME_PATH):
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.driver_path = driver_path
+        self.browser_path = browser_path
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _launch(self):
+        """Start a new headless Chrome that saves PDFs to its own directory"""
+        download_dir = tempfile.mkdtemp(prefix='court_pdf_')
+        options = uc.ChromeOptions()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920x1080")
+        options.add_experimental_option('prefs', {
+            'download.default_directory': download_dir,
+            'download.prompt_for_download': False,
+            'plugins.always_open_pdf_externally': True
+        })
+
+        try:
+            driver = uc.Chrome(
+                options=options,
+                driver_executable_path=self.driver_path,
+                browser_executable_path=self.browser_path
+            )
+            # Headless Chrome ignores download prefs unless told explicitly
+            driver.execute_cdp_cmd('Page.setDownloadBehavior', {
+                'behavior': 'allow',
+                'downloadPath': download_dir
+            })
+        except Exception:
+            shutil.rmtree(download_dir, ignore_errors=True)
+            raise
+        return PooledBrowser(driver, download_dir)
+
+    def _destroy(self, browser):
+        """Quit a browser and free its slot in the pool"""
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(browser.download_dir, ignore_errors=True)
+        with self._lock:
+            self._created -= 1
+
+    def is_healthy(self, browser):
+        """Check that the browser process still answers commands"""
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def warm(self, count=None):
+        """Launch browsers ahead of time so the first search doesn't pay startup"""
+        count = self.size if count is None else min(count, self.size)
+        while not self._closed:
+            with self._lock:
+                if self._created >= count:
+                    return
+                self._created += 1
+            try:
+                self._idle.put(self._launch())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def checkout(self):
+        """Take a healthy browser from the pool, launching one if there is room"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        deadline = time.time() + self.checkout_timeout
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = None
+
+            if browser is not None:
+                if self.is_healthy(browser):
+                    return browser
+                self._destroy(browser)
+                continue
+
+            with self._lock:
+                can_launch = self._created < self.size
+                if can_launch:
+                    self._created += 1
+            if can_launch:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError("Timed out waiting for a free browser")
+            try:
+                browser = self._idle.get(timeout=min(remaining, 1))
+            except queue.Empty:
+                continue
+            if self.is_healthy(browser):
+                return browser
+            self._destroy(browser)
+
+    def release(self, browser, healthy=True):
+        """Return a browser to the pool, recycling it after max_uses"""
+        browser.uses += 1
+        if self._closed or not healthy or browser.uses >= self.max_uses:
+            self._destroy(browser)
+            return
+        try:
+            browser.reset()
+        except Exception:
+            self._destroy(browser)
+            return
+        self._idle.put(browser)
+
+    @contextmanager
+    def browser(self):
+        """Check out a browser for the duration of a with-block"""
+        browser = self.checkout()
+        healthy = True
+        try:
+            yield browser
+        except Exception:
+            healthy = self.is_healthy(browser)
+            raise
+        finally:
+            self.release(browser, healthy)
+
+    def close(self):
+        """Quit all idle browsers; checked-out ones are quit on release"""
+        self._closed = True
+        while True:
+            try:
+                self._destroy(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_browser_pool(size=2, max_uses=25):
+    """Return the process-wide browser pool, creating it on first use"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = BrowserPool(size=size, max_uses=max_uses)
+        return _shared_pool
@@ -0,0 +1,18 @@
+# checkpoint.py
+
+class NullCheckpoint:
+    """Checkpoint that stores nothing; every unit of work simply runs
+
+    Services call checkpoint.run(unit, fn) around each page or chunk. A
+    durable implementation (see job_queue.JobCheckpoint) returns the saved
+    result for units that already completed and retries the rest.
+    """
+    def run(self, unit, fn):
+        return fn()
+
+    def scoped(self, prefix):
+        return self
+
+def default_checkpoint(checkpoint=None):
+    """Return the given checkpoint, or one that stores nothing"""
+    return checkpoint if checkpoint is not None else NullCheckpoint()
@@ -0,0 +1,111 @@
+# clients.py
+import functools
+import math
+from config import get_endpoint, get_setting
+from resilience import SERVICE_POLICIES, call_service
+from tracing import count, set_attributes, span
+
+def create_textract_client(config):
+    """Create an AWS Textract client from injected settings"""
+    import boto3
+    from botocore.config import Config
+    return boto3.client(
+        'textract',
+        aws_access_key_id=get_setting(config, "AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=get_setting(config, "AWS_SECRET_ACCESS_KEY"),
+        region_name=get_setting(config, "AWS_DEFAULT_REGION"),
+        endpoint_url=get_endpoint(config, "TEXTRACT_ENDPOINT_URL"),
+        config=Config(connect_timeout=10, read_timeout=SERVICE_POLICIES["textract"].timeout,
+                      retries={"max_attempts": 2, "mode": "standard"})
+    )
+
+def create_openai_client(config):
+    """Create an OpenAI client from injected settings"""
+    from openai import OpenAI
+    return OpenAI(api_key=get_setting(config, "OPENAI_API_KEY"), base_url=get_endpoint(config, "OPENAI_BASE_URL"))
+
+# Clients are thread-safe and expensive to build, so one per set of
+# credentials is shared by every caller in the process.
+
+@functools.lru_cache(maxsize=8)
+def _shared_textract_client(access_key_id, secret_access_key, region, endpoint_url):
+    return create_textract_client({
+        "AWS_ACCESS_KEY_ID": access_key_id,
+        "AWS_SECRET_ACCESS_KEY": secret_access_key,
+        "AWS_DEFAULT_REGION": region,
+        "TEXTRACT_ENDPOINT_URL": endpoint_url
+    })
+
+@functools.lru_cache(maxsize=8)
+def _shared_openai_client(api_key, base_url):
+    return create_openai_client({"OPENAI_API_KEY": api_key, "OPENAI_BASE_URL": base_url})
+
+def get_textract_client(config):
+    """Process-wide Textract client for the configured credentials"""
+    return _shared_textract_client(
+        get_setting(config, "AWS_ACCESS_KEY_ID"),
+        get_setting(config, "AWS_SECRET_ACCESS_KEY"),
+        get_setting(config, "AWS_DEFAULT_REGION"),
+        get_endpoint(config, "TEXTRACT_ENDPOINT_URL")
+    )
+
+@functools.lru_cache(maxsize=32)
+def _textract_client_with_read_timeout(client, read_timeout):
+    import boto3
+    from botocore.config import Config
+    credentials = client._get_credentials()
+    shortened = Config(connect_timeout=min(client.meta.config.connect_timeout, read_timeout), read_timeout=read_timeout,
+                       retries={"total_max_attempts": 1, "mode": "standard"})
+    return boto3.client(
+        'textract',
+        aws_access_key_id=credentials.access_key,
+        aws_secret_access_key=credentials.secret_key,
+        aws_session_token=credentials.token,
+        region_name=client.meta.region_name,
+        endpoint_url=client.meta.endpoint_url,
+        config=client.meta.config.merge(shortened)
+    )
+
+def textract_client_for(client, timeout):
+    """client, or a copy of it that gives up on reads within timeout seconds when its own limit is longer
+
+    Copies are made per whole second of timeout and kept, so calls under
+    a document deadline do not build a client each time.
+    """
+    config = getattr(getattr(client, "meta", None), "config", None)
+    if config is None or timeout >= config.read_timeout:
+        return client
+    return _textract_client_with_read_timeout(client, max(1, math.floor(timeout)))
+
+def get_openai_client(config):
+    """Process-wide OpenAI client for the configured API key"""
+    return _shared_openai_client(get_setting(config, "OPENAI_API_KEY"), get_endpoint(config, "OPENAI_BASE_URL"))
+
+def record_token_usage(response, purpose):
+    """Count the tokens an OpenAI chat completion used, by model and purpose"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    labels = {"model": getattr(response, "model", None), "purpose": purpose}
+    count("openai_prompt_tokens", usage.prompt_tokens, **labels)
+    count("openai_completion_tokens", usage.completion_tokens, **labels)
+    set_attributes(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+def openai_retryable(error):
+    """Whether an OpenAI error is transient: connection problems, timeouts, 408/409/429 and 5xx"""
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code in (408, 409, 429)
+                                                         or error.status_code >= 500)
+
+def create_chat_completion(client, purpose, attributes=None, **kwargs):
+    """client.chat.completions.create, traced, bounded by the OpenAI policy and with its token usage counted"""
+    def request(timeout):
+        # call_service retries transient errors itself, within the document deadline
+        return client.with_options(timeout=timeout, max_retries=0).chat.completions.create(**kwargs)
+
+    with span("openai.chat", purpose=purpose, model=kwargs.get("model"), **(attributes or {})):
+        response = call_service("openai", request, retryable=openai_retryable)
+        record_token_usage(response, purpose)
+    return response
@@ -0,0 +1,74 @@
+# config.py
+import os
+import sys
+import tomllib
+
+SETTING_KEYS = (
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_DEFAULT_REGION",
+    "OPENAI_API_KEY",
+    "BRIDGE_API_KEY",
+    "GOOGLE_MAPS_API_KEY",
+    # Endpoint overrides, e.g. to run against local stand-ins
+    "TEXTRACT_ENDPOINT_URL",
+    "OPENAI_BASE_URL",
+    "BRIDGE_API_URL",
+    "GOOGLE_GEOCODE_URL",
+    "COURT_BASE_URL",
+    # Tracing: spans JSON lines file and Prometheus metrics port
+    "TRACE_FILE",
+    "METRICS_PORT",
+    # "off" to OCR and analyze every page instead of only the pages triage keeps
+    "PAGE_TRIAGE",
+    # Seconds a document may spend in the pipeline before its remaining calls fail fast (0 for no limit)
+    "DOCUMENT_DEADLINE_SECONDS",
+)
+
+# Service endpoints used unless a setting overrides them; None leaves the
+# choice to the client library
+DEFAULT_ENDPOINTS = {
+    "TEXTRACT_ENDPOINT_URL": None,
+    "OPENAI_BASE_URL": None,
+    "BRIDGE_API_URL": "https://api.bridgedataoutput.com/api/v2",
+    "GOOGLE_GEOCODE_URL": "https://maps.googleapis.com/maps/api/geocode/json",
+    "COURT_BASE_URL": "https://www.courtclerk.org",
+}
+
+def load_config(secrets_file=None, overrides=None):
+    """Collect settings without requiring a Streamlit session
+
+    Later sources win: Streamlit secrets (only if Streamlit is already
+    running), a secrets.toml file, environment variables, then overrides.
+    """
+    config = {}
+
+    if "streamlit" in sys.modules:
+        try:
+            import streamlit as st
+            config.update({key: st.secrets[key] for key in st.secrets})
+        except Exception:
+            pass
+
+    if secrets_file:
+        with open(secrets_file, "rb") as f:
+            config.update(tomllib.load(f))
+
+    config.update({key: os.environ[key] for key in SETTING_KEYS if key in os.environ})
+    config.update(overrides or {})
+    return config
+
+REQUIRED = object()
+
+def get_setting(config, key, default=REQUIRED):
+    """Look up a setting, raising a clear error for missing required keys"""
+    if key in config:
+        return config[key]
+    if default is not REQUIRED:
+        return default
+    raise KeyError(f"Missing required setting: {key}")
+
+def get_endpoint(config, key):
+    """Base URL for a service, from settings or the production default"""
+    url = config.get(key) or DEFAULT_ENDPOINTS[key]
+    return url.rstrip("/") if url else None
@@ -0,0 +1,119 @@
+# court_parser.py
+import re
+from lxml import html as lxml_html
+
+RESULTS_TABLE_ID = "cpciv_classification_results"
+DOCS_TABLE_ID = "case_docs_table"
+
+TABLE_TAG_PATTERN = re.compile(r'<(/?)table\b', re.IGNORECASE)
+
+def extract_table_html(page_html, table_id):
+    """Slice the markup of a single table out of a page without parsing the rest"""
+    marker = page_html.find(f'id="{table_id}"')
+    if marker == -1:
+        marker = page_html.find(f"id='{table_id}'")
+    if marker == -1:
+        return None
+
+    start = page_html.rfind('<table', 0, marker)
+    if start == -1:
+        return None
+
+    # Walk forward counting nested tables until the matching close tag
+    depth = 0
+    for match in TABLE_TAG_PATTERN.finditer(page_html, start):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                end = page_html.find('>', match.end())
+                return page_html[start:end + 1] if end != -1 else None
+        else:
+            depth += 1
+    return None
+
+def parse_table(page_html, table_id):
+    """Parse only the table with the given id, falling back to a full parse"""
+    if not page_html:
+        return None
+
+    fragment = extract_table_html(page_html, table_id)
+    if fragment is not None:
+        try:
+            return lxml_html.fragment_fromstring(fragment)
+        except Exception:
+            pass
+
+    # Unusual markup - parse the whole document with lxml instead
+    tree = lxml_html.fromstring(page_html)
+    found = tree.xpath(f'//table[@id="{table_id}"]')
+    return found[0] if found else None
+
+def table_rows(table):
+    """Return the body rows of a table, with or without an explicit tbody"""
+    tbody = table.find('tbody')
+    return (tbody if tbody is not None else table).findall('tr')
+
+def cell_text(cell):
+    """Return the stripped text content of a table cell"""
+    return "".join(cell.itertext()).strip()
+
+def form_fields(element):
+    """Collect input name/value pairs from the first form inside an element"""
+    form = next(element.iter('form'), None)
+    if form is None:
+        return None
+    return {
+        field.get('name'): field.get('value', '')
+        for field in form.iter('input')
+        if field.get('name')
+    }
+
+def parse_search_results(page_html):
+    """Parse the classification results table into a list of result rows
+
+    Returns None if the results table is missing from the page.
+    """
+    table = parse_table(page_html, RESULTS_TABLE_ID)
+    if table is None:
+        return None
+
+    results = []
+    for row in table_rows(table):
+        cells = row.findall('td')
+        if not cells:
+            continue
+        fields = form_fields(cells[-1])
+        results.append({
+            "case_number": fields.get('casenumber') if fields else None,
+            "form": fields
+        })
+    return results
+
+def parse_case_documents(page_html):
+    """Parse the case documents table into a list of document rows
+
+    Returns None if the documents table is missing from the page.
+    """
+    table = parse_table(page_html, DOCS_TABLE_ID)
+    if table is None:
+        return None
+
+    documents = []
+    for row in table.iter('tr'):
+        cells = row.findall('td')
+        if len(cells) <= 1:
+            continue
+        documents.append({
+            "description": cell_text(cells[1]),
+            "form": form_fields(cells[-1])
+        })
+    return documents
+
+def find_initial_filing(documents):
+    """Return the first Initial Filing document row, if any
+
+    Rows with a download form come first, so a sealed or not yet imaged
+    Initial Filing listed ahead of the real one is skipped.
+    """
+    filings = [document for document in documents if "Initial Filing" in document["description"]]
+    return next((document for document in filings if document["form"]), filings[0] if filings else None)
@@ -1,16 +1,23 @@
 # court_scraper.py
+import os
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import io
+from urllib.parse import urlparse
 import time
+from blob_store import BlobStore, UnexpectedResponseError
+from config import DEFAULT_ENDPOINTS
+from tracing import count, span
+from court_parser import parse_search_results, parse_case_documents, find_initial_filing
 
 class CourtScraper:
-    def __init__(self, streamlit_instance):
-        self.base_url = "https://www.courtclerk.org"
+    def __init__(self, streamlit_instance, debug=False, request_delay=1, store=None, base_url=None):
+        self.base_url = base_url or DEFAULT_ENDPOINTS["COURT_BASE_URL"]
         self.session = requests.Session()
         self.session.cookies.clear()  # Clear any existing cookies
         self.st = streamlit_instance
+        self.debug = debug  # Opt-in capture of raw HTML responses
+        self.request_delay = request_delay  # Politeness delay between requests
+        self.store = store or BlobStore()  # Downloaded PDFs, keyed by SHA-256
         
         # Add headers to mimic a browser
         self.session.headers.update({
@@ -29,11 +36,16 @@ class CourtScraper:
 
     def make_request(self, method, url, **kwargs):
         """Make a request with a small delay"""
-        time.sleep(1)  # 1 second delay
-        if method.lower() == 'get':
-            return self.session.get(url, verify=False, **kwargs)
-        else:
-            return self.session.post(url, verify=False, **kwargs)
+        if self.request_delay:
+            time.sleep(self.request_delay)
+        with span("court.request", method=method.upper(), path=urlparse(url).path) as request_span:
+            if method.lower() == 'get':
+                response = self.session.get(url, verify=False, **kwargs)
+            else:
+                response = self.session.post(url, verify=False, **kwargs)
+            request_span.set(status=response.status_code)
+        count("court_requests", method=method.upper())
+        return response
 
     def initialize_session(self):
         """Initialize session by visiting the main page first"""
@@ -48,169 +60,208 @@ class CourtScraper:
             self.st.error(f"Error initializing session: {str(e)}")
             return False
 
+    def show_debug_html(self, label, page_html):
+        """Show raw response HTML in an expander when debug capture is enabled"""
+        if self.debug:
+            with self.st.expander(label):
+                self.st.code(page_html)
+
     def check_for_cookie_error(self, response):
         """Check if response indicates a cookie error"""
-        if 'Error 0626' in response.text or 'cookies are enabled' in response.text:
+        if self.has_cookie_error(response):
             self.st.error("Cookie error detected. Reinitializing session...")
             return self.initialize_session()
         return True
-        
-    def search_foreclosures(self, begin_date, end_date=None):
-        """Search foreclosures between dates"""
-        try:
-            # Initialize session first
-            if not self.initialize_session():
-                return None
 
-            # If no end date provided, use today
-            if not end_date:
-                end_date = datetime.now().strftime("%m/%d/%Y")
-            
-            # Form data for the search
-            search_data = {
-                "ccode": "A",  # All foreclosure types
-                "begdate": begin_date,
-                "enddate": end_date,
-                "classification": "FORECLOSURE"
-            }
-            
-            # Submit the form directly to the results page
-            results_url = f"{self.base_url}/data/cpciv_classification_results.php"
-            self.st.write("Submitting search to:", results_url)
-            self.st.write("With data:", search_data)
-            
-            response = self.make_request('post', results_url, data=search_data)
-            if not self.check_for_cookie_error(response):
-                return None
+    def has_cookie_error(self, response):
+        """Whether an HTML response is the site's cookie error page"""
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            return False
+        return 'Error 0626' in response.text or 'cookies are enabled' in response.text
 
-            self.st.write(f"Search form response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.st.error(f"Search form error response: {response.text}")
+    def post_form(self, url, data):
+        """Post a form, re-initializing the session and retrying once on a cookie error"""
+        response = self.make_request('post', url, data=data)
+        if self.has_cookie_error(response):
+            if not self.check_for_cookie_error(response):
                 return None
-            
-            # Save the response HTML for debugging
-            with self.st.expander("View Search Response HTML"):
-                self.st.code(response.text)
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find results table
-            results_table = soup.find('table', id='cpciv_classification_results')
-            if not results_table:
-                self.st.error("Could not find results table. Response content:")
-                self.st.write(soup.prettify())
+            response = self.make_request('post', url, data=data)
+            if self.has_cookie_error(response):
+                self.st.error("Cookie error persisted after reinitializing session")
                 return None
+        return response
 
-            # Get tbody and its first row
-            tbody = results_table.find('tbody')
-            if not tbody:
-                self.st.error("Could not find tbody in results table")
-                return None
 
-            first_row = tbody.find('tr')
-            if not first_row:
-                self.st.error("No results found in table")
-                self.st.write("Table content:", results_table.prettify())
-                return None
+    def search_cases(self, begin_date, end_date=None):
+        """Return the case numbers of all foreclosures filed between dates"""
+        # If no end date provided, use today
+        if not end_date:
+            end_date = datetime.now().strftime("%m/%d/%Y")
+        
+        # Form data for the search
+        search_data = {
+            "ccode": "A",  # All foreclosure types
+            "begdate": begin_date,
+            "enddate": end_date,
+            "classification": "FORECLOSURE"
+        }
+        
+        # Submit the form directly to the results page
+        results_url = f"{self.base_url}/data/cpciv_classification_results.php"
+        self.st.write("Submitting search to:", results_url)
+        self.st.write("With data:", search_data)
+        
+        response = self.post_form(results_url, search_data)
+        if response is None:
+            return None
 
-            # Find the document form in the last cell (td) of the first row
-            doc_form = first_row.find_all('td')[-1].find('form')  # Get last cell and find form within it
-            if not doc_form:
-                self.st.error("Could not find document form in first row")
-                self.st.write("First row content:", first_row.prettify())
-                return None
+        self.st.write(f"Search form response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            self.st.error(f"Search form error response: {response.text}")
+            return None
+        
+        self.show_debug_html("View Search Response HTML", response.text)
+
+        results = parse_search_results(response.text)
+        if results is None:
+            self.st.error("Could not find results table in search response")
+            return None
+
+        case_numbers = [result["case_number"] for result in results if result["case_number"]]
+        if len(case_numbers) < len(results):
+            self.st.write(f"Skipped {len(results) - len(case_numbers)} rows without a case number form")
+        return case_numbers
+
+    def fetch_case_pdf(self, case_number):
+        """Download the Initial Filing PDF for a case and return its stored path"""
+        # Submit form to get case documents
+        case_docs_url = f"{self.base_url}/data/case_summary.php"  # Add /data/ to the path
+        case_docs_data = {
+            "sec": "doc",
+            "casenumber": case_number
+        }            
+        self.st.write("Submitting case documents form with data:", case_docs_data)
+        docs_response = self.post_form(case_docs_url, case_docs_data)
+        if docs_response is None:
+            return None
+
+        self.st.write(f"Case documents response status: {docs_response.status_code}")
+        
+        if docs_response.status_code != 200:
+            self.st.error(f"Case documents error response: {docs_response.text}")
+            return None
+        
+        self.show_debug_html("View Case Documents Response HTML", docs_response.text)
+        
+        documents = parse_case_documents(docs_response.text)
+        if documents is None:
+            self.st.error("Could not find documents table")
+            return None
+        
+        # Find Initial Filing row
+        initial_filing = find_initial_filing(documents)
+        if not initial_filing:
+            self.st.error("Could not find Initial Filing row in documents table")
+            return None
+
+        self.st.write("Found Initial Filing row")
+        form = initial_filing["form"]
+        if not form:
+            self.st.error("Initial Filing row has no document form to request the PDF with")
+            return None
 
-            # Extract case number
-            case_number_input = doc_form.find('input', {'name': 'casenumber'})
-            if not case_number_input:
-                self.st.error("Could not find case number input")
-                self.st.write("Form content:", doc_form.prettify())
+        # Extract PDF viewing data
+        try:
+            pdf_data = {
+                "case_number": form['case_number'],
+                "path_link": form['path_link'],
+                "doc_no": form['doc_no'],
+                "must_redact": form['must_redact']
+            }
+        except KeyError as e:
+            self.st.error(f"Error processing PDF form: missing field {str(e)}")
+            return None
+        
+        key = f"courtclerk:{pdf_data['case_number']}:{pdf_data['doc_no']}:{pdf_data['path_link']}"
+        stored_path = self.store.lookup(key)
+        if stored_path:
+            self.st.write(f"Using stored copy of PDF: {stored_path}")
+            return stored_path
+
+        self.st.write("Submitting PDF view form with data:", pdf_data)
+        
+        # Stream PDF content straight into the blob store
+        pdf_url = f"{self.base_url}/data/image_view_stream.php"
+        for attempt in range(2):
+            try:
+                path = self.store.download(
+                    self.make_request, 'post', pdf_url, key,
+                    accept=self.check_pdf_response, data=pdf_data
+                )
+                self.st.write(f"Stored PDF at {path}")
+                count("court_pdf_bytes", os.path.getsize(path))
+                return path
+            except UnexpectedResponseError as e:
+                if attempt == 0 and self.has_cookie_error(e.response):
+                    if self.check_for_cookie_error(e.response):
+                        continue
+                self.st.error(str(e))
                 return None
+        return None
 
-            case_number = case_number_input['value']
-            self.st.write(f"Found case number: {case_number}")
+    def check_pdf_response(self, response):
+        """Return an error message unless the response is a PDF"""
+        self.st.write(f"PDF response status: {response.status_code}")
+        if self.debug:
+            self.st.write(f"PDF response headers: {dict(response.headers)}")
 
-            # Submit form to get case documents
-            case_docs_url = f"{self.base_url}/data/case_summary.php"  # Add /data/ to the path
-            case_docs_data = {
-                "sec": "doc",
-                "casenumber": case_number
-            }            
-            self.st.write("Submitting case documents form with data:", case_docs_data)
-            docs_response = self.make_request('post', case_docs_url, data=case_docs_data)
-            if not self.check_for_cookie_error(docs_response):
+        if response.status_code != 200:
+            return f"PDF error response: {response.status_code}"
+
+        content_type = response.headers.get('content-type', '')
+        if 'application/pdf' not in content_type:
+            return f"Unexpected content type: {content_type}"
+        return None
+
+    def search_foreclosures(self, begin_date, end_date=None):
+        """Search foreclosures between dates and return the first case's PDF"""
+        try:
+            # Initialize session first
+            if not self.initialize_session():
                 return None
 
-            self.st.write(f"Case documents response status: {docs_response.status_code}")
-            
-            if docs_response.status_code != 200:
-                self.st.error(f"Case documents error response: {docs_response.text}")
+            case_numbers = self.search_cases(begin_date, end_date)
+            if case_numbers is None:
                 return None
-            
-            # Save the case documents HTML for debugging
-            with self.st.expander("View Case Documents Response HTML"):
-                self.st.code(docs_response.text)
-            
-            docs_soup = BeautifulSoup(docs_response.text, 'html.parser')
-            
-            # Find documents table
-            docs_table = docs_soup.find('table', id='case_docs_table')
-            if not docs_table:
-                self.st.error("Could not find documents table")
+
+            if not case_numbers:
+                self.st.error("No results found in table")
                 return None
-            
-            # Find Initial Filing row
-            initial_filing_found = False
-            for row in docs_table.find_all('tr'):
-                cells = row.find_all('td')
-                if len(cells) > 1 and "Initial Filing" in cells[1].text:
-                    initial_filing_found = True
-                    self.st.write("Found Initial Filing row")
-                    form = cells[-1].find('form')
-                    if form:
-                        # Extract PDF viewing data
-                        try:
-                            pdf_data = {
-                                "case_number": form.find('input', {'name': 'case_number'})['value'],
-                                "path_link": form.find('input', {'name': 'path_link'})['value'],
-                                "doc_no": form.find('input', {'name': 'doc_no'})['value'],
-                                "must_redact": form.find('input', {'name': 'must_redact'})['value']
-                            }
-                            
-                            self.st.write("Submitting PDF view form with data:", pdf_data)
-                            
-                            # Get PDF content
-                            pdf_url = f"{self.base_url}/data/image_view_stream.php"
-                            pdf_response = self.make_request('post', pdf_url, data=pdf_data)
-                            if not self.check_for_cookie_error(pdf_response):
-                                return None
-
-                            self.st.write(f"PDF response status: {pdf_response.status_code}")
-                            self.st.write(f"PDF response headers: {dict(pdf_response.headers)}")
-                            
-                            if pdf_response.status_code != 200:
-                                self.st.error(f"PDF error response: {pdf_response.text}")
-                                return None
-                            
-                            if 'application/pdf' in pdf_response.headers.get('content-type', ''):
-                                return io.BytesIO(pdf_response.content)
-                            else:
-                                self.st.error(f"Unexpected content type: {pdf_response.headers.get('content-type')}")
-                                return None
-                        except Exception as e:
-                            self.st.error(f"Error processing PDF form: {str(e)}")
-                            self.st.write("Form content:", form.prettify())
-                            return None
-            
-            if not initial_filing_found:
-                self.st.error("Could not find Initial Filing row in documents table")
-                self.st.write("Table content:", docs_table.prettify())
-            
-            return None
+
+            case_number = case_numbers[0]
+            self.st.write(f"Found case number: {case_number}")
+            return self.fetch_case_pdf(case_number)
             
         except Exception as e:
             self.st.error(f"Error scraping court website: {str(e)}")
             import traceback
             self.st.error(f"Traceback: {traceback.format_exc()}")
             return None
+
+    def iter_foreclosure_pdfs(self, begin_date, end_date=None, limit=None):
+        """Yield (case_number, pdf) for every foreclosure filed between dates"""
+        if not self.initialize_session():
+            return
+
+        try:
+            case_numbers = self.search_cases(begin_date, end_date) or []
+        except Exception as e:
+            self.st.error(f"Error searching court website: {str(e)}")
+            return
+        for case_number in case_numbers[:limit]:
+            try:
+                yield case_number, self.fetch_case_pdf(case_number)
+            except Exception as e:
+                self.st.error(f"Error fetching case {case_number}: {str(e)}")
+                yield case_number, None
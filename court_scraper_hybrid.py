@@ -0,0 +1,64 @@
+# court_scraper_hybrid.py
+import threading
+from requests.adapters import HTTPAdapter
+from browser_pool import get_browser_pool
+from court_scraper import CourtScraper
+from tracing import span
+
+class CourtScraperHybrid(CourtScraper):
+    """Bootstraps the session in a real browser, then fetches everything over HTTP
+
+    The browser is only used to establish cookies. Result paging, case
+    documents and image_view_stream.php downloads go through a pooled
+    requests session, and the browser is only revisited when the site
+    reports a cookie error.
+    """
+    def __init__(self, streamlit_instance, pool=None, debug=False, request_delay=0.25,
+                 max_connections=8, store=None, base_url=None):
+        super().__init__(streamlit_instance, debug=debug, request_delay=request_delay, store=store,
+                         base_url=base_url)
+        self.pool = pool or get_browser_pool()
+        self.bootstrap_count = 0
+        self._bootstrap_lock = threading.Lock()
+
+        # Keep-alive connection pool shared by all HTTP requests
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def initialize_session(self):
+        """Load the search page in a pooled browser and copy its cookies into the HTTP session
+
+        Threads that hit a cookie error together wait for one bootstrap
+        and then reuse its cookies instead of each opening the browser.
+        """
+        seen = self.bootstrap_count
+        with self._bootstrap_lock:
+            if self.bootstrap_count != seen:
+                return True
+            try:
+                self.st.write("Bootstrapping court session in browser...")
+                with span("court.browser_bootstrap"), self.pool.browser() as browser:
+                    driver = browser.driver
+                    driver.get(f"{self.base_url}/records-search/foreclosure/")
+                    cookies = driver.get_cookies()
+                    user_agent = driver.execute_script("return navigator.userAgent")
+
+                # Requests must look like the browser that earned the cookies
+                self.session.cookies.clear()
+                for cookie in cookies:
+                    self.session.cookies.set(
+                        cookie['name'],
+                        cookie['value'],
+                        domain=cookie.get('domain'),
+                        path=cookie.get('path', '/')
+                    )
+                self.session.headers['User-Agent'] = user_agent
+                self.session.headers['Referer'] = f"{self.base_url}/records-search/foreclosure/"
+
+                self.bootstrap_count += 1
+                self.st.write(f"Session established with {len(cookies)} cookies")
+                return True
+            except Exception as e:
+                self.st.error(f"Error bootstrapping browser session: {str(e)}")
+                return False
@@ -1,7 +1,7 @@
 # display_utils.py
 import streamlit as st
 import pandas as pd
-from utils import format_currency
+from utils import format_currency, format_currency_columns
 
 def display_property_data(property_data, zestimate_data):
     """Display property data and Zestimate in a structured format"""
@@ -33,7 +33,7 @@ def display_property_data(property_data, zestimate_data):
     st.write("#### 📊 Assessment History")
     if property_data["Assessment History"]:
         assessment_df = pd.DataFrame(property_data["Assessment History"])
-        assessment_df = assessment_df.applymap(lambda x: format_currency(x) if isinstance(x, (int, float)) else x)
+        assessment_df = format_currency_columns(assessment_df, ["Total Value", "Tax Amount"])
         st.dataframe(assessment_df)
     else:
         st.write("No assessment history available")
@@ -42,7 +42,7 @@ def display_property_data(property_data, zestimate_data):
     st.write("#### 📈 Transaction History")
     if property_data["Transaction History"]:
         transaction_df = pd.DataFrame(property_data["Transaction History"])
-        transaction_df = transaction_df.applymap(lambda x: format_currency(x) if isinstance(x, (int, float)) else x)
+        transaction_df = format_currency_columns(transaction_df, ["Price"])
         st.dataframe(transaction_df)
     else:
         st.write("No transaction history available")
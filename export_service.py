@@ -0,0 +1,263 @@
+# export_service.py
+"""Stream analyzed cases to JSON lines or Parquet with a fixed schema.
+
+Records are written in row batches as they arrive, so exporting thousands
+of cases uses the same memory as exporting one batch. Exports from the
+results store can be incremental: a small state file next to the output
+remembers the last case written, and the next run appends only cases
+added or updated since.
+
+    python export_service.py --output exports/cases.jsonl
+    python export_service.py --output exports/cases --format parquet --incremental
+"""
+import argparse
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime, timezone
+from results_store import DEFAULT_DB_PATH, ResultsStore, case_row
+
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 1000
+
+# (column, type) in output order; every export has exactly these columns
+EXPORT_SCHEMA = [
+    ("document_hash", "string"),
+    ("case_number", "string"),
+    ("source", "string"),
+    ("plaintiff", "string"),
+    ("defendant", "string"),
+    ("judgment_amount", "float"),
+    ("claims_total", "float"),
+    ("liens_total", "float"),
+    ("lien_count", "int"),
+    ("filing_date", "date"),
+    ("street_address", "string"),
+    ("city", "string"),
+    ("state", "string"),
+    ("zip_code", "string"),
+    ("latitude", "float"),
+    ("longitude", "float"),
+    ("formatted_address", "string"),
+    ("assessed_value", "float"),
+    ("zestimate", "float"),
+    ("failed_stage", "string"),
+    ("analysis", "string"),
+    ("ocr_text", "string"),
+    ("updated_at", "timestamp"),
+]
+
+def to_value(value, kind):
+    """Coerce one field to its schema type, or None"""
+    if value is None or value == "":
+        return None
+    try:
+        if kind == "string":
+            return str(value)
+        if kind == "float":
+            return float(value)
+        if kind == "int":
+            return int(value)
+        if kind == "date":
+            return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+        if kind == "timestamp":
+            return value if isinstance(value, datetime) else datetime.fromtimestamp(float(value), timezone.utc)
+    except (TypeError, ValueError):
+        return None
+    raise ValueError(f"Unknown export type: {kind}")
+
+def export_record(row, include_text=False):
+    """Project a flat case row (results store or case_row) onto the export schema"""
+    record = {name: to_value(row.get(name), kind) for name, kind in EXPORT_SCHEMA}
+    if not include_text:
+        record["ocr_text"] = None
+    return record
+
+def result_record(result, include_text=False):
+    """Export record for a pipeline result"""
+    row = case_row(result)
+    row["failed_stage"] = result.get("failed_stage")
+    row["updated_at"] = time.time()
+    return export_record(row, include_text)
+
+def json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+class Exporter:
+    """Buffers records and writes them out a batch at a time"""
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, include_text=False):
+        self.batch_size = batch_size
+        self.include_text = include_text
+        self.count = 0
+        self._pending = []
+
+    def write(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def write_result(self, result):
+        self.write(result_record(result, self.include_text))
+
+    def write_row(self, row):
+        self.write(export_record(row, self.include_text))
+
+    def flush(self):
+        if self._pending:
+            self._write_batch(self._pending)
+            self.count += len(self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class JsonlExporter(Exporter):
+    """JSON lines, one record per line; append adds to an existing file"""
+    def __init__(self, target, append=False, **kwargs):
+        super().__init__(**kwargs)
+        self.path = target
+        directory = os.path.dirname(target)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(target, "a" if append else "w", encoding="utf-8")
+
+    def _write_batch(self, records):
+        self._file.write("".join(json.dumps(record, default=json_default) + "\n" for record in records))
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+def arrow_schema():
+    import pyarrow as pa
+    types = {
+        "string": pa.string(),
+        "float": pa.float64(),
+        "int": pa.int64(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("s", tz="UTC"),
+    }
+    return pa.schema(
+        [pa.field(name, types[kind]) for name, kind in EXPORT_SCHEMA],
+        metadata={"schema_version": str(SCHEMA_VERSION)}
+    )
+
+class ParquetExporter(Exporter):
+    """Parquet, one row group per batch
+
+    Parquet files can't be appended to, so with append=True (or when the
+    target is an existing directory) the target is a dataset directory and
+    each run adds a new, uniquely named part file to it; a run that writes
+    nothing adds no file. pandas.read_parquet and pyarrow.dataset read the
+    directory as one table. target may also be an open binary file.
+    """
+    def __init__(self, target, append=False, **kwargs):
+        super().__init__(**kwargs)
+        self.dataset_dir = None
+        if isinstance(target, (str, os.PathLike)):
+            if append or os.path.isdir(target):
+                self.dataset_dir = target
+                target = os.path.join(target, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:12]}.parquet")
+            elif os.path.dirname(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+        self.path = target
+        self.schema = arrow_schema()
+        self._writer = None
+
+    def _open(self):
+        """Create the writer on first use, so an empty dataset run never touches the directory"""
+        import pyarrow.parquet as pq
+        if self.dataset_dir is not None:
+            os.makedirs(self.dataset_dir, exist_ok=True)
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+
+    def _write_batch(self, records):
+        import pyarrow as pa
+        if self._writer is None:
+            self._open()
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=self.schema))
+
+    def _close(self):
+        if self._writer is None and self.dataset_dir is None:
+            self._open()  # A single-file export with no rows is still a valid, empty Parquet file
+        if self._writer is not None:
+            self._writer.close()
+
+EXPORTERS = {"jsonl": JsonlExporter, "parquet": ParquetExporter}
+
+def format_for(target):
+    """Export format implied by an output path"""
+    return "parquet" if target.endswith(".parquet") or os.path.isdir(target) else "jsonl"
+
+def open_exporter(target, fmt=None, append=False, batch_size=DEFAULT_BATCH_SIZE, include_text=False):
+    return EXPORTERS[fmt or format_for(target)](target, append=append, batch_size=batch_size,
+                                               include_text=include_text)
+
+def state_path(target):
+    return target.rstrip("/\\") + ".export-state.json"
+
+def load_watermark(target):
+    """(updated_at, id) of the last case written to target, or None"""
+    try:
+        with open(state_path(target), encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{target} was exported with schema version {state.get('schema_version')}, "
+                         f"not {SCHEMA_VERSION}; export to a new location")
+    return state["updated_at"], state["id"]
+
+def save_watermark(target, updated_at, case_id):
+    with open(state_path(target), "w", encoding="utf-8") as f:
+        json.dump({"schema_version": SCHEMA_VERSION, "updated_at": updated_at, "id": case_id}, f)
+
+def export_store(store, target, fmt=None, incremental=False, batch_size=DEFAULT_BATCH_SIZE, include_text=False):
+    """Write stored cases to target; returns the number exported
+
+    With incremental=True only cases changed since the previous incremental
+    export are written, appended to what is already there.
+    """
+    after = load_watermark(target) if incremental else None
+    last = None
+    exporter = open_exporter(target, fmt, append=incremental, batch_size=batch_size, include_text=include_text)
+    try:
+        for row in store.iter_cases(after, batch_size):
+            exporter.write_row(row)
+            last = row
+    finally:
+        exporter.close()
+
+    if incremental and last is not None:
+        save_watermark(target, last["updated_at"], last["id"])
+    return exporter.count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export analyzed cases from the results store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Results database")
+    parser.add_argument("--output", required=True, help="Output file (.jsonl/.parquet) or Parquet directory")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), help="Defaults to the output extension")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only cases added or updated since the last incremental export")
+    parser.add_argument("--include-text", action="store_true", help="Include the full OCR text")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    count = export_store(ResultsStore(args.db), args.output, args.format, args.incremental,
+                         args.batch_size, args.include_text)
+    logging.info(f"Exported {count} cases to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# job_queue.py
+"""Durable SQLite job queue for the document pipeline.
+
+Each job is one PDF. Stage results and per-page/per-chunk sub-results are
+checkpointed, so a retried or resumed job only redoes unfinished work.
+
+    python job_queue.py enqueue --pdf-dir ./filings
+    python job_queue.py work --workers 4
+    python job_queue.py status
+"""
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+from config import load_config
+from pipeline import PipelineContext, process_pdf_document
+from reporting import LoggingReporter
+from tracing import JsonlSpanExporter, process_tracer
+
+DEFAULT_DB_PATH = "jobs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    case_number TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    unit TEXT NOT NULL,
+    value TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (job_id, unit)
+);
+"""
+
+# Failed stages that are final answers rather than transient errors
+NON_RETRYABLE_STAGES = ("geocode",)
+
+class JobQueue:
+    """SQLite-backed queue of pipeline jobs, safe to share between processes"""
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_attempts=5, backoff_seconds=30, lease_seconds=300):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, source, case_number=None):
+        """Add a document; re-enqueueing a known source leaves the existing job alone"""
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (source, case_number, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (str(source), case_number, now, now)
+        )
+
+    def _expire_leases(self, now):
+        """Treat running jobs whose lease ran out as failed attempts
+
+        The worker crashed or was killed (OOM, a segfault while rendering),
+        so the job is retried with the same backoff as any failure, and
+        given up on once it has used max_attempts.
+        """
+        error = "worker lease expired (the worker crashed or was killed)"
+        self.conn.execute(
+            """UPDATE jobs SET status = 'failed', next_attempt_at = ?, error = ?, lease_until = NULL,
+               updated_at = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?""",
+            (now, error, now, now, self.max_attempts)
+        )
+        self.conn.execute(
+            """UPDATE jobs SET status = 'pending', next_attempt_at = lease_until + ? * (1 << (attempts - 1)),
+               error = ?, lease_until = NULL, updated_at = ? WHERE status = 'running' AND lease_until < ?""",
+            (self.backoff_seconds, error, now, now)
+        )
+
+    def claim(self, worker_id):
+        """Take the next runnable job; jobs whose worker's lease expired are retried after a backoff"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_leases(now)
+            row = self.conn.execute(
+                """SELECT id, source, case_number, attempts FROM jobs
+                   WHERE status = 'pending' AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at, id LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                """UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                   lease_until = ?, worker = ?, updated_at = ? WHERE id = ?""",
+                (now + self.lease_seconds, worker_id, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "source": row[1], "case_number": row[2], "attempts": row[3] + 1}
+
+    def renew_lease(self, job_id):
+        """Extend a running job's lease; called as work units complete"""
+        now = time.time()
+        self.conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+            (now + self.lease_seconds, now, job_id)
+        )
+
+    def complete(self, job_id, result, worker_id):
+        """Record a job's result; False if worker_id no longer holds the job (its lease expired)"""
+        now = time.time()
+        cursor = self.conn.execute(
+            """UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ?
+               WHERE id = ? AND worker = ? AND status = 'running'""",
+            (json.dumps(result, default=str), now, job_id, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id, attempts, error, worker_id):
+        """Schedule a retry with exponential backoff, or give up after max_attempts
+
+        Returns the job's new status, or None if worker_id no longer holds
+        the job (its lease expired and it was reclaimed).
+        """
+        now = time.time()
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = 'failed', now
+        else:
+            status, next_attempt_at = 'pending', now + self.backoff_seconds * 2 ** (attempts - 1)
+        cursor = self.conn.execute(
+            """UPDATE jobs SET status = ?, next_attempt_at = ?, error = ?, lease_until = NULL,
+               updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'""",
+            (status, next_attempt_at, error, now, job_id, worker_id)
+        )
+        return status if cursor.rowcount else None
+
+    def load_checkpoint(self, job_id, unit):
+        row = self.conn.execute(
+            "SELECT value FROM checkpoints WHERE job_id = ? AND unit = ?", (job_id, unit)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_checkpoint(self, job_id, unit, value):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checkpoints (job_id, unit, value, completed_at) VALUES (?, ?, ?, ?)",
+            (job_id, unit, json.dumps(value), now)
+        )
+        self.renew_lease(job_id)
+
+    def counts(self):
+        """Number of jobs in each status"""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def results(self):
+        """Finished result records"""
+        for (result,) in self.conn.execute("SELECT result FROM jobs WHERE status = 'done' ORDER BY id"):
+            yield json.loads(result)
+
+class JobCheckpoint:
+    """Checkpoint backed by the job queue, with per-unit retries and backoff
+
+    Units that already completed return their saved value without running.
+    Units that raise are retried up to `retries` times, sleeping
+    backoff_seconds * 2**n between tries, before the error propagates.
+    """
+    def __init__(self, queue, job_id, prefix="", retries=3, backoff_seconds=2):
+        self.queue = queue
+        self.job_id = job_id
+        self.prefix = prefix
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+
+    def scoped(self, prefix):
+        return JobCheckpoint(self.queue, self.job_id, f"{self.prefix}{prefix}/",
+                             self.retries, self.backoff_seconds)
+
+    def run(self, unit, fn):
+        key = self.prefix + unit
+        saved = self.queue.load_checkpoint(self.job_id, key)
+        if saved is not None:
+            return saved
+
+        for attempt in range(self.retries + 1):
+            try:
+                value = fn()
+                break
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff_seconds * 2 ** attempt)
+
+        # None means the step reported failure; leave it to be redone next time
+        if value is not None:
+            self.queue.save_checkpoint(self.job_id, key, value)
+        return value
+
+def run_worker(db_path, config, worker_id=None, poll_interval=2.0, exit_when_idle=False, enrich=True,
+               trace_path=None):
+    """Claim and process jobs until the queue is empty (or forever)"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(db_path)
+    logger = logging.getLogger("job_queue")
+    if trace_path:
+        process_tracer().exporters.append(JsonlSpanExporter(trace_path))
+
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            if exit_when_idle:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        label = job["case_number"] or os.path.basename(job["source"])
+        logger.info(f"[{label}] attempt {job['attempts']} on {worker_id}")
+        context = PipelineContext(
+            config,
+            LoggingReporter(prefix=f"[{label}] "),
+            JobCheckpoint(queue, job["id"]),
+            trace_attributes={"job": job["id"], "attempt": job["attempts"],
+                              **({"case_number": job["case_number"]} if job["case_number"] else {})}
+        )
+        try:
+            result = process_pdf_document(job["source"], context, job["case_number"], enrich)
+        except Exception as e:
+            status = queue.fail(job["id"], job["attempts"], str(e), worker_id)
+            logger.error(f"[{label}] {status or 'lease lost, left to its new owner'}: {str(e)}")
+            continue
+
+        failed_stage = result["failed_stage"]
+        if failed_stage and failed_stage not in NON_RETRYABLE_STAGES:
+            status = queue.fail(job["id"], job["attempts"], f"{failed_stage} stage produced no result", worker_id)
+            logger.warning(f"[{label}] {failed_stage} failed, job is {status or 'no longer ours (lease lost)'}")
+        elif queue.complete(job["id"], result, worker_id):
+            logger.info(f"[{label}] done")
+        else:
+            logger.warning(f"[{label}] finished after its lease expired; result discarded")
+
+def run_workers(db_path, config, workers, exit_when_idle=False, enrich=True, trace_path=None):
+    """Run several worker processes against the same queue"""
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            kwargs={"db_path": db_path, "config": config, "exit_when_idle": exit_when_idle, "enrich": enrich,
+                    "trace_path": trace_path}
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable foreclosure pipeline job queue")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add PDFs to the queue")
+    enqueue.add_argument("--pdf-dir", required=True)
+
+    work = commands.add_parser("work", help="Process queued jobs")
+    work.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    work.add_argument("--exit-when-idle", action="store_true")
+    work.add_argument("--no-enrich", action="store_true")
+    work.add_argument("--trace", help="Append a JSON line per span to this file")
+    work.add_argument("--secrets", default=".streamlit/secrets.toml" if os.path.exists(".streamlit/secrets.toml") else None)
+
+    commands.add_parser("status", help="Show job counts")
+    commands.add_parser("results", help="Print finished results as JSON lines")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "enqueue":
+        queue = JobQueue(args.db)
+        paths = sorted(glob.glob(os.path.join(args.pdf_dir, "**", "*.pdf"), recursive=True))
+        for path in paths:
+            queue.enqueue(os.path.abspath(path))
+        logging.info(f"Enqueued {len(paths)} documents")
+    elif args.command == "work":
+        run_workers(args.db, load_config(secrets_file=args.secrets), args.workers,
+                    args.exit_when_idle, not args.no_enrich, args.trace)
+    elif args.command == "status":
+        print(json.dumps(JobQueue(args.db).counts()))
+    elif args.command == "results":
+        for result in JobQueue(args.db).results():
+            sys.stdout.write(json.dumps(result) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,36 @@
 # map_service.py
-import streamlit as st
-from streamlit_folium import folium_static
-import folium
-import requests
+from config import get_endpoint, get_setting, load_config
+from reporting import default_reporter
+from resilience import call_service, get_json
+from tracing import count, span
 
-def get_coordinates(address, city, state, zip_code):
+def get_coordinates(address, city, state, zip_code, config=None, reporter=None):
     """Get latitude and longitude from address using Google Geocoding API"""
+    reporter = default_reporter(reporter)
+    config = config if config is not None else load_config()
     try:
         # Format the address
         full_address = f"{address}, {city}, {state} {zip_code}"
         
         # Make request to Google Geocoding API
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
+        url = get_endpoint(config, "GOOGLE_GEOCODE_URL")
         params = {
             "address": full_address,
-            "key": st.secrets["GOOGLE_MAPS_API_KEY"]
+            "key": get_setting(config, "GOOGLE_MAPS_API_KEY")
         }
         
         # Debug information
-        st.write("Requesting coordinates for:", full_address)
+        reporter.write("Requesting coordinates for:", full_address)
         
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        with span("google.geocode") as geocode_span:
+            # Idempotent, so slow lookups are hedged; the last answer for the address is the fallback
+            data = call_service("google", lambda timeout: get_json(url, params, timeout=timeout),
+                                cache_key=full_address)
+            geocode_span.set(status=data.get("status"))
+        count("geocode_requests", status=data.get("status"))
         
         # Debug information
-        st.write("Google API Response Status:", data["status"])
+        reporter.write("Google API Response Status:", data["status"])
         
         if data["status"] == "OK":
             location = data["results"][0]["geometry"]["location"]
@@ -36,40 +40,9 @@ def get_coordinates(address, city, state, zip_code):
                 "formatted_address": data["results"][0]["formatted_address"]
             }
         else:
-            st.error(f"Geocoding error: {data['status']}")
+            reporter.error(f"Geocoding error: {data['status']}")
             return None
             
     except Exception as e:
-        st.error(f"Error getting coordinates: {str(e)}")
+        reporter.error(f"Error getting coordinates: {str(e)}")
         return None
-
-def display_map(coordinates, property_info=None):
-    """Display an interactive map with the property location"""
-    try:
-        # Create a map centered on the property
-        m = folium.Map(
-            location=[coordinates["lat"], coordinates["lng"]], 
-            zoom_start=15,
-            width=800,
-            height=500
-        )
-        
-        # Add a marker for the property
-        tooltip = coordinates["formatted_address"]
-        
-        folium.Marker(
-            [coordinates["lat"], coordinates["lng"]],
-            popup=folium.Popup(tooltip, max_width=300),
-            tooltip="Click for details",
-            icon=folium.Icon(color='red', icon='home', prefix='fa')
-        ).add_to(m)
-        
-        # Add the map to Streamlit
-        st.write("### Property Location")
-        folium_static(m)
-        
-        # Display the formatted address
-        st.write(f"**Formatted Address:** {coordinates['formatted_address']}")
-        
-    except Exception as e:
-        st.error(f"Error displaying map: {str(e)}")
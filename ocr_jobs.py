@@ -0,0 +1,120 @@
+# ocr_jobs.py
+"""OCR that runs in the background and can be read page by page while it runs.
+
+The app starts one job per document and polls it between reruns, so page
+text shows up as each page finishes and the first pages can be analyzed
+before the last ones are done. Jobs are shared across sessions the same
+way ResultCache is: a second user opening the same document watches the
+job that is already running instead of starting another.
+"""
+import threading
+from collections import OrderedDict
+from pdf_service import page_section
+from reporting import LoggingReporter
+
+class JobReporter(LoggingReporter):
+    """LoggingReporter that also keeps the last error so the app can show it"""
+    def __init__(self, name="ocr_jobs", prefix=""):
+        super().__init__(name, prefix)
+        self.last_error = None
+
+    def error(self, message):
+        super().error(message)
+        self.last_error = str(message)
+
+class PageOcrJob:
+    """One document's OCR running on a background thread
+
+    run(on_page) does the OCR, calling on_page(page_num, total_pages,
+    page_text) as pages finish, and returns the full text (None on failure).
+    total_pages counts the pages being OCR'd, which after triage may be
+    fewer than the document has.
+    """
+    def __init__(self, run, reporter=None, key=None):
+        self.key = key
+        self.reporter = reporter or JobReporter()
+        self.pages = {}
+        self.total_pages = None
+        self.text = None
+        self.error = None
+        self._run = run
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, daemon=True, name="ocr-job")
+        self._thread.start()
+        return self
+
+    def _work(self):
+        try:
+            text = self._run(self.on_page)
+        except Exception as e:
+            text = None
+            self.reporter.error(f"Error processing PDF: {str(e)}")
+        with self._lock:
+            self.text = text
+            if text is None:
+                self.error = self.reporter.last_error or "OCR produced no text"
+        self._finished.set()
+
+    def on_page(self, page_num, total_pages, page_text):
+        with self._lock:
+            self.pages[page_num] = page_text
+            self.total_pages = total_pages
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns whether it did"""
+        return self._finished.wait(timeout)
+
+    def ready_pages(self):
+        """Number of pages finished so far; pages finish in document order"""
+        with self._lock:
+            return len(self.pages)
+
+    def partial_text(self, first_pages=None):
+        """Page-delimited text of the pages finished so far, at most the first first_pages of them"""
+        with self._lock:
+            finished = list(self.pages.items())[:first_pages]
+        return "".join(page_section(page_num, page_text) for page_num, page_text in finished)
+
+    def progress(self):
+        """(pages finished, total pages or None before the first page)"""
+        with self._lock:
+            return len(self.pages), self.total_pages
+
+class OcrJobs:
+    """Running and recently finished OCR jobs by key (usually the document hash)"""
+    def __init__(self, max_jobs=16):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def get_or_start(self, key, run, reporter=None):
+        """The job for key, starting it with run if there isn't one"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+                return job
+            job = PageOcrJob(run, reporter, key)
+            self._jobs[key] = job
+            # Only finished jobs are evicted; a running one is still being watched
+            for old_key in [old_key for old_key, old_job in self._jobs.items() if old_job.done]:
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                del self._jobs[old_key]
+        return job.start()
+
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
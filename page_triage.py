@@ -0,0 +1,162 @@
+# page_triage.py
+"""Label the pages of a foreclosure packet before OCR.
+
+A packet is usually a short complaint followed by long exhibits: the note,
+the mortgage, assignments, affidavits. Each page is labelled from cheap
+features (the PDF's own text layer, keyword hits, and how much ink a
+small grayscale thumbnail has and where), and only caption/complaint,
+legal description and unclassified body pages go on to Textract and the
+analysis. Exhibits and blank or cover pages are skipped but kept in the
+triage list, so they can be OCR'd later on request.
+
+Scanned pages have no text layer, so for them triage falls back to layout:
+a mostly empty page with a small centered block of ink after page 1 is
+taken as an exhibit cover sheet, and the scanned pages after it as the
+exhibit. When in doubt a page is kept.
+"""
+import re
+from pdf_service import open_pdf
+
+CAPTION = "caption"
+LEGAL_DESCRIPTION = "legal_description"
+BODY = "body"
+EXHIBIT = "exhibit"
+BLANK = "blank"
+
+# Labels whose pages are OCR'd and analyzed
+RELEVANT_LABELS = (CAPTION, LEGAL_DESCRIPTION, BODY)
+
+CAPTION_KEYWORDS = (
+    "court of common pleas", "complaint", "in foreclosure", "case no", "plaintiff", "defendant",
+    "wherefore", "judgment", "count one", "count i", "prayer for relief"
+)
+LEGAL_DESCRIPTION_KEYWORDS = (
+    "legal description", "situated in", "being lot", "parcel no", "parcel number", "auditor",
+    "township", "plat book", "subdivision", "recorded in", "feet to", "thence"
+)
+EXHIBIT_KEYWORDS = (
+    "promissory note", "this mortgage", "open-end mortgage", "assignment of mortgage", "allonge",
+    "affidavit", "notary public", "pay to the order of", "borrower's initials", "loan modification"
+)
+# A complaint citing its exhibits ("attached as Exhibit B") is still the complaint
+EXHIBIT_REFERENCE = re.compile(r'\b(?:attached|see|marked|incorporated)\b[^.]{0,40}\bexhibit\s+["\']?[a-z0-9]{1,3}\b',
+                               re.IGNORECASE)
+EXHIBIT_COVER = re.compile(r'^\s*exhibit\s+["\']?[a-z0-9]{1,3}["\']?\s*$', re.IGNORECASE | re.MULTILINE)
+
+THUMBNAIL_SCALE = 0.25
+INK_THRESHOLD = 200          # Gray level below which a thumbnail pixel counts as ink
+BLANK_INK = 0.001            # Fraction of inked pixels below which a page is blank
+COVER_INK = 0.015
+COVER_EXTENT = 0.35          # A cover's ink fits in this fraction of the page width and height
+NATIVE_TEXT_CHARS = 40       # Fewer characters than this and the page is treated as scanned
+MIN_KEYWORD_HITS = 2
+
+_DARK = bytes(range(INK_THRESHOLD))
+
+def keyword_hits(text, keywords):
+    return [keyword for keyword in keywords if keyword in text]
+
+def ink_layout(page):
+    """Inked fraction of a grayscale thumbnail, and for nearly empty pages the ink bounds
+
+    Bounds are (x0, y0, x1, y1) as fractions of the page, or None.
+    """
+    import fitz
+    pix = page.get_pixmap(matrix=fitz.Matrix(THUMBNAIL_SCALE, THUMBNAIL_SCALE), colorspace=fitz.csGRAY,
+                          alpha=False)
+    samples, width, height, stride = pix.samples, pix.width, pix.height, pix.stride
+    inked = len(samples) - len(samples.translate(None, _DARK))
+    if not inked or inked / (width * height) > COVER_INK:
+        return inked / (width * height), None
+
+    rows = [y for y in range(height)
+            if len(samples[y * stride:y * stride + width].translate(None, _DARK)) < width - 1]
+    if not rows:
+        return inked / (width * height), None
+    columns = [0] * width
+    for y in rows:
+        row = samples[y * stride:y * stride + width]
+        for x, value in enumerate(row):
+            if value < INK_THRESHOLD:
+                columns[x] += 1
+    inked_columns = [x for x, column in enumerate(columns) if column > 1] or [0, width - 1]
+    bounds = (inked_columns[0] / width, rows[0] / height, (inked_columns[-1] + 1) / width, (rows[-1] + 1) / height)
+    return inked / (width * height), bounds
+
+def is_cover_layout(ink, bounds):
+    """Little ink, all of it in a small block near the middle of the page"""
+    if bounds is None or ink > COVER_INK:
+        return False
+    x0, y0, x1, y1 = bounds
+    return (x1 - x0 <= COVER_EXTENT and y1 - y0 <= COVER_EXTENT
+            and 0.25 <= (y0 + y1) / 2 <= 0.75 and 0.25 <= (x0 + x1) / 2 <= 0.75)
+
+def classify_page(page_number, text, ink, bounds, in_exhibit):
+    """(label, reason, starts_exhibit) for one page given its features"""
+    lowered = " ".join(text.lower().split())
+    native = len(lowered) >= NATIVE_TEXT_CHARS
+
+    if len(lowered) < 200 and EXHIBIT_COVER.search(text):
+        return BLANK, "exhibit cover sheet", True
+    if ink < BLANK_INK and not native:
+        return BLANK, "no ink", False
+
+    legal = keyword_hits(lowered, LEGAL_DESCRIPTION_KEYWORDS)
+    if len(legal) >= MIN_KEYWORD_HITS:
+        return LEGAL_DESCRIPTION, f"keywords: {', '.join(legal)}", False
+    caption = keyword_hits(lowered, CAPTION_KEYWORDS)
+    exhibit = keyword_hits(lowered, EXHIBIT_KEYWORDS)
+    if len(caption) >= MIN_KEYWORD_HITS and len(caption) > len(exhibit):
+        return CAPTION, f"keywords: {', '.join(caption)}", False
+    # Only a page that reads like an exhibit starts an exhibit run; one that mentions them is kept
+    if len(exhibit) >= MIN_KEYWORD_HITS and not caption:
+        return EXHIBIT, f"keywords: {', '.join(exhibit)}", True
+    if EXHIBIT_REFERENCE.search(lowered):
+        return BODY, "refers to exhibits", False
+
+    if not native and page_number > 1 and is_cover_layout(ink, bounds):
+        return BLANK, "cover layout (small centered block of ink)", True
+    if in_exhibit:
+        return EXHIBIT, "follows an exhibit", False
+    return BODY, "native text" if native else "scanned page", False
+
+def triage_document(pdf_document):
+    """Triage record (page, label, reason, relevant, ink, text_chars) for each page of an open PDF"""
+    pages = []
+    in_exhibit = False
+    for index in range(pdf_document.page_count):
+        page = pdf_document[index]
+        text = page.get_text("text")
+        ink, bounds = ink_layout(page)
+        label, reason, starts_exhibit = classify_page(index + 1, text, ink, bounds, in_exhibit)
+        if label == CAPTION:
+            in_exhibit = False
+        elif starts_exhibit:
+            in_exhibit = True
+        pages.append({
+            "page": index + 1,
+            "label": label,
+            "reason": reason,
+            "relevant": label in RELEVANT_LABELS,
+            "ink": round(ink, 4),
+            "text_chars": len(text.strip())
+        })
+    return pages
+
+def triage_pdf(pdf_file):
+    """Triage a PDF given as a file path or a file-like object"""
+    pdf_document = open_pdf(pdf_file)
+    try:
+        return triage_document(pdf_document)
+    finally:
+        pdf_document.close()
+
+def relevant_pages(pages):
+    """Page numbers to OCR, or None (every page) when there is no triage or it kept nothing"""
+    if not pages:
+        return None
+    kept = [page["page"] for page in pages if page["relevant"]]
+    return kept or None
+
+def skipped_pages(pages):
+    return [page for page in pages or [] if not page["relevant"]]
@@ -1,70 +1,102 @@
 # pdf_service.py
-import streamlit as st
-import boto3
-import fitz
+import os
+from checkpoint import default_checkpoint
+from clients import get_textract_client, textract_client_for
+from config import load_config
+from reporting import default_reporter
+from resilience import call_service
+from tracing import count, span
 
-def init_textract_client():
+def init_textract_client(config=None):
     """Initialize AWS Textract client"""
-    return boto3.client(
-        'textract',
-        aws_access_key_id=st.secrets["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=st.secrets["AWS_SECRET_ACCESS_KEY"],
-        region_name=st.secrets["AWS_DEFAULT_REGION"]
-    )
-
-def convert_pdf_to_images(pdf_file):
-    """Convert PDF file to list of images"""
-    pdf_document = fitz.open(stream=pdf_file.read(), filetype="pdf")
-    images = []
-    
-    for page_num in range(pdf_document.page_count):
-        page = pdf_document[page_num]
-        pix = page.get_pixmap()
-        img_bytes = pix.tobytes("png")
-        images.append(img_bytes)
-    
+    return get_textract_client(config if config is not None else load_config())
+
+def open_pdf(pdf_file):
+    """Open a PDF from a stored file path or a file-like object"""
+    import fitz  # Loaded on first use to keep app startup fast
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return fitz.open(pdf_file, filetype="pdf")
+    pdf_file.seek(0)
+    return fitz.open(stream=pdf_file.read(), filetype="pdf")
+
+def convert_pdf_to_images(pdf_file, page_numbers=None):
+    """Convert PDF file to list of images (only the 1-based page_numbers, if given)"""
+    with span("pdf.render") as render_span:
+        pdf_document = open_pdf(pdf_file)
+        images = []
+
+        for page_num in page_numbers or range(1, pdf_document.page_count + 1):
+            page = pdf_document[page_num - 1]
+            pix = page.get_pixmap()
+            img_bytes = pix.tobytes("png")
+            images.append(img_bytes)
+
+        render_span.set(pages=len(images), image_bytes=sum(len(image) for image in images))
+    count("pages_rendered", len(images))
     return images
 
-def extract_text_with_textract(pdf_file):
-    """Extract text from PDF using Amazon Textract"""
+def ocr_page(textract_client, img_bytes, page_number=None):
+    """Run Textract on a single page image and return its lines of text"""
+    with span("textract.detect_document_text", page=page_number, image_bytes=len(img_bytes)):
+        response = call_service("textract", lambda timeout: textract_client_for(textract_client, timeout)
+                                .detect_document_text(Document={'Bytes': img_bytes}))
+    count("textract_pages")
+    count("textract_image_bytes", len(img_bytes))
+
+    page_text = ""
+    for block in response['Blocks']:
+        if block['BlockType'] == 'LINE':
+            page_text += block['Text'] + "\n"
+    return page_text
+
+def page_section(page_num, page_text):
+    """One page of OCR text with the page marker the analysis prompts expect"""
+    return f"\n--- Page {page_num} ---\n{page_text}"
+
+def extract_text_from_images(images, config=None, reporter=None, textract_client=None, checkpoint=None,
+                             on_page=None, page_numbers=None):
+    """Extract text from already rendered page images using Amazon Textract
+
+    Each page is a checkpoint unit, so a resumed run only OCRs pages that
+    did not finish before. on_page(page_num, total_pages, page_text), if
+    given, is called as each page finishes so callers can show it early.
+    page_numbers are the document pages the images came from, when they
+    are not simply pages 1 to N.
+    """
+    reporter = default_reporter(reporter)
+    checkpoint = default_checkpoint(checkpoint)
     try:
-        textract_client = init_textract_client()
-        # Convert PDF to images first
-        images = convert_pdf_to_images(pdf_file)
-        
-        # Create a progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
+        textract_client = textract_client or init_textract_client(config)
+
         # Process each page with Textract
         full_text = ""
         total_pages = len(images)
-        
-        for page_num, img_bytes in enumerate(images, 1):
-            # Update progress bar and status
-            progress = page_num / total_pages
-            progress_bar.progress(progress)
-            status_text.text(f'Processing page {page_num} of {total_pages}')
-            
-            # Send to Textract
-            response = textract_client.detect_document_text(
-                Document={'Bytes': img_bytes}
+
+        for index, (page_num, img_bytes) in enumerate(zip(page_numbers or range(1, total_pages + 1), images), 1):
+            reporter.progress("ocr", index / total_pages, f'Processing page {index} of {total_pages}')
+            page_text = checkpoint.run(
+                f"page:{page_num}",
+                lambda: ocr_page(textract_client, img_bytes, page_num)
             )
-            
-            # Extract text from response
-            page_text = ""
-            for block in response['Blocks']:
-                if block['BlockType'] == 'LINE':
-                    page_text += block['Text'] + "\n"
-            
-            full_text += f"\n--- Page {page_num} ---\n{page_text}"
-        
-        # Clear the status text and show completion
-        status_text.text('Processing complete!')
-        progress_bar.progress(1.0)
-                
+            full_text += page_section(page_num, page_text)
+            if on_page:
+                on_page(page_num, total_pages, page_text)
+
+        reporter.progress("ocr", 1.0, 'Processing complete!')
+
         return full_text
-        
+
+    except Exception as e:
+        reporter.error(f"Error processing PDF: {str(e)}")
+        return None
+
+def extract_text_with_textract(pdf_file, config=None, reporter=None, textract_client=None, checkpoint=None,
+                               on_page=None, page_numbers=None):
+    """Extract text from PDF using Amazon Textract (only the 1-based page_numbers, if given)"""
+    try:
+        # Convert PDF to images first
+        images = convert_pdf_to_images(pdf_file, page_numbers)
     except Exception as e:
-        st.error(f"Error processing PDF: {str(e)}")
+        default_reporter(reporter).error(f"Error processing PDF: {str(e)}")
         return None
+    return extract_text_from_images(images, config, reporter, textract_client, checkpoint, on_page, page_numbers)
@@ -0,0 +1,371 @@
+# pipeline.py
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from address_service import extract_address
+from analysis_service import analyze_text_with_openai
+from blob_store import CHUNK_SIZE, file_digest
+from checkpoint import default_checkpoint
+from config import load_config
+from map_service import get_coordinates
+from page_triage import relevant_pages, triage_pdf
+from resilience import Deadline, deadline_scope, document_deadline
+from pdf_service import convert_pdf_to_images, extract_text_from_images, extract_text_with_textract
+from property_service import get_property_data
+from reporting import LoggingReporter, default_reporter
+from stage_executor import Stage, StagedExecutor
+from tracing import Tracer, process_tracer, remote_parent
+from zestimate_service import get_zestimate_data
+
+STAGES = ("triage", "ocr", "analysis", "address", "geocode", "enrichment")
+
+# Worker threads per stage for the pipelined executor. Rendering is CPU bound
+# and hands off to a process pool; the rest wait on network services.
+DEFAULT_STAGE_WORKERS = {
+    "render": os.cpu_count() or 1,
+    "ocr": 8,
+    "analysis": 4,
+    "address": 4,
+    "geocode": 4,
+    "enrichment": 4
+}
+
+class PipelineContext:
+    """Settings, callbacks, checkpoint store and tracer shared by every stage of one pipeline run
+
+    trace_attributes (document hash, case number, source) are attached to
+    every stage span, and through them to the service calls inside. The
+    document deadline (DOCUMENT_DEADLINE_SECONDS) starts when the first
+    stage does; service calls after it has passed fail fast.
+    """
+    def __init__(self, config=None, reporter=None, checkpoint=None, tracer=None, trace_attributes=None):
+        self.config = config if config is not None else load_config()
+        self.reporter = default_reporter(reporter)
+        self.checkpoint = default_checkpoint(checkpoint)
+        self.tracer = tracer or process_tracer()
+        self.trace_attributes = dict(trace_attributes or {})
+        self.deadline = None
+
+    @contextmanager
+    def stage(self, name):
+        """Span for one stage; service calls made inside report to this context's tracer and deadline"""
+        if self.deadline is None and document_deadline(self.config):
+            self.deadline = Deadline(document_deadline(self.config))
+        with self.tracer.activate(), deadline_scope(self.deadline), \
+                self.tracer.span(f"stage.{name}", **self.trace_attributes) as span:
+            yield span
+
+def triage_enabled(config):
+    """Whether pages are triaged before OCR; PAGE_TRIAGE=off sends every page"""
+    return str(config.get("PAGE_TRIAGE", "on")).lower() not in ("off", "false", "0", "no")
+
+def triage_document(context, pdf_source):
+    """Label every page (caption, legal description, exhibit, blank...); None when triage is off"""
+    if not triage_enabled(context.config):
+        return None
+    with context.stage("triage") as span:
+        pages = triage_pdf(pdf_source)
+        span.set(pages=len(pages), kept=sum(page["relevant"] for page in pages))
+    return pages
+
+def ocr_document(context, pdf_source, on_page=None, page_numbers=None):
+    """OCR a PDF (file path or file-like object) into page-delimited text
+
+    on_page(page_num, total_pages, page_text) is called as each page
+    finishes. page_numbers limits OCR to those pages (1-based).
+    """
+    with context.stage("ocr"):
+        return extract_text_with_textract(pdf_source, context.config, context.reporter,
+                                          checkpoint=context.checkpoint.scoped("ocr"), on_page=on_page,
+                                          page_numbers=page_numbers)
+
+def analyze_document(context, text):
+    """Summarize the foreclosure details in the OCR text"""
+    with context.stage("analysis"):
+        return analyze_text_with_openai(text, context.config, context.reporter,
+                                        checkpoint=context.checkpoint.scoped("analysis"))
+
+def locate_property(context, analysis):
+    """Extract the property address from the analysis, or None if it is missing"""
+    with context.stage("address"):
+        address_info = extract_address(analysis, context.config, context.reporter)
+    if address_info and address_info.get('street_address', 'NOT_FOUND') != 'NOT_FOUND':
+        return address_info
+    context.reporter.error("Could not extract valid address from the document.")
+    return None
+
+def geocode_property(context, address_info):
+    """Look up coordinates for an extracted address"""
+    with context.stage("geocode"):
+        return get_coordinates(
+            address_info['street_address'],
+            address_info['city'],
+            address_info['state'],
+            address_info['zip_code'],
+            context.config,
+            context.reporter
+        )
+
+def enrich_property(context, address_info):
+    """Fetch parcel and Zestimate data for an extracted address"""
+    address_args = (
+        address_info['street_address'],
+        address_info['city'],
+        address_info['state'],
+        address_info['zip_code']
+    )
+    with context.stage("enrichment"):
+        property_data = get_property_data(*address_args, context.config)
+        if isinstance(property_data, str):
+            # The Bridge service reports lookup failures as a message string
+            context.reporter.warning(property_data)
+            property_data = None
+        zestimate_data = get_zestimate_data(*address_args, context.config, context.reporter)
+    return {"property": property_data, "zestimate": zestimate_data}
+
+def document_hash(pdf_source):
+    """SHA-256 of a PDF given as a file path or a file-like object"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        return file_digest(pdf_source).hexdigest()
+    position = pdf_source.tell()
+    pdf_source.seek(0)
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: pdf_source.read(CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    pdf_source.seek(position)
+    return hasher.hexdigest()
+
+def new_result(source, case_number=None):
+    """Empty result record for one document"""
+    return {
+        "source": str(getattr(source, "name", source)),
+        "case_number": case_number,
+        "document_hash": None,
+        "pages": None,
+        "text": None,
+        "analysis": None,
+        "address": None,
+        "coordinates": None,
+        "property": None,
+        "zestimate": None,
+        "failed_stage": None,
+        "error": None
+    }
+
+def process_pdf_document(pdf_source, context=None, case_number=None, enrich=True):
+    """Run a document end to end: triage, OCR, analysis, address, geocode, enrichment
+
+    Returns a result record; failed_stage names the first stage that
+    produced nothing, and later stages are skipped. Each finished stage is
+    saved to the context's checkpoint, so a resumed run skips it.
+    """
+    context = context or PipelineContext()
+    checkpoint = context.checkpoint
+    result = new_result(pdf_source, case_number)
+    result["document_hash"] = document_hash(pdf_source)
+    context.trace_attributes.update(document=result["document_hash"][:12], source=result["source"])
+    if case_number:
+        context.trace_attributes["case_number"] = case_number
+
+    # Exhibits and blank pages stay listed in result["pages"] but are not OCR'd
+    result["pages"] = checkpoint.run("triage", lambda: triage_document(context, pdf_source))
+    result["text"] = checkpoint.run("ocr", lambda: ocr_document(context, pdf_source,
+                                                                page_numbers=relevant_pages(result["pages"])))
+    if not result["text"]:
+        result["failed_stage"] = "ocr"
+        return result
+
+    result["analysis"] = checkpoint.run("analysis", lambda: analyze_document(context, result["text"]))
+    if not result["analysis"]:
+        result["failed_stage"] = "analysis"
+        return result
+
+    result["address"] = checkpoint.run("address", lambda: locate_property(context, result["analysis"]))
+    if not result["address"]:
+        result["failed_stage"] = "address"
+        return result
+
+    result["coordinates"] = checkpoint.run("geocode", lambda: geocode_property(context, result["address"]))
+    if not result["coordinates"]:
+        result["failed_stage"] = "geocode"
+
+    if enrich:
+        result.update(checkpoint.run("enrichment", lambda: enrich_property(context, result["address"])))
+    return result
+
+def _process_in_worker(pdf_source, config, case_number, enrich):
+    """Process pool entry point; builds a logging context inside the worker
+
+    Returns the result and the worker's trace, which the parent merges.
+    """
+    label = case_number or os.path.basename(str(pdf_source))
+    tracer = Tracer()
+    context = PipelineContext(config, LoggingReporter(prefix=f"[{label}] "), tracer=tracer)
+    return process_pdf_document(pdf_source, context, case_number, enrich), tracer.export_state()
+
+def process_many(documents, config=None, workers=None, enrich=True, tracer=None):
+    """Process (pdf_path, case_number) pairs across worker processes
+
+    Yields result records as documents finish. Defaults to one worker per core.
+    Spans and counters from the workers are merged into tracer.
+    """
+    tracer = tracer or process_tracer()
+    config = config if config is not None else load_config()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_process_in_worker, pdf_path, config, case_number, enrich): (pdf_path, case_number)
+            for pdf_path, case_number in documents
+        }
+        for future in as_completed(futures):
+            pdf_path, case_number = futures[future]
+            try:
+                result, trace = future.result()
+                tracer.merge(trace)
+                yield result
+            except Exception as e:
+                result = new_result(pdf_path, case_number)
+                result["failed_stage"] = "worker"
+                result["error"] = str(e)
+                yield result
+
+class PipelineJob:
+    """One document moving through the pipelined executor"""
+    def __init__(self, pdf_source, context, case_number=None):
+        self.pdf_source = pdf_source
+        self.context = context
+        self.result = new_result(pdf_source, case_number)
+        self.images = None
+
+def _triage_and_render(pdf_source, triage, parent_span=None):
+    """Render pool task: triage the pages, then render only the ones to OCR
+
+    Runs in a worker process, so its spans and counters (pages_rendered)
+    are returned for the caller to merge, like process_many does.
+    """
+    tracer = Tracer()
+    with tracer.activate(), remote_parent(parent_span):
+        pages = triage_pdf(pdf_source) if triage else None
+        images = convert_pdf_to_images(pdf_source, relevant_pages(pages))
+    return pages, images, tracer.export_state()
+
+def _render_stage(render_pool):
+    def render(job):
+        source = job.pdf_source
+        if not isinstance(source, (str, os.PathLike)):
+            # File-like uploads are copied so they can be sent to a worker process
+            source = io.BytesIO(source.read())
+        with job.context.stage("render") as span:
+            job.result["document_hash"] = document_hash(source)
+            job.context.trace_attributes["document"] = job.result["document_hash"][:12]
+            span.set(document=job.context.trace_attributes["document"])
+            job.result["pages"], job.images, trace = render_pool.submit(
+                _triage_and_render, source, triage_enabled(job.context.config), span.to_dict()
+            ).result()
+            job.context.tracer.merge(trace)
+            span.set(pages=len(job.result["pages"] or job.images), rendered=len(job.images))
+        return job
+    return render
+
+def _ocr_stage(job):
+    with job.context.stage("ocr"):
+        job.result["text"] = extract_text_from_images(job.images, job.context.config, job.context.reporter,
+                                                      checkpoint=job.context.checkpoint.scoped("ocr"),
+                                                      page_numbers=relevant_pages(job.result["pages"]))
+    job.images = None
+    return job
+
+def _analysis_stage(job):
+    job.result["analysis"] = analyze_document(job.context, job.result["text"])
+    return job
+
+def _address_stage(job):
+    job.result["address"] = locate_property(job.context, job.result["analysis"])
+    return job
+
+def _geocode_stage(job):
+    job.result["coordinates"] = geocode_property(job.context, job.result["address"])
+    if not job.result["coordinates"]:
+        job.result["failed_stage"] = "geocode"
+    return job
+
+def _enrichment_stage(job):
+    job.result.update(enrich_property(job.context, job.result["address"]))
+    return job
+
+# Stage name, step, and the result field the step must fill for later stages to run
+PIPELINED_STEPS = (
+    ("ocr", _ocr_stage, "text"),
+    ("analysis", _analysis_stage, "analysis"),
+    ("address", _address_stage, "address"),
+    ("geocode", _geocode_stage, None),
+    ("enrichment", _enrichment_stage, None)
+)
+
+def _skip_failed(name, step, required_field):
+    """Wrap a step so documents that already failed pass straight through"""
+    def run(job):
+        # A geocode miss still leaves an address to enrich
+        if job.result["failed_stage"] not in (None, "geocode"):
+            return job
+        job = step(job)
+        if required_field and not job.result[required_field]:
+            job.result["failed_stage"] = name
+        return job
+    return run
+
+def _mark_failed(job, stage_name, error):
+    job.images = None
+    job.result["failed_stage"] = stage_name
+    job.result["error"] = str(error)
+    job.context.reporter.error(f"{stage_name} failed: {str(error)}")
+    return job
+
+def create_stage_executor(render_pool, enrich=True, workers=None, queue_size=4):
+    """Build a StagedExecutor running render -> ocr -> analysis -> address -> geocode -> enrichment"""
+    workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+    stages = [Stage("render", _render_stage(render_pool), workers["render"], queue_size)]
+    for name, step, required_field in PIPELINED_STEPS:
+        if name == "enrichment" and not enrich:
+            continue
+        stages.append(Stage(name, _skip_failed(name, step, required_field), workers[name], queue_size))
+    return StagedExecutor(stages, on_error=_mark_failed)
+
+def process_pipelined(documents, config=None, enrich=True, workers=None, queue_size=4,
+                      reporter_factory=None, on_executor=None, tracer=None):
+    """Process (pdf_source, case_number) pairs with overlapping stages
+
+    Document N+1 can be rendering while document N is in OCR and N-1 in
+    analysis. Yields result records as documents finish. on_executor, if
+    given, receives the StagedExecutor so callers can poll its snapshot().
+    """
+    config = config if config is not None else load_config()
+    reporter_factory = reporter_factory or (
+        lambda pdf_source, case_number: LoggingReporter(
+            prefix=f"[{case_number or os.path.basename(str(pdf_source))}] "
+        )
+    )
+
+    render_workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}["render"]
+    with ProcessPoolExecutor(max_workers=render_workers) as render_pool:
+        executor = create_stage_executor(render_pool, enrich, workers, queue_size)
+        if on_executor:
+            on_executor(executor)
+        jobs = (
+            PipelineJob(
+                pdf_source,
+                PipelineContext(
+                    config,
+                    reporter_factory(pdf_source, case_number),
+                    tracer=tracer,
+                    trace_attributes={"source": str(getattr(pdf_source, "name", pdf_source)),
+                                      **({"case_number": case_number} if case_number else {})}
+                ),
+                case_number
+            )
+            for pdf_source, case_number in documents
+        )
+        for job in executor.run(jobs):
+            yield job.result
@@ -0,0 +1,114 @@
+# portfolio.py
+"""Columnar analytics across every analyzed case.
+
+Cases are loaded from the results store into one DataFrame and the
+investment metrics are computed as whole-column operations, so ranking
+thousands of properties costs about the same as ranking a handful.
+"""
+import numpy as np
+import pandas as pd
+from utils import format_currency_columns
+
+# Columns shown in the dashboard, in display order
+PORTFOLIO_COLUMNS = [
+    "case_number", "plaintiff", "street_address", "zip_code", "filing_date",
+    "market_value", "total_debt", "equity_spread", "equity_pct", "ltv",
+    "lien_count", "junior_lien_share", "judgment_amount", "liens_total",
+    "assessed_value", "zestimate"
+]
+
+CURRENCY_COLUMNS = [
+    "market_value", "total_debt", "equity_spread", "judgment_amount",
+    "liens_total", "assessed_value", "zestimate"
+]
+PERCENT_COLUMNS = ["equity_pct", "ltv", "junior_lien_share"]
+
+NUMERIC_COLUMNS = [
+    "judgment_amount", "claims_total", "liens_total", "lien_count",
+    "assessed_value", "zestimate", "latitude", "longitude"
+]
+
+def load_cases(store):
+    """DataFrame of every stored case's summary columns"""
+    columns, rows = store.summaries()
+    frame = pd.DataFrame.from_records(rows, columns=list(columns))
+    frame[NUMERIC_COLUMNS] = frame[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    frame["filing_date"] = pd.to_datetime(frame["filing_date"], errors="coerce")
+    return frame
+
+def compute_metrics(frame):
+    """Add market value, debt, equity spread, LTV and lien stacking columns
+
+    market_value: Zestimate where known, otherwise the county assessed value
+    total_debt: the judgment (or total claims) plus any recorded liens
+    equity_spread: market_value - total_debt
+    ltv: total_debt / market_value
+    junior_lien_share: portion of the debt behind the foreclosing claim
+    """
+    frame = frame.copy()
+    market_value = frame["zestimate"].where(frame["zestimate"] > 0, frame["assessed_value"])
+    market_value = market_value.where(market_value > 0)
+    senior_debt = frame["judgment_amount"].fillna(frame["claims_total"])
+    liens = frame["liens_total"].fillna(0)
+    total_debt = senior_debt.fillna(0) + liens
+    total_debt = total_debt.where(senior_debt.notna() | frame["liens_total"].notna())
+
+    frame["market_value"] = market_value
+    frame["total_debt"] = total_debt
+    frame["equity_spread"] = market_value - total_debt
+    frame["equity_pct"] = frame["equity_spread"] / market_value
+    frame["ltv"] = total_debt / market_value
+    frame["junior_lien_share"] = (liens / total_debt.where(total_debt > 0)).fillna(0)
+    frame["lien_count"] = frame["lien_count"].fillna(0).astype(int)
+    frame["underwater"] = frame["ltv"] > 1
+    return frame
+
+def filter_cases(frame, min_equity=None, max_ltv=None, max_liens=None, zip_codes=None,
+                 plaintiff=None, filed_after=None, valued_only=False):
+    """Rows matching every given filter, combined as one boolean mask"""
+    mask = pd.Series(True, index=frame.index)
+    if min_equity is not None:
+        mask &= frame["equity_spread"] >= min_equity
+    if max_ltv is not None:
+        mask &= frame["ltv"] <= max_ltv
+    if max_liens is not None:
+        mask &= frame["lien_count"] <= max_liens
+    if zip_codes:
+        mask &= frame["zip_code"].isin(zip_codes)
+    if plaintiff:
+        mask &= frame["plaintiff"].str.contains(plaintiff, case=False, regex=False, na=False)
+    if filed_after is not None:
+        mask &= frame["filing_date"] >= pd.Timestamp(filed_after)
+    if valued_only:
+        mask &= frame["market_value"].notna()
+    return frame[mask]
+
+def sort_cases(frame, sort_by="equity_spread", ascending=False):
+    """Sort with missing values last regardless of direction"""
+    return frame.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+
+def page_of(frame, page=1, page_size=50):
+    """One page of rows, plus the total page count"""
+    page_count = max(1, -(-len(frame) // page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size], page_count
+
+def format_page(page):
+    """Display strings for the visible rows only"""
+    page = page[PORTFOLIO_COLUMNS].copy()
+    page = format_currency_columns(page, CURRENCY_COLUMNS)
+    for column in PERCENT_COLUMNS:
+        page[column] = page[column].map("{:.0%}".format, na_action="ignore")
+    page["filing_date"] = page["filing_date"].dt.strftime("%Y-%m-%d")
+    return page.fillna("")
+
+def summarize(frame):
+    """Headline totals for a set of cases"""
+    return {
+        "cases": len(frame),
+        "valued": int(frame["market_value"].notna().sum()),
+        "total_equity": float(np.nansum(frame["equity_spread"].clip(lower=0))),
+        "median_ltv": float(frame["ltv"].median()) if frame["ltv"].notna().any() else None,
+        "underwater": int(frame["underwater"].sum())
+    }
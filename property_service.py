@@ -1,29 +1,32 @@
 # property_service.py
-import requests
-import streamlit as st
+from config import get_endpoint, get_setting, load_config
+from resilience import ServiceUnavailable, call_service, get_json
+from tracing import span
 
-def get_property_data(address, city, state, zip_code):
+def get_property_data(address, city, state, zip_code, config=None):
     """Get property data from Bridge Data Output API"""
+    import requests
+    config = config if config is not None else load_config()
     try:
+        api_key = get_setting(config, 'BRIDGE_API_KEY')
         # Base URL for Bridge API
-        base_url = "https://api.bridgedataoutput.com/api/v2/pub"
+        base_url = f"{get_endpoint(config, 'BRIDGE_API_URL')}/pub"
         headers = {
-            'Authorization': f"Bearer {st.secrets['BRIDGE_API_KEY']}",
+            'Authorization': f"Bearer {api_key}",
             'Accept': 'application/json'
         }
         
         # First, search for the parcel using address
         parcels_url = f"{base_url}/parcels"
         params = {
-            'access_token': st.secrets['BRIDGE_API_KEY'],
+            'access_token': api_key,
             'limit': 1,
             'address.full': f"{address}, {city}, {state} {zip_code}"
         }
         
-        response = requests.get(parcels_url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        with span("bridge.parcels"):
+            data = call_service("bridge", lambda timeout: get_json(parcels_url, params, timeout=timeout),
+                                cache_key=("parcels", params['address.full']))
         if not data.get('bundle', []):
             return "Property not found in database"
             
@@ -33,28 +36,32 @@ def get_property_data(address, city, state, zip_code):
         # Get assessment history
         assessments_url = f"{base_url}/parcels/{parcel_id}/assessments"
         params = {
-            'access_token': st.secrets['BRIDGE_API_KEY'],
+            'access_token': api_key,
             'limit': 5,  # Get last 5 assessments
             'sortBy': 'tax_year',
             'order': 'desc'
         }
         
-        assessment_response = requests.get(assessments_url, params=params)
-        assessment_response.raise_for_status()
-        assessment_data = assessment_response.json()
+        with span("bridge.assessments"):
+            assessment_data = call_service(
+                "bridge", lambda timeout: get_json(assessments_url, params, timeout=timeout),
+                cache_key=("assessments", parcel_id)
+            )
         
         # Get transaction history
         transactions_url = f"{base_url}/parcels/{parcel_id}/transactions"
         params = {
-            'access_token': st.secrets['BRIDGE_API_KEY'],
+            'access_token': api_key,
             'limit': 5,  # Get last 5 transactions
             'sortBy': 'recording_date',
             'order': 'desc'
         }
         
-        transaction_response = requests.get(transactions_url, params=params)
-        transaction_response.raise_for_status()
-        transaction_data = transaction_response.json()
+        with span("bridge.transactions"):
+            transaction_data = call_service(
+                "bridge", lambda timeout: get_json(transactions_url, params, timeout=timeout),
+                cache_key=("transactions", parcel_id)
+            )
         
         # Format the response
         property_info = {
@@ -88,5 +95,5 @@ def get_property_data(address, city, state, zip_code):
         
         return property_info
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ServiceUnavailable, KeyError) as e:  # KeyError: missing setting
         return f"Error fetching property data: {str(e)}"
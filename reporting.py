@@ -0,0 +1,115 @@
+# reporting.py
+import logging
+from contextlib import contextmanager
+
+class Reporter:
+    """Progress and logging callbacks used by the services and scrapers
+
+    The method names mirror the subset of the Streamlit API the scrapers
+    already call (write, error, expander, code), so a reporter can be passed
+    wherever a streamlit instance used to be.
+    """
+    def write(self, *args):
+        pass
+
+    def info(self, message):
+        pass
+
+    def warning(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+    def markdown(self, text):
+        pass
+
+    def code(self, text):
+        pass
+
+    @contextmanager
+    def expander(self, label):
+        yield self
+
+    def progress(self, stage, fraction, message=None):
+        """Report that a stage is some fraction (0-1) of the way through"""
+        pass
+
+    def clear_progress(self, stage):
+        """Remove any progress display for a finished stage"""
+        pass
+
+class LoggingReporter(Reporter):
+    """Reporter for batch and CLI runs that writes to the logging module"""
+    def __init__(self, name="pipeline", prefix=""):
+        self.name = name
+        self.prefix = prefix
+
+    @property
+    def logger(self):
+        return logging.getLogger(self.name)
+
+    def write(self, *args):
+        self.logger.debug(self.prefix + " ".join(str(arg) for arg in args))
+
+    def info(self, message):
+        self.logger.info(self.prefix + str(message))
+
+    def warning(self, message):
+        self.logger.warning(self.prefix + str(message))
+
+    def error(self, message):
+        self.logger.error(self.prefix + str(message))
+
+    def progress(self, stage, fraction, message=None):
+        if message:
+            self.logger.debug(f"{self.prefix}[{stage}] {fraction:.0%} {message}")
+
+class StreamlitReporter(Reporter):
+    """Reporter that renders to the running Streamlit app"""
+    def __init__(self, st=None):
+        if st is None:
+            import streamlit as st
+        self.st = st
+        self._progress = {}
+
+    def write(self, *args):
+        self.st.write(*args)
+
+    def info(self, message):
+        self.st.info(message)
+
+    def warning(self, message):
+        self.st.warning(message)
+
+    def error(self, message):
+        self.st.error(message)
+
+    def markdown(self, text):
+        self.st.markdown(text)
+
+    def code(self, text):
+        self.st.code(text)
+
+    @contextmanager
+    def expander(self, label):
+        with self.st.expander(label):
+            yield self
+
+    def progress(self, stage, fraction, message=None):
+        if stage not in self._progress:
+            self._progress[stage] = (self.st.progress(0), self.st.empty())
+        progress_bar, status_text = self._progress[stage]
+        progress_bar.progress(min(max(fraction, 0.0), 1.0))
+        if message:
+            status_text.text(message)
+
+    def clear_progress(self, stage):
+        if stage in self._progress:
+            progress_bar, status_text = self._progress.pop(stage)
+            progress_bar.empty()
+            status_text.empty()
+
+def default_reporter(reporter=None):
+    """Return the given reporter, or a logging reporter when none is supplied"""
+    return reporter if reporter is not None else LoggingReporter()
@@ -0,0 +1,375 @@
+# resilience.py
+"""Timeouts, deadlines, hedged requests and circuit breakers for external services.
+
+Every external call goes through call_service(), which
+
+- gives the attempt a timeout: the service's policy timeout, cut down to
+  what is left of the current deadline (see deadline_scope; the pipeline
+  sets one per document), and refuses to start once the deadline passed;
+- retries errors the caller marks as transient (retryable), with backoff,
+  as long as the deadline leaves room for another attempt;
+- for idempotent reads (Google geocoding, Bridge GETs), sends a duplicate
+  request each time the last one sent has been slower than the service's
+  recent p95 (up to the policy's number of hedges) and takes whichever
+  answers first;
+- counts consecutive server, connection and full-length timeout failures
+  per service (not client errors or deadline-shortened attempts) and, past
+  a threshold, opens a circuit breaker so further calls fail at once
+  instead of waiting on a dependency that is down, letting one probe
+  through after a cool-down;
+- falls back to the last good response for the same request (cache_key)
+  or to an offline fallback when the call can't be made or fails.
+
+    data = call_service("google", lambda timeout: get_json(url, params, timeout),
+                        cache_key=("geocode", address))
+"""
+import contextvars
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from tracing import count, set_attributes
+
+DEFAULT_DOCUMENT_DEADLINE = 0
+
+class ServiceUnavailable(Exception):
+    """A call was not made or did not finish in time; callers may fall back"""
+
+class CircuitOpenError(ServiceUnavailable):
+    pass
+
+class DeadlineExceeded(ServiceUnavailable):
+    pass
+
+@dataclass
+class ServicePolicy:
+    """How calls to one service are bounded"""
+    timeout: float                 # Seconds per attempt
+    hedges: int = 0                # Duplicate requests allowed; only for idempotent reads
+    hedge_after: float = 1.0       # Hedge delay until enough latencies are seen to use their p95
+    min_hedge_after: float = 0.05
+    failure_threshold: int = 5     # Consecutive failures that open the breaker
+    reset_timeout: float = 30      # Seconds the breaker stays open before a probe
+    retries: int = 0               # Extra attempts after a retryable error
+    retry_backoff: float = 0.5     # Seconds before the first retry; doubles each time
+
+SERVICE_POLICIES = {
+    "textract": ServicePolicy(timeout=30),
+    "openai": ServicePolicy(timeout=120, failure_threshold=3, reset_timeout=60, retries=2),
+    "google": ServicePolicy(timeout=5, hedges=2, hedge_after=0.5),
+    "bridge": ServicePolicy(timeout=10, hedges=2, hedge_after=1.0),
+}
+
+_current_deadline = contextvars.ContextVar("deadline", default=None)
+
+class Deadline:
+    """A point in time by which some work has to be done"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make deadline (a Deadline, or None for no limit) apply to calls in this context"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+def current_deadline():
+    return _current_deadline.get()
+
+def document_deadline(config):
+    """Seconds a document may spend in the pipeline, from DOCUMENT_DEADLINE_SECONDS; None for no limit"""
+    seconds = float(config.get("DOCUMENT_DEADLINE_SECONDS", DEFAULT_DOCUMENT_DEADLINE))
+    return seconds if seconds > 0 else None
+
+def attempt_timeout(policy):
+    """Timeout for one attempt under the current deadline"""
+    deadline = current_deadline()
+    if deadline is None:
+        return policy.timeout
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"document deadline of {deadline.seconds:g}s passed")
+    return min(policy.timeout, remaining)
+
+class CircuitBreaker:
+    """Closed until failure_threshold failures in a row, then open for reset_timeout
+
+    After the cool-down one call is let through (half open); its outcome
+    closes the breaker or opens it again.
+    """
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """End a call that says nothing about the service's health (a client error, a spent deadline)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    count("circuit_opened", service=self.name)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {"service": self.name, "state": self.state, "failures": self.failures}
+
+class LatencyWindow:
+    """Recent successful attempt latencies for one service"""
+    def __init__(self, size=200):
+        self._latencies = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, p, min_samples=20):
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+class LastGoodResponses:
+    """Most recent successful response per cache key, for stale-but-useful fallbacks"""
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._responses:
+                self._responses.move_to_end(key)
+                return True, self._responses[key]
+        return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._responses[key] = value
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_entries:
+                self._responses.popitem(last=False)
+
+_breakers = {}
+_latencies = {}
+_last_good = LastGoodResponses()
+_registry_lock = threading.Lock()
+_hedge_pool = None
+
+def policy_for(service):
+    return SERVICE_POLICIES.get(service) or ServicePolicy(timeout=30)
+
+def breaker_for(service):
+    with _registry_lock:
+        if service not in _breakers:
+            policy = policy_for(service)
+            _breakers[service] = CircuitBreaker(service, policy.failure_threshold, policy.reset_timeout)
+        return _breakers[service]
+
+def latencies_for(service):
+    with _registry_lock:
+        return _latencies.setdefault(service, LatencyWindow())
+
+def breaker_states():
+    """Snapshot of every service's circuit breaker"""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
+
+def reset_breakers():
+    with _registry_lock:
+        _breakers.clear()
+        _latencies.clear()
+
+def hedge_pool():
+    global _hedge_pool
+    with _registry_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        return _hedge_pool
+
+def status_code(error):
+    """HTTP status behind a failed call (requests, openai or botocore errors), or None"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        if status is None and isinstance(response, dict):
+            status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return status
+
+def is_timeout(error):
+    return isinstance(error, TimeoutError) or any("Timeout" in cls.__name__ for cls in type(error).__mro__)
+
+def is_service_failure(error, shortened=False):
+    """Whether a failed call says the service itself is unhealthy
+
+    Server errors (5xx, 408, 429), connection failures and timeouts of a
+    full-length attempt count; client errors (other 4xx), a spent deadline
+    and timeouts of attempts the deadline cut short do not, so one document
+    over budget can't open the breaker for everyone.
+    """
+    if isinstance(error, ServiceUnavailable):
+        return False
+    status = status_code(error)
+    if status is not None:
+        return status >= 500 or status in (408, 429)
+    if is_timeout(error):
+        return not shortened
+    return isinstance(error, OSError) or any("Connection" in cls.__name__ for cls in type(error).__mro__)
+
+def _timed(request, timeout):
+    start = time.monotonic()
+    value = request(timeout)
+    return value, time.monotonic() - start
+
+def _hedged(service, policy, request, timeout):
+    """Send request, and a duplicate whenever none has answered within the service's p95"""
+    hedge_after = latencies_for(service).percentile(95) or policy.hedge_after
+    hedge_after = max(policy.min_hedge_after, hedge_after)
+    pool = hedge_pool()
+    started = time.monotonic()
+    first = pool.submit(_timed, request, timeout)
+    pending = {first}
+    attempts = 1
+    error = None
+    while pending:
+        elapsed = time.monotonic() - started
+        # A hedge needs longer than min_hedge_after left to be worth sending
+        can_hedge = attempts <= policy.hedges and timeout - (elapsed + hedge_after) > policy.min_hedge_after
+        done, pending = wait(pending, timeout=hedge_after if can_hedge else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is not first:
+                    count("hedge_wins", service=service)
+                return future.result()
+            error = future.exception()
+        remaining = timeout - (time.monotonic() - started)
+        if not done and can_hedge and remaining > policy.min_hedge_after:
+            count("hedged_requests", service=service)
+            pending.add(pool.submit(_timed, request, remaining))
+            attempts += 1
+    raise error
+
+def _retrying(service, policy, request, attempt_state, retryable):
+    """One call, retried up to policy.retries times on errors retryable(error) accepts
+
+    A retry is only made if the deadline outlasts its backoff; otherwise
+    the last error is raised. attempt_state["timeout"] holds the timeout
+    of the latest attempt.
+    """
+    attempt = 0
+    while True:
+        timeout = attempt_state["timeout"]
+        try:
+            if policy.hedges:
+                return _hedged(service, policy, request, timeout)
+            return _timed(request, timeout)
+        except Exception as e:
+            if attempt >= policy.retries or retryable is None or not retryable(e):
+                raise
+            delay = policy.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            deadline = current_deadline()
+            if deadline is not None and deadline.remaining() <= delay:
+                raise
+            count("retries", service=service)
+            time.sleep(delay)
+            attempt += 1
+            attempt_state["timeout"] = attempt_timeout(policy)
+
+def call_service(service, request, cache_key=None, fallback=None, retryable=None):
+    """Call request(timeout) under the service's policy
+
+    Returns its result; on failure, the last good result for cache_key,
+    else fallback() if given, else raises (ServiceUnavailable when the
+    breaker is open or the deadline passed). retryable(error) says which
+    errors are transient and worth the policy's retries.
+    """
+    policy = policy_for(service)
+    breaker = breaker_for(service)
+    try:
+        timeout = attempt_timeout(policy)
+        if not breaker.allow():
+            count("circuit_rejections", service=service)
+            raise CircuitOpenError(f"{service} circuit is open after repeated failures")
+        attempt_state = {"timeout": timeout}
+        try:
+            value, elapsed = _retrying(service, policy, request, attempt_state, retryable)
+        except Exception as e:
+            if is_service_failure(e, shortened=attempt_state["timeout"] < policy.timeout):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            raise
+        breaker.record_success()
+        latencies_for(service).add(elapsed)
+    except Exception as e:
+        if isinstance(e, DeadlineExceeded):
+            count("deadline_exceeded", service=service)
+        if cache_key is not None:
+            found, value = _last_good.get((service, cache_key))
+            if found:
+                count("fallbacks", service=service, kind="last_good")
+                set_attributes(fallback="last_good")
+                return value
+        if fallback is not None:
+            count("fallbacks", service=service, kind="offline")
+            set_attributes(fallback="offline")
+            return fallback()
+        raise
+
+    if cache_key is not None:
+        _last_good.put((service, cache_key), value)
+    return value
+
+def get_json(url, params=None, headers=None, timeout=None):
+    """GET a JSON document, treating HTTP errors as failures"""
+    import requests
+    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,62 @@
+# result_cache.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class ResultCache:
+    """Thread-safe LRU cache of expensive results with single-flight computation
+
+    Concurrent callers asking for the same key share one computation: the
+    first caller runs it and the rest wait for its result. None results
+    (a stage that reported failure) are handed to the waiting callers but
+    not cached, so the next request tries again.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        return None
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if value is not None:
+                self._results[key] = value
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, document_hash):
+        """Drop every cached stage result for one document"""
+        with self._lock:
+            for key in [key for key in self._results if key[1] == document_hash]:
+                del self._results[key]
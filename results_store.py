@@ -0,0 +1,247 @@
+# results_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from analysis_service import extract_case_fields
+
+DEFAULT_DB_PATH = os.environ.get("RESULTS_DB_PATH", "results.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    document_hash TEXT UNIQUE,
+    case_number TEXT,
+    source TEXT,
+    plaintiff TEXT,
+    defendant TEXT,
+    judgment_amount REAL,
+    claims_total REAL,
+    liens_total REAL,
+    lien_count INTEGER,
+    filing_date TEXT,
+    street_address TEXT,
+    city TEXT,
+    state TEXT,
+    zip_code TEXT,
+    latitude REAL,
+    longitude REAL,
+    formatted_address TEXT,
+    assessed_value REAL,
+    zestimate REAL,
+    ocr_text TEXT,
+    analysis TEXT,
+    result_json TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_plaintiff ON cases (plaintiff COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS cases_amount ON cases (judgment_amount);
+CREATE INDEX IF NOT EXISTS cases_filing_date ON cases (filing_date);
+CREATE INDEX IF NOT EXISTS cases_zip_amount ON cases (zip_code, judgment_amount);
+CREATE INDEX IF NOT EXISTS cases_case_number ON cases (case_number);
+CREATE INDEX IF NOT EXISTS cases_updated_at ON cases (updated_at, id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+    ocr_text, analysis, plaintiff, defendant,
+    content='cases', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+    INSERT INTO cases_fts (rowid, ocr_text, analysis, plaintiff, defendant)
+    VALUES (new.id, new.ocr_text, new.analysis, new.plaintiff, new.defendant);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+    INSERT INTO cases_fts (cases_fts, rowid, ocr_text, analysis, plaintiff, defendant)
+    VALUES ('delete', old.id, old.ocr_text, old.analysis, old.plaintiff, old.defendant);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE ON cases BEGIN
+    INSERT INTO cases_fts (cases_fts, rowid, ocr_text, analysis, plaintiff, defendant)
+    VALUES ('delete', old.id, old.ocr_text, old.analysis, old.plaintiff, old.defendant);
+    INSERT INTO cases_fts (rowid, ocr_text, analysis, plaintiff, defendant)
+    VALUES (new.id, new.ocr_text, new.analysis, new.plaintiff, new.defendant);
+END;
+"""
+
+# Columns returned by search; the large text columns are left out
+SUMMARY_COLUMNS = (
+    "id", "case_number", "plaintiff", "defendant", "judgment_amount", "claims_total",
+    "liens_total", "lien_count", "filing_date", "street_address", "city", "state",
+    "zip_code", "latitude", "longitude", "formatted_address", "assessed_value", "zestimate"
+)
+
+# Every column except the raw result JSON
+CASE_COLUMNS = SUMMARY_COLUMNS + ("document_hash", "source", "ocr_text", "analysis", "created_at", "updated_at")
+
+def to_number(value):
+    """Numeric value of a field that may be a formatted string or 'N/A'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace('$', '').replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+def case_row(result, document_hash=None):
+    """Flatten a pipeline result record into a cases row"""
+    fields = extract_case_fields(result.get("analysis"))
+    address = result.get("address") or {}
+    coordinates = result.get("coordinates") or {}
+    parcel = (result.get("property") or {}).get("Parcel Information", {})
+    zestimate = (result.get("zestimate") or {}).get("values", {})
+    return {
+        "document_hash": document_hash or result.get("document_hash"),
+        "case_number": result.get("case_number"),
+        "source": result.get("source"),
+        **fields,
+        "street_address": address.get("street_address"),
+        "city": address.get("city"),
+        "state": address.get("state"),
+        "zip_code": address.get("zip_code"),
+        "latitude": coordinates.get("lat"),
+        "longitude": coordinates.get("lng"),
+        "formatted_address": coordinates.get("formatted_address"),
+        "assessed_value": to_number(parcel.get("Total Value")),
+        "zestimate": to_number(zestimate.get("Current Zestimate")),
+        "ocr_text": result.get("text"),
+        "analysis": result.get("analysis"),
+        "result_json": json.dumps(result, default=str)
+    }
+
+class ResultsStore:
+    """Local SQLite database of analyzed cases with full-text search"""
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # One connection is shared by every Streamlit session in the process
+        self._lock = threading.Lock()
+
+    def save_result(self, result, document_hash=None):
+        """Insert or update the case for a pipeline result; returns its id"""
+        with self._lock, self.conn:
+            return self._upsert(case_row(result, document_hash), time.time())
+
+    def save_results(self, results):
+        """Save many pipeline results in a single transaction; returns their ids"""
+        rows = [case_row(result) for result in results]
+        now = time.time()
+        with self._lock, self.conn:
+            return [self._upsert(row, now) for row in rows]
+
+    def _upsert(self, row, now):
+        columns = list(row)
+        if row["document_hash"]:
+            existing = self.conn.execute(
+                "SELECT id FROM cases WHERE document_hash = ?", (row["document_hash"],)
+            ).fetchone()
+            if existing:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                self.conn.execute(
+                    f"UPDATE cases SET {assignments}, updated_at = ? WHERE id = ?",
+                    [row[column] for column in columns] + [now, existing["id"]]
+                )
+                return existing["id"]
+        cursor = self.conn.execute(
+            f"INSERT INTO cases ({', '.join(columns)}, created_at, updated_at) "
+            f"VALUES ({', '.join('?' for _ in columns)}, ?, ?)",
+            [row[column] for column in columns] + [now, now]
+        )
+        return cursor.lastrowid
+
+    def get(self, case_id):
+        """Full row for one case, including OCR text and analysis"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM cases WHERE id = ?", (case_id,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+
+    def last_updated(self):
+        """Latest updated_at of any case (None when empty); changes whenever a case is added or updated"""
+        with self._lock:
+            return self.conn.execute("SELECT MAX(updated_at) FROM cases").fetchone()[0]
+
+    def summaries(self):
+        """(columns, rows) of every stored case, without the large text columns"""
+        columns = ", ".join(SUMMARY_COLUMNS)
+        with self._lock:
+            rows = self.conn.execute(f"SELECT {columns} FROM cases").fetchall()
+        return SUMMARY_COLUMNS, [tuple(row) for row in rows]
+
+    def iter_cases(self, after=None, batch_size=1000):
+        """Yield full case rows (minus result_json) in (updated_at, id) order
+
+        after is an (updated_at, id) pair; only cases changed since then are
+        returned. Rows are read in keyset-paginated batches, so memory stays
+        flat and the lock is only held while a batch is fetched.
+        """
+        updated_at, case_id = after or (-1, -1)
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT {', '.join(CASE_COLUMNS)} FROM cases WHERE (updated_at, id) > (?, ?) "
+                    "ORDER BY updated_at, id LIMIT ?",
+                    (updated_at, case_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            updated_at, case_id = rows[-1]["updated_at"], rows[-1]["id"]
+
+    def search(self, text=None, plaintiff=None, min_amount=None, max_amount=None, zip_code=None,
+               filed_after=None, filed_before=None, order_by="filing_date", limit=50, offset=0):
+        """Find cases by full-text query and/or structured filters
+
+        text uses FTS5 query syntax over OCR text, analysis and party names.
+        plaintiff is a case-insensitive prefix. Dates are YYYY-MM-DD.
+        """
+        columns = ", ".join(f"cases.{column}" for column in SUMMARY_COLUMNS)
+        conditions = []
+        params = []
+
+        if text:
+            sql = (f"SELECT {columns}, snippet(cases_fts, -1, '[', ']', '…', 12) AS snippet "
+                   "FROM cases_fts JOIN cases ON cases.id = cases_fts.rowid")
+            conditions.append("cases_fts MATCH ?")
+            params.append(text)
+        else:
+            sql = f"SELECT {columns}, NULL AS snippet FROM cases"
+
+        if plaintiff:
+            # Prefix range so the NOCASE plaintiff index can be used
+            conditions.append("cases.plaintiff >= ? COLLATE NOCASE AND cases.plaintiff < ? COLLATE NOCASE")
+            params.extend([plaintiff, plaintiff + "\uffff"])
+        if min_amount is not None:
+            conditions.append("cases.judgment_amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("cases.judgment_amount <= ?")
+            params.append(max_amount)
+        if zip_code:
+            conditions.append("cases.zip_code = ?")
+            params.append(zip_code)
+        if filed_after:
+            conditions.append("cases.filing_date >= ?")
+            params.append(filed_after)
+        if filed_before:
+            conditions.append("cases.filing_date <= ?")
+            params.append(filed_before)
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        if text and order_by == "rank":
+            sql += " ORDER BY cases_fts.rank"
+        elif order_by in SUMMARY_COLUMNS:
+            sql += f" ORDER BY cases.{order_by} DESC"
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
@@ -0,0 +1,152 @@
+# stage_executor.py
+import logging
+import queue
+import threading
+import time
+
+_DONE = object()
+
+class Stage:
+    """One pipeline stage: a function applied to each item by its own worker pool"""
+    def __init__(self, name, fn, workers=1, queue_size=8):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+
+class StageStats:
+    """Counters for one stage, updated by its workers"""
+    def __init__(self, stage, input_queue):
+        self.stage = stage
+        self.input_queue = input_queue
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def snapshot(self, elapsed):
+        with self.lock:
+            capacity = self.stage.workers * elapsed
+            return {
+                "stage": self.stage.name,
+                "workers": self.stage.workers,
+                "active": self.active,
+                "queue_depth": self.input_queue.qsize(),
+                "queue_capacity": self.stage.queue_size,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "utilization": round(self.busy_seconds / capacity, 3) if capacity else 0.0
+            }
+
+class StagedExecutor:
+    """Runs items through a chain of stages with bounded queues between them
+
+    Each stage has its own worker threads, so while one document is in a
+    slow stage the next can already be in an earlier one. The bounded
+    queues apply backpressure so a fast stage cannot run far ahead of a
+    slow one. on_error(item, stage_name, exception) turns a failure into
+    the item passed downstream; by default failed items are dropped, as
+    are items whose on_error raises.
+    """
+    def __init__(self, stages, on_error=None):
+        self.stages = stages
+        self.on_error = on_error
+        self.queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self.output = queue.Queue()
+        self.stats = [StageStats(stage, q) for stage, q in zip(stages, self.queues)]
+        self.started_at = None
+
+    def snapshot(self):
+        """Per-stage queue depth, throughput and utilization so far"""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return [stats.snapshot(elapsed) for stats in self.stats]
+
+    def bottleneck(self):
+        """Name of the stage with the highest utilization"""
+        snapshot = self.snapshot()
+        return max(snapshot, key=lambda s: s["utilization"])["stage"] if snapshot else None
+
+    def _handle_error(self, item, stage_name, error):
+        """on_error's replacement for a failed item; None (dropped) if on_error raises too"""
+        if not self.on_error:
+            return None
+        try:
+            return self.on_error(item, stage_name, error)
+        except Exception:
+            # A worker that died here would never close the next stage, and run() would hang
+            logging.getLogger("stage_executor").exception(f"on_error failed for an item in stage {stage_name}")
+            return None
+
+    def _worker(self, index, remaining):
+        stage = self.stages[index]
+        stats = self.stats[index]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.stages) else self.output
+
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+
+            with stats.lock:
+                stats.active += 1
+            start = time.perf_counter()
+            failed = False
+            try:
+                item = stage.fn(item)
+            except Exception as e:
+                failed = True
+                item = self._handle_error(item, stage.name, e)
+            finally:
+                with stats.lock:
+                    stats.active -= 1
+                    stats.busy_seconds += time.perf_counter() - start
+                    stats.processed += 1
+                    stats.failed += failed
+
+            if item is not None:
+                outbox.put(item)
+
+        # The last worker of a stage to finish closes the next stage
+        with remaining[index][1]:
+            remaining[index][0] -= 1
+            last = remaining[index][0] == 0
+        if last:
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(_DONE)
+            else:
+                outbox.put(_DONE)
+
+    def _feed(self, items):
+        try:
+            for item in items:
+                self.queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_DONE)
+
+    def run(self, items):
+        """Process items through every stage, yielding results as they finish"""
+        self.started_at = time.perf_counter()
+        remaining = [[stage.workers, threading.Lock()] for stage in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(items,), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=self._worker, args=(index, remaining), daemon=True,
+                                 name=f"{stage.name}-{n}")
+                for n in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        while True:
+            item = self.output.get()
+            if item is _DONE:
+                break
+            yield item
+
+        for thread in threads:
+            thread.join()
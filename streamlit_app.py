@@ -1,14 +1,22 @@
 # streamlit_app.py
 import streamlit as st
+import io
 import json
 from datetime import datetime, timedelta
 
-# Import core services
-from pdf_service import extract_text_with_textract
-from address_service import extract_address
-from analysis_service import analyze_text_with_openai
-from map_service import get_coordinates, display_map
-from ui_components import setup_page, show_app_description
+# Import core pipeline
+from pipeline import (PipelineContext, triage_document, ocr_document, analyze_document, locate_property,
+                      geocode_property, process_pipelined, document_hash)
+from page_triage import relevant_pages, skipped_pages
+from reporting import LoggingReporter, StreamlitReporter
+from result_cache import ResultCache
+from ocr_jobs import JobReporter, OcrJobs
+from results_store import ResultsStore
+from export_service import ParquetExporter
+from config import load_config
+from resilience import breaker_states
+from tracing import JsonlSpanExporter, Tracer, process_tracer, serve_metrics
+from ui_components import setup_page, show_app_description, display_map
 # from court_scraper_headless import CourtScraperHeadless
 
 # Optional Zillow integration
@@ -16,10 +24,118 @@ from ui_components import setup_page, show_app_description
 # from property_service import get_property_data
 # from display_utils import display_property_data
 
-def process_document(text):
+@st.cache_resource
+def get_app_tracer():
+    """Process-wide tracer, exported to TRACE_FILE and served on METRICS_PORT when configured"""
+    config = load_config()
+    tracer = process_tracer()
+    if config.get("TRACE_FILE"):
+        tracer.exporters.append(JsonlSpanExporter(config["TRACE_FILE"]))
+    if config.get("METRICS_PORT"):
+        serve_metrics(tracer, int(config["METRICS_PORT"]))
+    return tracer
+
+def get_document_tracer(doc_hash):
+    """Tracer for the current document in this session; starts fresh for each new document"""
+    if st.session_state.get("trace_document") != doc_hash:
+        st.session_state.tracer = Tracer(parent=get_app_tracer())
+        st.session_state.trace_document = doc_hash
+    return st.session_state.tracer
+
+def get_context(doc_hash=None):
+    """Pipeline context that reports into this Streamlit run"""
+    if doc_hash is None:
+        return PipelineContext(reporter=StreamlitReporter(st), tracer=get_app_tracer())
+    return PipelineContext(reporter=StreamlitReporter(st), tracer=get_document_tracer(doc_hash),
+                           trace_attributes={"document": doc_hash[:12]})
+
+def show_run_summary(tracer, label="Run Summary"):
+    """Where the time and the paid-service usage went"""
+    rows = tracer.summary()
+    if not rows:
+        return
+    totals = tracer.counter_totals()
+    tripped = [breaker["service"] for breaker in breaker_states() if breaker["state"] != "closed"]
+    if tripped:
+        st.warning(f"Failing fast after repeated errors from: {', '.join(tripped)}. Retrying shortly.")
+    with st.expander(label):
+        col1, col2, col3, col4 = st.columns(4)
+        stage_seconds = sum(row["total_s"] for row in rows if row["span"].startswith("stage."))
+        col1.metric("Stage time", f"{stage_seconds:.1f} s")
+        col2.metric("OpenAI tokens", f"{totals.get('openai_prompt_tokens', 0) + totals.get('openai_completion_tokens', 0):,}",
+                    help=f"{totals.get('openai_prompt_tokens', 0):,} prompt, "
+                         f"{totals.get('openai_completion_tokens', 0):,} completion")
+        col3.metric("Textract pages", f"{totals.get('textract_pages', 0):,}")
+        external_calls = sum(row["calls"] for row in rows if not row["span"].startswith(("stage.", "pdf.")))
+        col4.metric("External calls", f"{external_calls:,}")
+        st.dataframe(
+            [{**row, "total_s": round(row["total_s"], 2), "p50_ms": round(row["p50_ms"]),
+              "p95_ms": round(row["p95_ms"])} for row in rows],
+            use_container_width=True, hide_index=True
+        )
+
+@st.cache_resource
+def get_result_cache():
+    """Stage results shared by every session and user, keyed by (stage, document hash)"""
+    return ResultCache()
+
+@st.cache_resource
+def get_results_store():
+    """Database of every analyzed case, shared by all sessions"""
+    return ResultsStore()
+
+@st.cache_resource
+def get_ocr_jobs():
+    """Background OCR jobs shared by every session, keyed by document hash"""
+    return OcrJobs()
+
+def start_ocr(pdf_data, doc_hash, page_numbers=None):
+    """OCR the document on a background thread so pages can be shown as they finish"""
+    pdf_bytes = pdf_data.getvalue()
+    name = getattr(pdf_data, "name", doc_hash[:12])
+    reporter = JobReporter(prefix=f"[{name}] ")
+    context = PipelineContext(reporter=reporter, tracer=get_document_tracer(doc_hash),
+                              trace_attributes={"document": doc_hash[:12]})
+    return get_ocr_jobs().get_or_start(
+        doc_hash, lambda on_page: ocr_document(context, io.BytesIO(pdf_bytes), on_page, page_numbers), reporter
+    )
+
+def triage_pages(pdf_data, doc_hash):
+    """Page labels for the document (None when triage is off), computed once across users"""
+    return cached("triage", doc_hash,
+                  lambda: triage_document(get_context(doc_hash), io.BytesIO(pdf_data.getvalue())))
+
+def show_skipped_pages(pdf_data, doc_hash, pages, button_key):
+    """Pages triage left out of OCR and analysis, with OCR on request"""
+    skipped = skipped_pages(pages)
+    if not skipped:
+        return
+    with st.expander(f"Skipped Pages ({len(skipped)} of {len(pages)})"):
+        st.dataframe(
+            [{"Page": page["page"], "Label": page["label"].replace("_", " ").title(), "Reason": page["reason"]}
+             for page in skipped],
+            use_container_width=True, hide_index=True
+        )
+        selected = st.multiselect("OCR skipped pages", [page["page"] for page in skipped],
+                                  key=f"{button_key}_skipped")
+        if selected and st.button("Show Selected Pages", key=f"{button_key}_show_skipped"):
+            page_numbers = sorted(selected)
+            stage = "ocr:pages" + ",".join(str(page_num) for page_num in page_numbers)
+            with st.spinner('Processing selected pages with Amazon Textract...'):
+                text = cached(stage, doc_hash, lambda: ocr_document(
+                    get_context(doc_hash), io.BytesIO(pdf_data.getvalue()), page_numbers=page_numbers
+                ))
+            if text:
+                st.text(text)
+
+def cached(stage, doc_hash, compute):
+    """Return a stage result for a document, computing it at most once across users"""
+    return get_result_cache().get_or_compute((stage, doc_hash), compute)
+
+def process_document(text, doc_hash):
     """Process document text and return analysis"""
     with st.spinner('Analyzing document content with AI...'):
-        analysis = analyze_text_with_openai(text)
+        analysis = cached("analysis", doc_hash, lambda: analyze_document(get_context(doc_hash), text))
         
         if analysis:
             st.write("### Analysis Results")
@@ -27,27 +143,16 @@ def process_document(text):
             return analysis
     return None
 
-def process_address(analysis):
+def process_address(analysis, doc_hash):
     """Extract and process address information"""
     with st.spinner('Extracting property information...'):
-        address_info = extract_address(analysis)
-        
-        if address_info and address_info.get('street_address') != 'NOT_FOUND':
-            return address_info
-        else:
-            st.error("Could not extract valid address from the document.")
-            return None
-
-def display_results(analysis, address_info):
-    """Display results and map"""
+        return cached("address", doc_hash, lambda: locate_property(get_context(doc_hash), analysis))
+
+def display_results(analysis, address_info, doc_hash):
+    """Display results and map, returning the coordinates"""
     # Get coordinates for the map
     with st.spinner('Fetching property location...'):
-        coordinates = get_coordinates(
-            address_info['street_address'],
-            address_info['city'],
-            address_info['state'],
-            address_info['zip_code']
-        )
+        coordinates = cached("coordinates", doc_hash, lambda: geocode_property(get_context(doc_hash), address_info))
         
         if coordinates:
             # Display the map
@@ -68,31 +173,256 @@ def display_results(analysis, address_info):
                 file_name="foreclosure_analysis.txt",
                 mime="text/plain"
             )
+        return coordinates
+
+@st.fragment(run_every=1)
+def show_ocr_progress(job, button_key):
+    """Pages OCR'd so far, refreshed every second until the job finishes"""
+    if job.done:
+        st.rerun()
+    finished, total_pages = job.progress()
+    ready = job.ready_pages()
+    if total_pages is None:
+        st.progress(0.0, text="Processing PDF with Amazon Textract...")
+        return
+    st.progress(finished / total_pages, text=f"Processed {finished} of {total_pages} pages")
+
+    with st.expander(f"View Extracted Text ({ready} of {total_pages} pages)" if ready else "View Extracted Text"):
+        st.text(job.partial_text())
+
+    if ready:
+        # Analysis runs in the full app rerun so its result stays on screen below
+        col1, col2 = st.columns([1, 2])
+        first_pages = col1.number_input("Pages to analyze", min_value=1, max_value=ready, value=ready,
+                                        key=f"{button_key}_first_pages")
+        if col2.button(f"Analyze First {first_pages} Pages", key=f"{button_key}_partial"):
+            st.session_state.partial_analysis = (job.key, int(first_pages))
+            st.rerun()
+
+def show_partial_analysis(job, doc_hash):
+    """Analysis of the leading pages requested while OCR was still running"""
+    requested = st.session_state.get("partial_analysis")
+    if not requested or requested[0] != doc_hash:
+        return
+    first_pages = requested[1]
+    stage = f"analysis:first{first_pages}"
+    analysis = get_result_cache().get((stage, doc_hash))
+    if analysis is None and job is not None:
+        text = job.partial_text(first_pages)
+        with st.spinner(f'Analyzing the first {first_pages} pages with AI...'):
+            analysis = cached(stage, doc_hash, lambda: analyze_document(get_context(doc_hash), text))
+    if analysis:
+        st.write(f"### Analysis of the First {first_pages} Pages")
+        st.markdown(analysis)
 
 def process_pdf(pdf_data, button_key="analyze"):
     """Process PDF data regardless of source"""
-    if 'extracted_text' not in st.session_state:
-        with st.spinner('Processing PDF with Amazon Textract...'):
-            st.session_state.extracted_text = extract_text_with_textract(pdf_data)
-    
-    if st.session_state.extracted_text:
+    # Results are keyed by file content, so a new upload never reuses another file's text
+    doc_hash = document_hash(pdf_data)
+    st.session_state.document_hash = doc_hash
+
+    with st.spinner('Sorting out which pages to read...'):
+        pages = triage_pages(pdf_data, doc_hash)
+
+    extracted_text = get_result_cache().get(("ocr", doc_hash))
+    job = None
+    if extracted_text is None:
+        job = start_ocr(pdf_data, doc_hash, relevant_pages(pages))
+        if not job.done:
+            show_ocr_progress(job, button_key)
+            show_skipped_pages(pdf_data, doc_hash, pages, button_key)
+            show_partial_analysis(job, doc_hash)
+            return
+        get_ocr_jobs().discard(doc_hash)
+        if job.error:
+            st.error(job.error)
+            return
+        extracted_text = cached("ocr", doc_hash, lambda: job.text)
+
+    show_partial_analysis(job, doc_hash)
+
+    if extracted_text:
         # Show extracted text in expandable section
         with st.expander("View Extracted Text"):
-            st.text(st.session_state.extracted_text)
+            st.text(extracted_text)
+        show_skipped_pages(pdf_data, doc_hash, pages, button_key)
         
         # Process with OpenAI
         if st.button("Analyze Document", key=button_key):
-            analysis = process_document(st.session_state.extracted_text)
+            analysis = process_document(extracted_text, doc_hash)
             if analysis:
-                address_info = process_address(analysis)
-                if address_info:
-                    display_results(analysis, address_info)
+                address_info = process_address(analysis, doc_hash)
+                coordinates = display_results(analysis, address_info, doc_hash) if address_info else None
+                get_results_store().save_result({
+                    "source": getattr(pdf_data, "name", str(pdf_data)),
+                    "document_hash": doc_hash,
+                    "pages": pages,
+                    "text": extracted_text,
+                    "analysis": analysis,
+                    "address": address_info,
+                    "coordinates": coordinates
+                })
+
+        show_run_summary(get_document_tracer(doc_hash))
+
+def process_batch(uploaded_files):
+    """Run several uploaded PDFs through the pipelined stage executor"""
+    stats_placeholder = st.empty()
+    results_placeholder = st.empty()
+    executors = []
+    rows = []
+    results = []
+
+    tracer = Tracer(parent=get_app_tracer())
+
+    documents = [(uploaded_file, None) for uploaded_file in uploaded_files]
+    for result in process_pipelined(
+        documents,
+        PipelineContext().config,
+        reporter_factory=lambda pdf_source, case_number: LoggingReporter(prefix=f"[{pdf_source.name}] "),
+        on_executor=executors.append,
+        tracer=tracer
+    ):
+        results.append(result)
+        if result["analysis"]:
+            get_results_store().save_result(result)
+        address = result["coordinates"]["formatted_address"] if result["coordinates"] else None
+        rows.append({
+            "File": result["source"],
+            "Address": address,
+            "Failed Stage": result["failed_stage"]
+        })
+        stats_placeholder.dataframe(executors[0].snapshot(), use_container_width=True)
+        results_placeholder.dataframe(rows, use_container_width=True)
+
+    if executors:
+        st.write(f"**Bottleneck stage:** {executors[0].bottleneck()}")
+    show_run_summary(tracer, "Batch Run Summary")
+    st.download_button(
+        label="Download Results (JSON Lines)",
+        data="\n".join(json.dumps(result, default=str) for result in results),
+        file_name="foreclosure_batch.jsonl",
+        mime="application/json"
+    )
+    buffer = io.BytesIO()
+    with ParquetExporter(buffer) as exporter:
+        for result in results:
+            exporter.write_result(result)
+    st.download_button(
+        label="Download Case Table (Parquet)",
+        data=buffer.getvalue(),
+        file_name="foreclosure_batch.parquet",
+        mime="application/vnd.apache.parquet"
+    )
+
+def search_cases():
+    """Search previously analyzed cases by text and structured fields"""
+    store = get_results_store()
+    st.subheader(f"Search Analyzed Cases ({store.count():,} stored)")
+
+    text = st.text_input("Full-text search (OCR text, analysis, parties)",
+                         help='FTS5 syntax, e.g. "adjustable rate" OR balloon')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        plaintiff = st.text_input("Plaintiff starts with")
+        zip_code = st.text_input("ZIP code")
+    with col2:
+        min_amount = st.number_input("Minimum judgment ($)", min_value=0, value=0, step=10000)
+        max_amount = st.number_input("Maximum judgment ($, 0 = any)", min_value=0, value=0, step=10000)
+    with col3:
+        filed_after = st.date_input("Filed on or after", value=None)
+        filed_before = st.date_input("Filed on or before", value=None)
+
+    try:
+        rows = store.search(
+            text=text or None,
+            plaintiff=plaintiff or None,
+            min_amount=min_amount or None,
+            max_amount=max_amount or None,
+            zip_code=zip_code or None,
+            filed_after=filed_after.isoformat() if filed_after else None,
+            filed_before=filed_before.isoformat() if filed_before else None,
+            order_by="rank" if text else "filing_date",
+            limit=200
+        )
+    except Exception as e:
+        st.error(f"Search error: {str(e)}")
+        return
+
+    st.write(f"{len(rows)} matching cases")
+    st.dataframe(rows, use_container_width=True)
+    for row in rows[:10]:
+        label = f"{row['case_number'] or row['id']} - {row['plaintiff'] or 'Unknown plaintiff'}"
+        with st.expander(label):
+            if row["snippet"]:
+                st.write(row["snippet"])
+            st.markdown(store.get(row["id"])["analysis"] or "")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_portfolio(last_updated):
+    """Cases with portfolio metrics; last_updated is the cache key so new and updated cases show up"""
+    from portfolio import compute_metrics, load_cases
+    return compute_metrics(load_cases(get_results_store()))
+
+def portfolio_dashboard():
+    """Rank stored cases by equity, LTV and lien stacking"""
+    # portfolio pulls in pandas, which would add about half a second to every cold start
+    from portfolio import PORTFOLIO_COLUMNS, filter_cases, format_page, page_of, sort_cases, summarize
+    store = get_results_store()
+    portfolio = load_portfolio(store.last_updated())
+    if portfolio.empty:
+        st.info("No analyzed cases yet. Analyze documents to build the portfolio.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        min_equity = st.number_input("Minimum equity spread ($)", value=0, step=10000)
+        valued_only = st.checkbox("Only cases with a market value", value=False)
+    with col2:
+        max_ltv = st.slider("Maximum loan-to-value", 0.0, 2.0, 2.0, 0.05)
+        max_liens = st.number_input("Maximum recorded liens", min_value=0, value=10)
+    with col3:
+        zip_codes = st.multiselect("ZIP codes", sorted(portfolio["zip_code"].dropna().unique()))
+        plaintiff = st.text_input("Plaintiff contains", key="portfolio_plaintiff")
+
+    matches = filter_cases(
+        portfolio,
+        min_equity=min_equity if min_equity else None,
+        max_ltv=max_ltv if max_ltv < 2.0 else None,
+        max_liens=max_liens,
+        zip_codes=zip_codes,
+        plaintiff=plaintiff or None,
+        valued_only=valued_only
+    )
+
+    totals = summarize(matches)
+    metric1, metric2, metric3, metric4 = st.columns(4)
+    metric1.metric("Cases", f"{totals['cases']:,}")
+    metric2.metric("Total positive equity", f"${totals['total_equity']:,.0f}")
+    metric3.metric("Median LTV", f"{totals['median_ltv']:.0%}" if totals["median_ltv"] is not None else "N/A")
+    metric4.metric("Underwater", f"{totals['underwater']:,}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", PORTFOLIO_COLUMNS, index=PORTFOLIO_COLUMNS.index("equity_spread"))
+    with col2:
+        ascending = st.toggle("Ascending", value=False)
+    with col3:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    page_count = max(1, -(-len(matches) // page_size))
+    with col4:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+    rows, _ = page_of(sort_cases(matches, sort_by, ascending), page, page_size)
+
+    st.dataframe(format_page(rows), use_container_width=True, hide_index=True)
 
 def main():
     show_app_description()
     
     # Create tabs for different input methods
-    tab1, tab2 = st.tabs(["Upload PDF", "Fetch from Court Website"])
+    # Tabs rerun when switched so the results database is only queried while its tabs are open
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Upload PDF", "Fetch from Court Website", "Batch Analysis",
+                                            "Search Cases", "Portfolio"], key="main_tab", on_change="rerun")
     
     with tab1:
         # File uploader
@@ -131,10 +461,29 @@ def main():
         #             # Make sure to clean up browser resources
         #             scraper.cleanup()
 
-    # Add a clear button to allow processing a new document
-    if 'extracted_text' in st.session_state:
-        if st.button("Clear and Process New Document"):
-            del st.session_state.extracted_text
+    with tab3:
+        st.subheader("Analyze Several Documents")
+        batch_files = st.file_uploader("Upload foreclosure documents (PDF)", type="pdf",
+                                       accept_multiple_files=True, key="batch_upload")
+        if batch_files and st.button("Analyze All", key="analyze_batch"):
+            process_batch(batch_files)
+
+    with tab4:
+        if tab4.open:
+            search_cases()
+
+    with tab5:
+        if tab5.open:
+            portfolio_dashboard()
+
+    # Discarding the cached results re-OCRs the document that is still loaded, so this is a paid re-run
+    if 'document_hash' in st.session_state:
+        if st.button("Re-run OCR and Analysis for This Document",
+                     help="Discards this document's cached text and analysis; Textract and OpenAI "
+                          "are called (and billed) again"):
+            get_result_cache().invalidate(st.session_state.document_hash)
+            get_ocr_jobs().discard(st.session_state.document_hash)
+            del st.session_state.document_hash
             st.rerun()
 
 if __name__ == "__main__":
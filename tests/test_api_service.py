@@ -0,0 +1,113 @@
+# tests/test_api_service.py
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("httpx")  # starlette's TestClient needs it
+from starlette.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_service
+from api_service import JobManager, create_app
+from blob_store import BlobStore
+
+PDF = b"%PDF-1.7 test filing"
+
+class StubPipeline:
+    """Stands in for process_pdf_document; results are popped in order, the last one repeats"""
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, path, context, case_number=None, enrich=True):
+        self.calls += 1
+        self.release.wait(5)
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        return {"text": "ocr text", "case_number": case_number, **result}
+
+OK = {"failed_stage": None, "analysis": "fine"}
+FAILED = {"failed_stage": "ocr", "error": "Textract unavailable"}
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    def start(*results):
+        pipeline = StubPipeline(*results)
+        monkeypatch.setattr(api_service, "process_pdf_document", pipeline)
+        manager = JobManager({}, workers=4, blob_store=BlobStore(str(tmp_path)), request_delay=0)
+        client = TestClient(create_app(manager))
+        client.__enter__()
+        clients.append(client)
+        return client, pipeline
+    clients = []
+    yield start
+    for client in clients:
+        client.__exit__(None, None, None)
+
+def submit(client, data=PDF):
+    return client.post("/jobs", content=data, headers={"Content-Type": "application/pdf"})
+
+def events(client, job_id):
+    """Every event on a job's stream; returns once the server ends the stream"""
+    received = []
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        kind = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                kind = line[len("event: "):]
+            elif line.startswith("data: "):
+                received.append((kind, json.loads(line[len("data: "):])))
+    return received
+
+def test_same_pdf_is_coalesced_into_one_run(api):
+    client, pipeline = api(OK)
+    pipeline.release.clear()
+    first, second = submit(client), submit(client)
+    assert first.status_code == 202 and not first.json()["coalesced"]
+    assert second.status_code == 200 and second.json()["coalesced"]
+    assert second.json()["job_id"] == first.json()["job_id"]
+    pipeline.release.set()
+
+    kind, event = events(client, first.json()["job_id"])[-1]
+    assert kind == "result" and event["result"]["analysis"] == "fine"
+    assert "text" not in event["result"]
+    assert pipeline.calls == 1
+    assert client.get(f"/jobs/{first.json()['job_id']}").json()["submissions"] == 2
+
+def test_failed_job_is_retried_on_resubmission(api):
+    client, pipeline = api(FAILED, OK)
+    first = submit(client).json()
+    kind, event = events(client, first["job_id"])[-1]
+    assert kind == "failed" and event["failed_stage"] == "ocr"
+
+    # The failed run was invalidated, so the pipeline runs again instead of replaying the cached failure
+    second = submit(client)
+    assert second.status_code == 202 and not second.json()["coalesced"]
+    assert second.json()["job_id"] != first["job_id"]
+    kind, event = events(client, second.json()["job_id"])[-1]
+    assert kind == "result"
+    assert pipeline.calls == 2
+    assert client.get(f"/jobs/{second.json()['job_id']}/result").json()["analysis"] == "fine"
+
+def test_event_stream_ends_after_the_outcome(api):
+    client, pipeline = api(OK)
+    job_id = submit(client).json()["job_id"]
+    live = events(client, job_id)
+    assert live[-1][0] == "result"
+    assert [kind for kind, _ in live].count("result") == 1
+
+    # A finished job's stream replays its history and ends too
+    assert events(client, job_id) == live
+
+def test_rejected_submissions(api):
+    client, pipeline = api(OK)
+    assert submit(client, b"not a pdf").status_code == 400
+    assert client.post("/jobs", json={}).status_code == 400
+    assert client.post("/jobs", content=b"x", headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.get("/jobs/missing").status_code == 404
+    assert pipeline.calls == 0
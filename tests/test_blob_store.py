@@ -0,0 +1,71 @@
+# tests/test_blob_store.py
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blob_store import BlobStore, key_hash
+
+BODY = b"%PDF-1.7 " + bytes(range(256)) * 64
+
+def response(status_code, body=b"", headers=None):
+    result = requests.Response()
+    result.status_code = status_code
+    result.headers.update(headers or {})
+    result.raw = io.BytesIO(body)
+    return result
+
+class RangeServer:
+    """Fake request function serving BODY, honouring Range only while it starts inside the body"""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.ranges = []
+
+    def __call__(self, method, url, stream=False, headers=None):
+        time.sleep(self.delay)
+        header = (headers or {}).get("Range")
+        self.ranges.append(header)
+        if header is None:
+            return response(200, BODY)
+        offset = int(header[len("bytes="):-1])
+        if offset >= len(BODY):
+            return response(416, headers={"Content-Range": f"bytes */{len(BODY)}"})
+        return response(206, BODY[offset:], {"Content-Range": f"bytes {offset}-{len(BODY) - 1}/{len(BODY)}"})
+
+def partial_path(store, key):
+    return os.path.join(store.partial_dir, key_hash(key) + ".part")
+
+def test_download_resumes_partial_file(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with open(partial_path(store, "doc"), "wb") as f:
+        f.write(BODY[:100])
+    server = RangeServer()
+    path = store.download(server, "GET", "http://court/doc", "doc")
+    assert open(path, "rb").read() == BODY
+    assert server.ranges == ["bytes=100-"]
+
+def test_stale_complete_partial_is_dropped_on_416(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with open(partial_path(store, "doc"), "wb") as f:
+        f.write(BODY)
+    server = RangeServer()
+    path = store.download(server, "GET", "http://court/doc", "doc")
+    assert open(path, "rb").read() == BODY
+    assert os.path.basename(path) == hashlib.sha256(BODY).hexdigest()[2:]
+    assert server.ranges == [f"bytes={len(BODY)}-", None]
+    assert not os.path.exists(partial_path(store, "doc"))
+
+def test_concurrent_downloads_of_one_key_fetch_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    server = RangeServer(delay=0.05)
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(lambda _: store.download(server, "GET", "http://court/doc", "doc"), range(4)))
+    assert len(set(paths)) == 1
+    assert open(paths[0], "rb").read() == BODY
+    assert server.ranges == [None]
@@ -0,0 +1,89 @@
+# tests/test_court_scraper.py
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from blob_store import BlobStore
+from court_parser import find_initial_filing
+from court_scraper import CourtScraper
+from court_scraper_hybrid import CourtScraperHybrid
+from reporting import LoggingReporter
+from standins import COOKIE_ERROR_PAGE, StandinServer
+
+def cookie_error_response():
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "text/html"
+    response.raw = io.BytesIO(COOKIE_ERROR_PAGE.encode())
+    return response
+
+def test_cookie_error_on_pdf_download_retries_once(tmp_path):
+    with StandinServer() as server:
+        scraper = CourtScraper(LoggingReporter("test"), request_delay=0, store=BlobStore(str(tmp_path)),
+                               base_url=server.config()["COURT_BASE_URL"])
+        make_request = scraper.make_request
+        calls = {"pdf": 0, "initialize": 0}
+
+        def fake_request(method, url, **kwargs):
+            if url.endswith("image_view_stream.php"):
+                calls["pdf"] += 1
+                if calls["pdf"] == 1:
+                    return cookie_error_response()
+            elif url == scraper.base_url:
+                calls["initialize"] += 1
+            return make_request(method, url, **kwargs)
+
+        scraper.make_request = fake_request
+        path = scraper.fetch_case_pdf("A 2700001")
+
+    assert path and open(path, "rb").read(4) == b"%PDF"
+    assert calls == {"pdf": 2, "initialize": 1}
+
+class FakeBrowserPool:
+    """Browser pool whose browsers take a moment to load the search page"""
+    def __init__(self):
+        self.visits = 0
+
+    @contextmanager
+    def browser(self):
+        pool = self
+
+        class Driver:
+            def get(self, url):
+                pool.visits += 1
+                time.sleep(0.05)
+
+            def get_cookies(self):
+                return [{"name": "session", "value": "abc", "domain": "127.0.0.1"}]
+
+            def execute_script(self, script):
+                return "Mozilla/5.0"
+
+        yield SimpleNamespace(driver=Driver())
+
+def test_concurrent_hybrid_bootstraps_share_one_browser_visit():
+    pool = FakeBrowserPool()
+    scraper = CourtScraperHybrid(LoggingReporter("test"), pool=pool, request_delay=0, base_url="http://127.0.0.1")
+    with ThreadPoolExecutor(4) as threads:
+        assert all(threads.map(lambda _: scraper.initialize_session(), range(4)))
+    assert pool.visits == scraper.bootstrap_count == 1
+    assert scraper.session.cookies.get("session") == "abc"
+
+def test_initial_filing_prefers_a_row_with_a_form():
+    documents = [
+        {"description": "Summons", "form": {"docid": "1"}},
+        {"description": "Initial Filing (sealed)", "form": None},
+        {"description": "Initial Filing", "form": {"docid": "3"}},
+    ]
+    assert find_initial_filing(documents)["form"] == {"docid": "3"}
+    assert find_initial_filing(documents[:2])["form"] is None
+    assert find_initial_filing(documents[:1]) is None
@@ -0,0 +1,129 @@
+# tests/test_job_queue.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_queue
+from job_queue import JobCheckpoint, JobQueue
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock.time)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, backoff_seconds=10, lease_seconds=60)
+
+def job_row(queue, job_id):
+    return queue.conn.execute("SELECT status, attempts, next_attempt_at, worker FROM jobs WHERE id = ?",
+                              (job_id,)).fetchone()
+
+def test_claim_takes_each_job_once(queue):
+    queue.enqueue("a.pdf", "A 1")
+    queue.enqueue("b.pdf")
+    queue.enqueue("a.pdf")
+    first, second = queue.claim("w1"), queue.claim("w2")
+    assert (first["source"], first["case_number"], first["attempts"]) == ("a.pdf", "A 1", 1)
+    assert second["source"] == "b.pdf"
+    assert queue.claim("w3") is None
+    assert queue.complete(first["id"], {"ok": True}, "w1")
+    assert list(queue.results()) == [{"ok": True}]
+
+def test_fail_backs_off_then_gives_up(queue, clock):
+    queue.enqueue("a.pdf")
+    job = queue.claim("w1")
+    assert queue.fail(job["id"], job["attempts"], "boom", "w1") == "pending"
+    assert queue.claim("w1") is None
+    clock.now += 10
+    job = queue.claim("w1")
+    assert job["attempts"] == 2
+    assert queue.fail(job["id"], job["attempts"], "boom", "w1") == "pending"
+    clock.now += 19
+    assert queue.claim("w1") is None
+    clock.now += 1
+    job = queue.claim("w1")
+    assert queue.fail(job["id"], job["attempts"], "boom", "w1") == "failed"
+    assert queue.counts() == {"failed": 1}
+
+def test_expired_lease_counts_as_a_failed_attempt(queue, clock):
+    queue.enqueue("a.pdf")
+    job = queue.claim("w1")
+    clock.now += 61
+    assert queue.claim("w2") is None
+    assert job_row(queue, job["id"])[:3] == ("pending", 1, 1000 + 60 + 10)
+    clock.now = 1000 + 70
+    job = queue.claim("w2")
+    assert job["attempts"] == 2
+
+    for _ in range(2):
+        clock.now += 200
+        queue.claim("w3")
+    assert job_row(queue, job["id"])[0] == "failed"
+
+def test_only_the_lease_holder_can_finish_a_job(queue, clock):
+    queue.enqueue("a.pdf")
+    stale = queue.claim("w1")
+    clock.now += 100
+    current = queue.claim("w2")
+    assert current["id"] == stale["id"]
+
+    assert not queue.complete(stale["id"], {"from": "w1"}, "w1")
+    assert queue.fail(stale["id"], stale["attempts"], "late", "w1") is None
+    assert job_row(queue, current["id"])[0] == "running"
+    assert queue.complete(current["id"], {"from": "w2"}, "w2")
+    assert not queue.complete(current["id"], {"from": "w2"}, "w2")
+    assert list(queue.results()) == [{"from": "w2"}]
+
+def test_checkpoint_resume_skips_finished_units(queue, monkeypatch):
+    monkeypatch.setattr(job_queue.time, "sleep", lambda seconds: None)
+    queue.enqueue("a.pdf")
+    job = queue.claim("w1")
+    calls = []
+
+    def unit(value):
+        def run():
+            calls.append(value)
+            return value
+        return run
+
+    checkpoint = JobCheckpoint(queue, job["id"])
+    assert checkpoint.run("ocr", unit("text")) == "text"
+    assert checkpoint.scoped("pages").run("1", unit("page one")) == "page one"
+    assert checkpoint.run("analysis", unit(None)) is None
+
+    resumed = JobCheckpoint(queue, job["id"])
+    assert resumed.run("ocr", unit("again")) == "text"
+    assert resumed.scoped("pages").run("1", unit("again")) == "page one"
+    assert resumed.run("analysis", unit("analysis")) == "analysis"
+    assert calls == ["text", "page one", None, "analysis"]
+
+def test_checkpoint_retries_a_failing_unit(queue, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(job_queue.time, "sleep", sleeps.append)
+    queue.enqueue("a.pdf")
+    job = queue.claim("w1")
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("transient")
+        return "ok"
+
+    assert JobCheckpoint(queue, job["id"], retries=3, backoff_seconds=2).run("unit", flaky) == "ok"
+    assert sleeps == [2, 4]
+    with pytest.raises(ZeroDivisionError):
+        JobCheckpoint(queue, job["id"], retries=1).run("other", lambda: 1 / 0)
+    assert queue.load_checkpoint(job["id"], "other") is None
@@ -0,0 +1,74 @@
+# tests/test_page_triage.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_triage import BLANK, BODY, EXHIBIT, ink_layout, is_cover_layout, relevant_pages, triage_pdf
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "complaint_with_exhibits.json")
+
+def fixture_pdf(path):
+    """Write the fixture pages as a text PDF; returns the expected labels"""
+    import fitz
+    with open(FIXTURE, encoding="utf-8") as f:
+        pages = json.load(f)["pages"]
+    document = fitz.open()
+    for page in pages:
+        pdf_page = document.new_page()
+        pdf_page.insert_textbox(fitz.Rect(54, 54, pdf_page.rect.width - 54, pdf_page.rect.height - 54),
+                                page["text"], fontsize=11)
+    document.save(path)
+    document.close()
+    return [page["label"] for page in pages]
+
+def test_complaint_pages_that_reference_exhibits_are_kept(tmp_path):
+    path = str(tmp_path / "complaint.pdf")
+    expected = fixture_pdf(path)
+    pages = triage_pdf(path)
+    assert [page["label"] for page in pages] == expected
+    assert relevant_pages(pages) == [1, 2, 3]
+
+def scanned_page(document, text=None, fontsize=11, rect=None):
+    """Append a page that is only an image of text, like a scan with no text layer"""
+    import fitz
+    source = fitz.open()
+    page = source.new_page()
+    if text:
+        page.insert_textbox(rect or fitz.Rect(54, 54, page.rect.width - 54, page.rect.height - 54), text,
+                            fontsize=fontsize)
+    pix = page.get_pixmap(matrix=fitz.Matrix(1.5, 1.5), colorspace=fitz.csGRAY, alpha=False)
+    scanned = document.new_page()
+    scanned.insert_image(scanned.rect, stream=pix.tobytes("png"))
+    source.close()
+
+def test_scanned_cover_sheet_starts_an_exhibit_run(tmp_path):
+    import fitz
+    with open(FIXTURE, encoding="utf-8") as f:
+        texts = [page["text"] for page in json.load(f)["pages"]]
+
+    document = fitz.open()
+    scanned_page(document, texts[0])
+    scanned_page(document, "EXHIBIT A", fontsize=28, rect=fitz.Rect(230, 380, 400, 430))
+    scanned_page(document, texts[-1])
+    scanned_page(document, texts[-1])
+    scanned_page(document)
+    path = str(tmp_path / "scanned.pdf")
+    document.save(path)
+
+    ink, bounds = ink_layout(document[1])
+    assert is_cover_layout(ink, bounds)
+    assert not is_cover_layout(*ink_layout(document[2]))
+    document.close()
+
+    pages = triage_pdf(path)
+    assert [page["text_chars"] for page in pages] == [0] * 5
+    assert [(page["label"], page["reason"]) for page in pages] == [
+        (BODY, "scanned page"),
+        (BLANK, "cover layout (small centered block of ink)"),
+        (EXHIBIT, "follows an exhibit"),
+        (EXHIBIT, "follows an exhibit"),
+        (BLANK, "no ink"),
+    ]
+    assert relevant_pages(pages) == [1]
@@ -0,0 +1,133 @@
+# tests/test_resilience.py
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resilience
+from resilience import (CircuitOpenError, Deadline, DeadlineExceeded, ServicePolicy, breaker_for, call_service,
+                        deadline_scope, document_deadline, reset_breakers)
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+@pytest.fixture(autouse=True)
+def test_policy(monkeypatch):
+    monkeypatch.setitem(resilience.SERVICE_POLICIES, "test", ServicePolicy(timeout=5, failure_threshold=3,
+                                                                          reset_timeout=60))
+    reset_breakers()
+    yield resilience.SERVICE_POLICIES["test"]
+    reset_breakers()
+
+def fail_with(error):
+    def request(timeout):
+        raise error
+    return request
+
+def call(request):
+    try:
+        return call_service("test", request)
+    except Exception as e:
+        return e
+
+def test_server_errors_open_the_breaker():
+    for _ in range(3):
+        assert isinstance(call(fail_with(StatusError(503))), StatusError)
+    assert breaker_for("test").state == "open"
+    assert isinstance(call(lambda timeout: "ok"), CircuitOpenError)
+
+def test_client_errors_do_not_count():
+    for _ in range(5):
+        call(fail_with(StatusError(400)))
+    assert breaker_for("test").state == "closed"
+    assert call(lambda timeout: "ok") == "ok"
+
+def test_expired_deadline_does_not_open_the_breaker():
+    deadline = Deadline(0.05)
+    time.sleep(0.06)
+    with deadline_scope(deadline):
+        for _ in range(5):
+            assert isinstance(call(lambda timeout: "ok"), DeadlineExceeded)
+    assert breaker_for("test").state == "closed"
+    assert call(lambda timeout: "ok") == "ok"
+
+def test_only_full_length_timeouts_count():
+    with deadline_scope(Deadline(1)):
+        for _ in range(5):
+            call(fail_with(TimeoutError("read timed out")))
+    assert breaker_for("test").state == "closed"
+
+    for _ in range(3):
+        call(fail_with(TimeoutError("read timed out")))
+    assert breaker_for("test").state == "open"
+
+def test_half_open_probe_released_after_a_client_error(test_policy):
+    test_policy.reset_timeout = 0
+    for _ in range(3):
+        call(fail_with(ConnectionError("refused")))
+    assert breaker_for("test").state == "open"
+    assert isinstance(call(fail_with(StatusError(404))), StatusError)
+    assert call(lambda timeout: "ok") == "ok"
+    assert breaker_for("test").state == "closed"
+
+def slow_request(seconds, calls):
+    def request(timeout):
+        calls.append(timeout)
+        time.sleep(seconds)
+        return "ok"
+    return request
+
+def test_hedge_sent_when_first_attempt_is_slow(monkeypatch):
+    monkeypatch.setitem(resilience.SERVICE_POLICIES, "test", ServicePolicy(timeout=2, hedges=1, hedge_after=0.1))
+    calls = []
+    assert call_service("test", slow_request(0.3, calls)) == "ok"
+    assert len(calls) == 2
+    assert calls[1] < 2 - 0.1
+
+def test_no_hedge_without_time_left_for_it(monkeypatch):
+    monkeypatch.setitem(resilience.SERVICE_POLICIES, "test",
+                        ServicePolicy(timeout=0.5, hedges=1, hedge_after=0.3, min_hedge_after=0.25))
+    calls = []
+    assert call_service("test", slow_request(0.4, calls)) == "ok"
+    assert calls == [0.5]
+
+def test_no_document_deadline_by_default():
+    assert document_deadline({}) is None
+    assert document_deadline({"DOCUMENT_DEADLINE_SECONDS": "900"}) == 900
+
+def test_attempt_timeout_shortened_by_deadline():
+    calls = []
+    with deadline_scope(Deadline(1)):
+        call_service("test", slow_request(0, calls))
+    assert 0 < calls[0] <= 1
+
+def flaky(failures, calls):
+    def request(timeout):
+        calls.append(timeout)
+        if len(calls) <= failures:
+            raise StatusError(503)
+        return "ok"
+    return request
+
+def test_retryable_errors_are_retried(monkeypatch):
+    monkeypatch.setitem(resilience.SERVICE_POLICIES, "test", ServicePolicy(timeout=5, retries=2, retry_backoff=0.01))
+    calls = []
+    assert call_service("test", flaky(2, calls), retryable=lambda e: True) == "ok"
+    assert len(calls) == 3
+
+    calls = []
+    assert isinstance(call(flaky(1, calls)), StatusError)
+    assert len(calls) == 1
+
+def test_no_retry_past_the_deadline(monkeypatch):
+    monkeypatch.setitem(resilience.SERVICE_POLICIES, "test", ServicePolicy(timeout=5, retries=2, retry_backoff=1))
+    calls = []
+    with deadline_scope(Deadline(0.3)):
+        with pytest.raises(StatusError):
+            call_service("test", flaky(1, calls), retryable=lambda e: True)
+    assert len(calls) == 1
@@ -0,0 +1,70 @@
+# tests/test_stage_executor.py
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_executor import Stage, StagedExecutor
+
+def run_with_timeout(executor, items, timeout=5):
+    """executor.run(items) collected on a thread, so a hang fails the test instead of blocking it"""
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(executor.run(items)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "executor did not finish"
+    return results
+
+def fail_on_odd(n):
+    if n % 2:
+        raise ValueError(f"odd {n}")
+    return n
+
+def test_failed_items_are_dropped_by_default():
+    executor = StagedExecutor([Stage("check", fail_on_odd, workers=2), Stage("double", lambda n: n * 2)])
+    assert sorted(run_with_timeout(executor, range(6))) == [0, 4, 8]
+    check, double = executor.snapshot()
+    assert (check["processed"], check["failed"]) == (6, 3)
+    assert (double["processed"], double["failed"]) == (3, 0)
+
+def test_on_error_replaces_failed_items():
+    errors = []
+
+    def on_error(item, stage_name, error):
+        errors.append((item, stage_name, str(error)))
+        return -item
+
+    executor = StagedExecutor([Stage("check", fail_on_odd), Stage("double", lambda n: n * 2)], on_error=on_error)
+    assert sorted(run_with_timeout(executor, range(4))) == [-6, -2, 0, 4]
+    assert sorted(errors) == [(1, "check", "odd 1"), (3, "check", "odd 3")]
+
+def test_raising_on_error_drops_the_item_without_hanging():
+    def on_error(item, stage_name, error):
+        raise RuntimeError("on_error broke")
+
+    executor = StagedExecutor([Stage("check", fail_on_odd, workers=2), Stage("double", lambda n: n * 2)],
+                              on_error=on_error)
+    assert sorted(run_with_timeout(executor, range(6))) == [0, 4, 8]
+
+def test_bounded_queues_hold_back_a_fast_stage():
+    lock = threading.Lock()
+    state = {"started": 0, "finished": 0, "max_ahead": 0}
+
+    def fast(n):
+        with lock:
+            state["started"] += 1
+            state["max_ahead"] = max(state["max_ahead"], state["started"] - state["finished"])
+        return n
+
+    def slow(n):
+        time.sleep(0.01)
+        with lock:
+            state["finished"] += 1
+        return n
+
+    executor = StagedExecutor([Stage("fast", fast, queue_size=2), Stage("slow", slow, queue_size=2)])
+    assert run_with_timeout(executor, range(30)) == list(range(30))
+    # At most: two queued for the slow stage, one in it, and one blocked putting
+    assert state["max_ahead"] <= 4
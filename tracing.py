@@ -0,0 +1,288 @@
+# tracing.py
+"""Spans and counters for pipeline stages and external service calls.
+
+Services open spans with the module-level span() and count(); they go to
+whichever Tracer is active in the current thread (see Tracer.activate),
+or to the process-wide tracer when none is. A span inherits the document
+identifiers of the span it is nested in, so a Textract call made while
+OCRing a document is tagged with that document.
+
+    tracer = Tracer(exporters=[JsonlSpanExporter("spans.jsonl")])
+    with tracer.activate(), span("stage.ocr", document=doc_hash):
+        ...
+    serve_metrics(process_tracer(), port=9108)   # Prometheus text at /metrics
+"""
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Attributes a child span copies from its parent
+INHERITED_ATTRIBUTES = ("document", "case_number", "source")
+
+# Upper bounds (seconds) of the span duration histogram buckets
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_PREFIX = "foreclosure"
+
+_current_tracer = contextvars.ContextVar("tracer", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+class Span:
+    """One timed operation"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start", "duration", "status", "error")
+
+    def __init__(self, name, attributes, parent=None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        span = cls.__new__(cls)
+        for key in cls.__slots__:
+            setattr(span, key, data.get(key))
+        span.attributes = dict(data.get("attributes") or {})
+        return span
+
+class Tracer:
+    """Collects finished spans and counters for a process, a run or a session
+
+    Spans and counter increments are also forwarded to `parent`, so a
+    per-run tracer can feed the process-wide metrics while keeping its own
+    summary. Only the most recent max_spans spans are kept in memory;
+    duration histograms and counters cover everything.
+    """
+    def __init__(self, exporters=None, parent=None, max_spans=10000):
+        self.exporters = list(exporters or [])
+        self.parent = parent
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Make this the tracer that span() and count() report to in this context"""
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        parent = _current_span.get()
+        if parent is not None:
+            attributes = {**{key: parent.attributes[key] for key in INHERITED_ATTRIBUTES
+                             if key in parent.attributes}, **attributes}
+        current = Span(name, attributes, parent)
+        token = _current_span.set(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.error = str(e)
+            raise
+        finally:
+            current.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self.finish(current)
+
+    def finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+            stats = self.durations.setdefault(span.name, {
+                "buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0, "errors": 0
+            })
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    stats["buckets"][i] += 1
+            stats["sum"] += span.duration
+            stats["count"] += 1
+            stats["errors"] += span.status == "error"
+        for exporter in self.exporters:
+            exporter.export(span)
+        if self.parent is not None:
+            self.parent.finish(span)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if self.parent is not None:
+            self.parent.count(name, value, **labels)
+
+    def counter_totals(self):
+        """{counter name: total across all labels}"""
+        totals = {}
+        with self._lock:
+            for (name, _), value in self.counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def summary(self):
+        """Per span name: calls, errors, total seconds and latency percentiles"""
+        with self._lock:
+            spans = list(self.spans)
+        by_name = {}
+        for span in spans:
+            by_name.setdefault(span.name, []).append(span)
+        rows = []
+        for name, named in by_name.items():
+            durations = sorted(span.duration for span in named)
+            rows.append({
+                "span": name,
+                "calls": len(named),
+                "errors": sum(span.status == "error" for span in named),
+                "total_s": sum(durations),
+                "p50_ms": durations[(len(durations) - 1) // 2] * 1000,
+                "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000
+            })
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def export_state(self):
+        """Spans and counters as plain data, to hand back from a worker process"""
+        with self._lock:
+            return {
+                "spans": [span.to_dict() for span in self.spans],
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()]
+            }
+
+    def merge(self, state):
+        """Add spans and counters exported by another tracer"""
+        for data in state.get("spans", []):
+            self.finish(Span.from_dict(data))
+        for name, labels, value in state.get("counters", []):
+            self.count(name, value, **labels)
+
+_process_tracer = Tracer()
+
+def process_tracer():
+    """Tracer that sees everything in this process; serves the metrics endpoint"""
+    return _process_tracer
+
+def current_tracer():
+    return _current_tracer.get() or _process_tracer
+
+def span(name, **attributes):
+    """Context manager timing an operation on the current tracer"""
+    return current_tracer().span(name, **attributes)
+
+def count(name, value=1, **labels):
+    """Increment a counter (tokens, pages, bytes...) on the current tracer"""
+    current_tracer().count(name, value, **labels)
+
+@contextmanager
+def remote_parent(data):
+    """Make spans started here children of a span from another process (its to_dict())"""
+    token = _current_span.set(Span.from_dict(data) if data else None)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+def set_attributes(**attributes):
+    """Add attributes to the innermost open span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+class JsonlSpanExporter:
+    """Appends each finished span to a JSON lines file"""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def render_prometheus(tracer):
+    """Counters and span duration histograms in the Prometheus text format"""
+    with tracer._lock:
+        counters = dict(tracer.counters)
+        durations = {name: {**stats, "buckets": list(stats["buckets"])} for name, stats in tracer.durations.items()}
+
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        metric = f"{METRIC_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{metric}{_label_text(labels)} {value}")
+
+    metric = f"{METRIC_PREFIX}_span_duration_seconds"
+    lines.append(f"# TYPE {metric} histogram")
+    for name, stats in sorted(durations.items()):
+        for bound, bucket_count in zip(DURATION_BUCKETS, stats["buckets"]):
+            lines.append(f"{metric}_bucket{_label_text([('span', name), ('le', bound)])} {bucket_count}")
+        lines.append(f"{metric}_bucket{_label_text([('span', name), ('le', '+Inf')])} {stats['count']}")
+        lines.append(f"{metric}_sum{_label_text([('span', name)])} {stats['sum']:.6f}")
+        lines.append(f"{metric}_count{_label_text([('span', name)])} {stats['count']}")
+
+    metric = f"{METRIC_PREFIX}_span_errors_total"
+    lines.append(f"# TYPE {metric} counter")
+    for name, stats in sorted(durations.items()):
+        lines.append(f"{metric}{_label_text([('span', name)])} {stats['errors']}")
+    return "\n".join(lines) + "\n"
+
+def serve_metrics(tracer=None, port=9108, host="127.0.0.1"):
+    """Serve render_prometheus(tracer) at http://host:port/metrics on a background thread"""
+    tracer = tracer or _process_tracer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(tracer).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -30,3 +30,37 @@ def show_app_description():
     - Liens and encumbrances
     - Risk factors and red flags
     """)
+
+def display_map(coordinates, property_info=None):
+    """Display an interactive map with the property location"""
+    # folium is only needed once there is something to map
+    import folium
+    from streamlit_folium import folium_static
+    try:
+        # Create a map centered on the property
+        m = folium.Map(
+            location=[coordinates["lat"], coordinates["lng"]], 
+            zoom_start=15,
+            width=800,
+            height=500
+        )
+        
+        # Add a marker for the property
+        tooltip = coordinates["formatted_address"]
+        
+        folium.Marker(
+            [coordinates["lat"], coordinates["lng"]],
+            popup=folium.Popup(tooltip, max_width=300),
+            tooltip="Click for details",
+            icon=folium.Icon(color='red', icon='home', prefix='fa')
+        ).add_to(m)
+        
+        # Add the map to Streamlit
+        st.write("### Property Location")
+        folium_static(m)
+        
+        # Display the formatted address
+        st.write(f"**Formatted Address:** {coordinates['formatted_address']}")
+        
+    except Exception as e:
+        st.error(f"Error displaying map: {str(e)}")
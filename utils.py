@@ -4,3 +4,18 @@ def format_currency(value):
     if isinstance(value, (int, float)):
         return f"${value:,.2f}"
     return value
+
+def format_currency_columns(df, columns):
+    """Copy of df with the given columns formatted as currency strings
+
+    Numbers are formatted a column at a time; anything that isn't a number
+    (such as 'N/A') is left as it was. Callers should pass only the rows
+    that are about to be displayed.
+    """
+    import pandas as pd
+    df = df.copy()
+    for column in columns:
+        values = pd.to_numeric(df[column], errors="coerce")
+        formatted = values.map("${:,.2f}".format, na_action="ignore")
+        df[column] = formatted.astype(object).where(values.notna(), df[column].astype(object))
+    return df
@@ -1,17 +1,22 @@
 # zestimate_service.py
-import requests
-import streamlit as st
+from config import get_endpoint, get_setting, load_config
+from reporting import default_reporter
+from resilience import ServiceUnavailable, call_service, get_json
+from tracing import span
 
-def get_zestimate_data(address, city, state, zip_code):
+def get_zestimate_data(address, city, state, zip_code, config=None, reporter=None):
     """Get Zestimate data from Bridge Data Output API"""
+    import requests
+    reporter = default_reporter(reporter)
+    config = config if config is not None else load_config()
     try:
-        base_url = "https://api.bridgedataoutput.com/api/v2/zestimates_v2/zestimates"
+        base_url = f"{get_endpoint(config, 'BRIDGE_API_URL')}/zestimates_v2/zestimates"
         
         # Format the full address with quotes
         full_address = f'"{address}, {city}, {state} {zip_code}"'
         
         params = {
-            'access_token': st.secrets['BRIDGE_API_KEY'],
+            'access_token': get_setting(config, 'BRIDGE_API_KEY'),
             'address': full_address
         }
         
@@ -19,10 +24,11 @@ def get_zestimate_data(address, city, state, zip_code):
             'Accept': 'application/json'
         }
         
-        response = requests.get(base_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        with span("bridge.zestimates"):
+            data = call_service(
+                "bridge", lambda timeout: get_json(base_url, params, headers, timeout=timeout),
+                cache_key=("zestimates", full_address)
+            )
         if not data.get('bundle'):
             return None
         
@@ -52,8 +58,8 @@ def get_zestimate_data(address, city, state, zip_code):
         
         return zestimate_info
         
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching Zestimate data: {str(e)}")
+    except (requests.exceptions.RequestException, ServiceUnavailable, KeyError) as e:  # KeyError: missing setting
+        reporter.error(f"Error fetching Zestimate data: {str(e)}")
         if hasattr(e, 'response') and e.response is not None:
-            st.error(f"Response text: {e.response.text}")
+            reporter.error(f"Response text: {e.response.text}")
         return None